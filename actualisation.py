@@ -0,0 +1,130 @@
+"""
+Valeur actuelle nette (VAN) et taux de rendement interne (TRI) d'un investissement locatif,
+pour N scénarios à la fois.
+
+Flux d'un scénario (une colonne par période) : l'apport en sortie à l'origine, le cash-flow
+net de chaque période, et à l'horizon la revente du bien (valorisation) diminuée du capital
+restant dû. Le TRI se résout pour toutes les lignes en même temps : pas de Newton gardé dans
+un intervalle qui encadre la racine, et bisection dès que le pas sort de l'intervalle ou ne
+réduit pas assez l'écart (critère de `rtsafe`, Numerical Recipes).
+Une ligne sans racine encadrée ou non convergée vaut NaN.
+"""
+import numpy as np
+from typing import Mapping, NamedTuple
+
+TAUX_ACTUALISATION = 0.03     # 3% par an, pour la VAN
+TAUX_MIN, TAUX_MAX = -0.99, 10.0  # intervalle de recherche du TRI (annuel)
+
+
+class ResultatTRI(NamedTuple):
+    taux: np.ndarray      # TRI annualisé par ligne (NaN si non trouvé)
+    converge: np.ndarray  # bool par ligne
+    iterations: int       # itérations effectuées (lignes les plus lentes)
+
+
+def flux_investissement(projection: Mapping[str, np.ndarray], apport) -> np.ndarray:
+    """
+    Flux (N, périodes + 1) à partir d'une projection de `projection_rentabilite_batch`
+    (cash_flow_net, valorisation_bien, capital_restant) : -apport, cash-flows, revente nette.
+    """
+    cash_flow = np.atleast_2d(np.asarray(projection["cash_flow_net"], dtype=np.float64))
+    n = cash_flow.shape[0]
+    flux = np.empty((n, cash_flow.shape[1] + 1))
+    flux[:, 0] = -np.broadcast_to(np.asarray(apport, dtype=np.float64), (n,))
+    flux[:, 1:] = cash_flow
+    flux[:, -1] += (np.atleast_2d(np.asarray(projection["valorisation_bien"], dtype=np.float64))[:, -1]
+                    - np.atleast_2d(np.asarray(projection["capital_restant"], dtype=np.float64))[:, -1])
+    return flux
+
+
+def _taux_periode(taux_annuel, periodes_par_an: int):
+    return (1 + np.asarray(taux_annuel, dtype=np.float64)) ** (1 / periodes_par_an) - 1
+
+
+def _van_et_derivee(flux: np.ndarray, taux: np.ndarray):
+    """VAN de chaque ligne au taux de la ligne et sa dérivée, par schéma de Horner en 1 / (1 + taux)."""
+    d = 1 / (1 + taux)
+    valeur = flux[:, -1].copy()
+    derivee = np.zeros_like(valeur)
+    for t in range(flux.shape[1] - 2, -1, -1):
+        derivee = derivee * d + valeur
+        valeur = valeur * d + flux[:, t]
+    return valeur, -derivee * d * d
+
+
+def van(flux, taux_annuel=TAUX_ACTUALISATION, periodes_par_an: int = 1) -> np.ndarray:
+    """VAN de chaque ligne de flux (un taux commun ou un taux par ligne)."""
+    flux = np.atleast_2d(np.asarray(flux, dtype=np.float64))
+    taux = np.broadcast_to(_taux_periode(taux_annuel, periodes_par_an), (flux.shape[0],))
+    return _van_et_derivee(flux, taux)[0]
+
+
+def resoudre_tri(flux, periodes_par_an: int = 1, precision: float = 1e-10, iterations_max: int = 100) -> ResultatTRI:
+    """
+    TRI de chaque ligne de flux, annualisé (flux mensuels : `periodes_par_an=12`).
+
+    Seules les lignes dont la VAN change de signe entre TAUX_MIN et TAUX_MAX sont résolues.
+    L'intervalle est resserré à chaque itération ; le pas de Newton n'est retenu que s'il
+    reste strictement à l'intérieur et fait au plus la moitié du pas précédent, sinon le
+    milieu de l'intervalle le remplace (convergence au pire celle de la bisection).
+    Arrêt par ligne quand la VAN ou l'intervalle devient négligeable.
+    """
+    flux = np.atleast_2d(np.asarray(flux, dtype=np.float64))
+    n = flux.shape[0]
+    taux = np.full(n, np.nan)
+    converge = np.zeros(n, dtype=bool)
+
+    echelle = np.abs(flux).sum(axis=1)
+    bas = np.full(n, _taux_periode(TAUX_MIN, periodes_par_an))
+    haut = np.full(n, _taux_periode(TAUX_MAX, periodes_par_an))
+    with np.errstate(over="ignore", invalid="ignore"):
+        van_bas = _van_et_derivee(flux, bas)[0]
+        van_haut = _van_et_derivee(flux, haut)[0]
+    actives = np.flatnonzero(np.isfinite(echelle) & (echelle > 0) & (van_bas * van_haut < 0))
+
+    flux, echelle = flux[actives], echelle[actives]
+    bas, haut, van_bas = bas[actives], haut[actives], van_bas[actives]
+    courant = np.clip(_taux_periode(0.1, periodes_par_an), bas, haut)
+    pas = haut - bas
+    iterations = 0
+    while len(actives) and iterations < iterations_max:
+        iterations += 1
+        valeur, derivee = _van_et_derivee(flux, courant)
+
+        # L'intervalle garde une VAN de signe opposé à chaque borne
+        cote_bas = np.sign(valeur) == np.sign(van_bas)
+        bas = np.where(cote_bas, courant, bas)
+        van_bas = np.where(cote_bas, valeur, van_bas)
+        haut = np.where(cote_bas, haut, courant)
+
+        termine = (np.abs(valeur) <= precision * echelle) | (haut - bas <= precision * (1 + np.abs(courant)))
+        if termine.any():
+            taux[actives[termine]] = courant[termine]
+            converge[actives[termine]] = True
+            garde = ~termine
+            actives, flux, echelle = actives[garde], flux[garde], echelle[garde]
+            bas, haut, van_bas = bas[garde], haut[garde], van_bas[garde]
+            courant, valeur, derivee = courant[garde], valeur[garde], derivee[garde]
+            pas = pas[garde]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pas_newton = valeur / derivee
+        newton = courant - pas_newton
+        accepte = (np.isfinite(newton) & (newton > bas) & (newton < haut)
+                   & (2 * np.abs(pas_newton) <= np.abs(pas)))
+        pas, milieu = np.where(accepte, pas_newton, (haut - bas) / 2), (bas + haut) / 2
+        courant = np.where(accepte, newton, milieu)
+
+    return ResultatTRI((1 + taux) ** periodes_par_an - 1, converge, iterations)
+
+
+def tri(flux, periodes_par_an: int = 1) -> np.ndarray:
+    """TRI annualisé de chaque ligne de flux (NaN si aucun taux ne l'annule dans l'intervalle de recherche)."""
+    return resoudre_tri(flux, periodes_par_an).taux
+
+
+def tri_et_van(projection: Mapping[str, np.ndarray], apport, taux_actualisation: float = TAUX_ACTUALISATION,
+               periodes_par_an: int = 1) -> dict:
+    """TRI et VAN, revente à l'horizon comprise, des N projets d'une projection de rentabilité."""
+    flux = flux_investissement(projection, apport)
+    return {"tri": tri(flux, periodes_par_an), "van": van(flux, taux_actualisation, periodes_par_an)}
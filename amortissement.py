@@ -0,0 +1,112 @@
+import numpy as np
+from typing import Optional
+from calculs import mensualite_credit
+from calculs_batch import mensualite_credit_vec
+
+
+def capital_restant_du(capital, taux_annuel, duree_annees, mois) -> np.ndarray:
+    """
+    Capital restant dû après `mois` échéances (formule fermée, sans boucle).
+
+    Tous les arguments sont diffusables (broadcasting NumPy) : on peut passer
+    N prêts en colonne et une grille de mois en ligne.
+    """
+    capital = np.asarray(capital, dtype=np.float64)
+    n = np.asarray(duree_annees, dtype=np.float64) * 12
+    i = np.asarray(taux_annuel, dtype=np.float64) / 100 / 12
+    k = np.clip(np.asarray(mois, dtype=np.float64), 0, n)
+    mensualite = mensualite_credit_vec(capital, taux_annuel, duree_annees)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        facteur = (1 + i) ** k
+        restant = np.where(i == 0, capital - mensualite * k, capital * facteur - mensualite * (facteur - 1) / i)
+    # Les prêts nuls ou soldés valent 0 (on gomme les résidus d'arrondi)
+    restant = np.where((capital > 0) & (k < n), restant, 0.0)
+    return np.maximum(restant, 0.0)
+
+
+def tableau_amortissement(capital: float, taux_annuel: float, duree_annees: int) -> dict:
+    """
+    Tableau d'amortissement mensuel complet d'un prêt à mensualités constantes.
+
+    Retourne un dictionnaire de tableaux NumPy (une valeur par échéance) :
+    mois, mensualite, interets, capital_rembourse, capital_restant.
+    """
+    n = int(duree_annees * 12)
+    mensualite = mensualite_credit(capital, taux_annuel, duree_annees)
+    mois = np.arange(1, n + 1)
+    restant = capital_restant_du(capital, taux_annuel, duree_annees, np.arange(0, n + 1))
+    if capital <= 0:
+        restant[:] = 0.0
+    capital_rembourse = restant[:-1] - restant[1:]
+    return {
+        "mois": mois,
+        "mensualite": np.full(n, float(mensualite)),
+        "interets": mensualite - capital_rembourse,
+        "capital_rembourse": capital_rembourse,
+        "capital_restant": restant[1:],
+    }
+
+
+def amortissement_annuel(capital, taux_annuel, duree_annees, annees: Optional[int] = None) -> dict:
+    """
+    Synthèse annuelle de l'amortissement pour un ou plusieurs prêts.
+
+    Seuls les soldes de fin d'année sont calculés (formule fermée), sans
+    matérialiser les échéances mensuelles : la mémoire reste en O(prêts × années).
+    Retourne des tableaux de forme (prêts, années) : annuite, interets,
+    capital_rembourse, capital_restant ; plus la clé `annee` (1..années).
+    """
+    capital = np.atleast_1d(np.asarray(capital, dtype=np.float64))
+    taux_annuel = np.atleast_1d(np.asarray(taux_annuel, dtype=np.float64))
+    duree_annees = np.atleast_1d(np.asarray(duree_annees, dtype=np.float64))
+    capital, taux_annuel, duree_annees = np.broadcast_arrays(capital, taux_annuel, duree_annees)
+    if annees is None:
+        annees = int(np.max(duree_annees)) if duree_annees.size else 0
+
+    annee = np.arange(1, annees + 1)
+    fin_annee = 12 * np.arange(0, annees + 1)[None, :]
+    c, t, d = capital[:, None], taux_annuel[:, None], duree_annees[:, None]
+
+    restant = capital_restant_du(c, t, d, fin_annee)
+    restant[:, 0] = np.maximum(capital, 0.0)
+    capital_rembourse = restant[:, :-1] - restant[:, 1:]
+
+    # Nombre d'échéances réellement payées dans chaque année (0 après la fin du prêt)
+    echeances = np.clip(d * 12 - fin_annee[:, :-1], 0, 12)
+    annuite = mensualite_credit_vec(c, t, d) * echeances
+    return {
+        "annee": annee,
+        "annuite": annuite,
+        "interets": annuite - capital_rembourse,
+        "capital_rembourse": capital_rembourse,
+        "capital_restant": restant[:, 1:],
+    }
+
+
+def amortissement_mensuel(capital, taux_annuel, duree_annees, mois: Optional[int] = None) -> dict:
+    """
+    Échéancier mensuel d'un ou plusieurs prêts, en tableaux (prêts, mois) calculés d'un bloc.
+
+    Même découpage que `amortissement_annuel` à la résolution du mois : mensualite (0 après
+    la fin du prêt), interets, capital_rembourse, capital_restant ; plus la clé `mois` (1..mois).
+    """
+    capital = np.atleast_1d(np.asarray(capital, dtype=np.float64))
+    taux_annuel = np.atleast_1d(np.asarray(taux_annuel, dtype=np.float64))
+    duree_annees = np.atleast_1d(np.asarray(duree_annees, dtype=np.float64))
+    capital, taux_annuel, duree_annees = np.broadcast_arrays(capital, taux_annuel, duree_annees)
+    if mois is None:
+        mois = int(np.max(duree_annees)) * 12 if duree_annees.size else 0
+
+    c, t, d = capital[:, None], taux_annuel[:, None], duree_annees[:, None]
+    restant = capital_restant_du(c, t, d, np.arange(0, mois + 1)[None, :])
+    restant[:, 0] = np.maximum(capital, 0.0)
+    capital_rembourse = restant[:, :-1] - restant[:, 1:]
+    mensualite = np.where(np.arange(1, mois + 1)[None, :] <= d * 12, mensualite_credit_vec(c, t, d), 0.0)
+    return {
+        "mois": np.arange(1, mois + 1),
+        "mensualite": mensualite,
+        "interets": mensualite - capital_rembourse,
+        "capital_rembourse": capital_rembourse,
+        "capital_restant": restant[:, 1:],
+    }
@@ -1,34 +1,37 @@
 
+import asyncio
+import random
+import httpx
 import openai
 import os
-from typing import Optional
+import threading
+import time
+import numpy as np
+from typing import Iterator, Optional, Sequence, Tuple
 from data_models import SituationActuelle, NouveauProjet, PremierBien
+from resultats import ResultatRatios
+from cache_ia import CacheAnalysesIA, cache_par_defaut, cle_requete, cle_quasi_doublon
+from instrumentation import enregistrer
 
-def analyser_projet_avec_ia(resultats: dict, situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None) -> str:
+MODELE_IA = "gpt-4o"
+PARAMETRES_IA = {"max_tokens": 150, "temperature": 0.7}
+LIMITES_CONNEXIONS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60)
+STATUTS_A_REESSAYER = {408, 409, 429, 500, 502, 503, 504}
+MESSAGE_SYSTEME = "Tu es un conseiller patrimonial expert, rigoureux et pédagogue. Tu analyses les projets immobiliers avec une approche professionnelle et donnes des conseils adaptés à chaque situation."
+
+def construire_messages(resultats: ResultatRatios, situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None) -> list:
     """
-    Analyse le projet immobilier avec OpenAI GPT-4o en tant que conseiller patrimonial.
+    Construit les messages (système + utilisateur) envoyés à l'IA pour un projet.
     """
     
-    # Récupérer la clé API depuis les secrets
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return "❌ Erreur : Clé API OpenAI non configurée. Veuillez ajouter OPENAI_API_KEY dans les secrets."
-    
-    # Validation basique de la clé API
-    if not api_key.startswith('sk-') or len(api_key) < 40:
-        return "❌ Erreur : Format de clé API OpenAI invalide."
-    
-    # Configurer le client OpenAI
-    client = openai.OpenAI(api_key=api_key)
-    
     # Préparer les données du projet pour l'analyse
     contexte_projet = f"""
 SITUATION FINANCIÈRE ACTUELLE :
-- Revenus salaires mensuels : {resultats['revenus_salaires']:,.0f} €
-- Revenus locatifs mensuels : {resultats['revenus_locatifs']:,.0f} €
-- Revenus totaux mensuels : {resultats['revenus_totaux']:,.0f} €
+- Revenus salaires mensuels : {resultats.revenus_salaires:,.0f} €
+- Revenus locatifs mensuels : {resultats.revenus_locatifs:,.0f} €
+- Revenus totaux mensuels : {resultats.revenus_totaux:,.0f} €
 - Charges mensuelles : Non détaillé
-- Mensualités autres crédits : {resultats['mensualites_autres_credits']:,.0f} €
+- Mensualités autres crédits : {resultats.mensualites_autres_credits:,.0f} €
 - Nombre de personnes dans le foyer : {situation.personnes_foyer}
 
 PREMIER BIEN EXISTANT :
@@ -39,9 +42,9 @@ PREMIER BIEN EXISTANT :
 - Mensualité actuelle : {premier_bien.mensualite_actuelle:,.0f} €
 - Loyer perçu : {premier_bien.loyer_percu:,.0f} €
 """
-        if resultats.get('anciennete_pret_annees', 0) > 0:
-            contexte_projet += f"""- Ancienneté du prêt : {resultats['anciennete_pret_annees']:.1f} ans
-- Durée restante : {resultats['duree_restante_annees']:.1f} ans
+        if resultats.anciennete_pret_annees > 0:
+            contexte_projet += f"""- Ancienneté du prêt : {resultats.anciennete_pret_annees:.1f} ans
+- Durée restante : {resultats.duree_restante_annees:.1f} ans
 """
     else:
         contexte_projet += "- Aucun bien immobilier existant\n"
@@ -56,29 +59,29 @@ NOUVEAU PROJET :
 - Taux nominal : {projet.taux_nominal}%
 - Durée du prêt : {projet.duree_annees} ans
 - Loyer attendu : {projet.loyer_attendu:,.0f} €
-- Mensualité calculée : {resultats['mensualite_nouveau']:,.0f} €
+- Mensualité calculée : {resultats.mensualite_nouveau:,.0f} €
 """
     else:
         contexte_projet += "- Aucun nouveau projet défini\n"
     
     contexte_projet += f"""
 INDICATEURS CALCULÉS :
-- Taux d'endettement : {resultats['taux_endettement']*100:.1f}% (seuil bancaire : 35%)
-- Taux d'effort : {resultats['taux_effort']*100:.1f}%
-- Reste à vivre : {resultats['reste_a_vivre']:,.0f} € (minimum recommandé : {800 * situation.personnes_foyer:,.0f} €)
-- Total mensualités : {resultats['mensualites_totales']:,.0f} €
+- Taux d'endettement : {resultats.taux_endettement*100:.1f}% (seuil bancaire : 35%)
+- Taux d'effort : {resultats.taux_effort*100:.1f}%
+- Reste à vivre : {resultats.reste_a_vivre:,.0f} € (minimum recommandé : {800 * situation.personnes_foyer:,.0f} €)
+- Total mensualités : {resultats.mensualites_totales:,.0f} €
 """
     
     # Ajouter les détails par porteur si applicable
-    if resultats.get('details_porteurs'):
+    if resultats.details_porteurs:
         contexte_projet += "\nDÉTAIL PAR PORTEUR DU PROJET :\n"
-        for detail in resultats['details_porteurs']:
+        for detail in resultats.details_porteurs:
             contexte_projet += f"""
-- {detail['nom']} ({detail['pourcentage']}% du projet) :
-  * Revenus salaires : {detail['revenus_salaires']:,.0f} €
-  * Taux d'endettement : {detail['taux_endettement']*100:.1f}%
-  * Taux d'effort : {detail['taux_effort']*100:.1f}%
-  * Reste à vivre : {detail['reste_a_vivre']:,.0f} €
+- {detail.nom} ({detail.pourcentage}% du projet) :
+  * Revenus salaires : {detail.revenus_salaires:,.0f} €
+  * Taux d'endettement : {detail.taux_endettement*100:.1f}%
+  * Taux d'effort : {detail.taux_effort*100:.1f}%
+  * Reste à vivre : {detail.reste_a_vivre:,.0f} €
 """
     
     # Prompt pour l'IA
@@ -98,26 +101,232 @@ Sois précis, professionnel et bienveillant. Utilise des emojis.
 IMPÉRATIF : Limite ta réponse à 500 caractères maximum (environ 80-100 mots).
 """
     
+    return [
+        {
+            "role": "system", 
+            "content": MESSAGE_SYSTEME
+        },
+        {
+            "role": "user", 
+            "content": prompt
+        }
+    ]
+
+_clients = {}
+_verrou_clients = threading.Lock()
+
+def obtenir_client(api_key: str) -> openai.OpenAI:
+    """
+    Client OpenAI partagé par tout le processus (un par clé et URL de base).
+
+    Le pool de connexions HTTP est réutilisé d'un appel à l'autre : plus de
+    poignée de main TLS ni de construction de client à chaque analyse.
+    """
+    base_url = os.getenv("OPENAI_BASE_URL")
+    with _verrou_clients:
+        client = _clients.get((api_key, base_url))
+        if client is None:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=httpx.Client(limits=LIMITES_CONNEXIONS))
+            _clients[(api_key, base_url)] = client
+        return client
+
+def _verifier_cle_api() -> Tuple[Optional[str], Optional[str]]:
+    """Retourne (clé API, None) ou (None, message d'erreur)."""
+    # Récupérer la clé API depuis les secrets
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None, "❌ Erreur : Clé API OpenAI non configurée. Veuillez ajouter OPENAI_API_KEY dans les secrets."
+    
+    # Validation basique de la clé API
+    if not api_key.startswith('sk-') or len(api_key) < 40:
+        return None, "❌ Erreur : Format de clé API OpenAI invalide."
+    return api_key, None
+
+def _cle_cache(messages: list, resultats: ResultatRatios, situation, premier_bien, projet, quasi_doublons: bool) -> str:
+    if quasi_doublons or os.getenv("IA_CACHE_QUASI_DOUBLONS") == "1":
+        return cle_quasi_doublon(MODELE_IA, PARAMETRES_IA, resultats, situation, premier_bien, projet)
+    return cle_requete(MODELE_IA, messages, PARAMETRES_IA)
+
+def analyser_projet_avec_ia_flux(resultats: ResultatRatios, situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None,
+                                 cache: Optional[CacheAnalysesIA] = None, utiliser_cache: bool = True, quasi_doublons: bool = False,
+                                 mesures: Optional[dict] = None) -> Iterator[str]:
+    """
+    Analyse le projet avec l'IA en diffusant la réponse morceau par morceau (générateur).
+
+    Les réponses sont mises en cache sur disque (voir cache_ia) : une analyse identique
+    est restituée d'un bloc, sans nouvel appel. Avec `quasi_doublons`, la clé repose sur
+    les entrées arrondies par classes, pour partager l'analyse entre scénarios très proches.
+    Si `mesures` est fourni, il reçoit premier_jeton_s, total_s et depuis_cache.
+    """
+    debut = time.perf_counter()
+    mesures = mesures if mesures is not None else {}
+    mesures.update({"premier_jeton_s": None, "total_s": None, "depuis_cache": False})
+    
+    api_key, erreur = _verifier_cle_api()
+    if erreur:
+        yield erreur
+        return
+    
+    messages = construire_messages(resultats, situation, premier_bien, projet)
+    
+    # Consultation du cache avant tout appel payant
+    if utiliser_cache:
+        cache = cache or cache_par_defaut()
+        cle = _cle_cache(messages, resultats, situation, premier_bien, projet, quasi_doublons)
+        reponse_en_cache = cache.obtenir(cle)
+        if reponse_en_cache is not None:
+            mesures.update({"premier_jeton_s": time.perf_counter() - debut, "total_s": time.perf_counter() - debut, "depuis_cache": True})
+            enregistrer("ia_cache", mesures["total_s"])
+            yield reponse_en_cache
+            return
+    
+    # Client partagé (connexions réutilisées)
+    client = obtenir_client(api_key)
+    
     try:
-        # Appel à l'API OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Tu es un conseiller patrimonial expert, rigoureux et pédagogue. Tu analyses les projets immobiliers avec une approche professionnelle et donnes des conseils adaptés à chaque situation."
-                },
-                {
-                    "role": "user", 
-                    "content": prompt
-                }
-            ],
-            max_tokens=150,
-            temperature=0.7,
-            timeout=30.0
+        # Appel à l'API OpenAI en mode flux
+        flux = client.chat.completions.create(
+            model=MODELE_IA,
+            messages=messages,
+            timeout=30.0,
+            stream=True,
+            **PARAMETRES_IA
         )
         
-        return response.choices[0].message.content
+        morceaux = []
+        for evenement in flux:
+            if not evenement.choices:
+                continue
+            morceau = evenement.choices[0].delta.content
+            if morceau:
+                if mesures["premier_jeton_s"] is None:
+                    mesures["premier_jeton_s"] = time.perf_counter() - debut
+                morceaux.append(morceau)
+                yield morceau
+        
+        mesures["total_s"] = time.perf_counter() - debut
+        if mesures["premier_jeton_s"] is not None:
+            enregistrer("ia_premier_jeton", mesures["premier_jeton_s"])
+        enregistrer("ia_appel", mesures["total_s"])
+        analyse = "".join(morceaux)
+        if utiliser_cache and analyse:
+            cache.enregistrer(cle, analyse)
         
     except Exception as e:
-        return f"❌ Erreur lors de l'analyse IA : {str(e)}\n\nVérifiez que votre clé API OpenAI est valide et que vous avez du crédit disponible."
+        mesures["total_s"] = time.perf_counter() - debut
+        enregistrer("ia_erreur", mesures["total_s"])
+        yield f"❌ Erreur lors de l'analyse IA : {str(e)}\n\nVérifiez que votre clé API OpenAI est valide et que vous avez du crédit disponible."
+
+def analyser_projet_avec_ia(resultats: ResultatRatios, situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None,
+                            cache: Optional[CacheAnalysesIA] = None, utiliser_cache: bool = True, quasi_doublons: bool = False) -> str:
+    """
+    Analyse le projet immobilier avec OpenAI GPT-4o en tant que conseiller patrimonial.
+    """
+    return "".join(analyser_projet_avec_ia_flux(resultats, situation, premier_bien, projet, cache, utiliser_cache, quasi_doublons))
+
+class AnalyseEnArrierePlan:
+    """
+    Analyse IA exécutée dans un thread : le texte s'accumule au fil du flux
+    sans bloquer l'exécution du script Streamlit, qui vient le relire.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.texte = ""
+        self.termine = False
+        self.mesures = {}
+        self._thread = threading.Thread(target=self._executer, args=args, kwargs=kwargs, daemon=True)
+        self._thread.start()
+
+    def _executer(self, *args, **kwargs):
+        try:
+            for morceau in analyser_projet_avec_ia_flux(*args, mesures=self.mesures, **kwargs):
+                self.texte += morceau
+        finally:
+            self.termine = True
+
+async def _analyser_un_projet_async(client: openai.AsyncOpenAI, semaphore: asyncio.Semaphore, entree: tuple,
+                                    cache: Optional[CacheAnalysesIA], quasi_doublons: bool, tentatives: int,
+                                    delai_initial: float, statistiques: dict) -> str:
+    """Analyse d'un projet avec reprises (backoff exponentiel + gigue) sur 429 / 5xx / erreurs réseau."""
+    resultats, situation, premier_bien, projet = entree
+    messages = construire_messages(resultats, situation, premier_bien, projet)
+    cle = None
+    if cache is not None:
+        cle = _cle_cache(messages, resultats, situation, premier_bien, projet, quasi_doublons)
+        reponse_en_cache = cache.obtenir(cle)
+        if reponse_en_cache is not None:
+            statistiques["depuis_cache"] += 1
+            return reponse_en_cache
+
+    derniere_erreur = None
+    for tentative in range(tentatives):
+        if tentative:
+            statistiques["reprises"] += 1
+            await asyncio.sleep(delai_initial * 2 ** (tentative - 1) * random.uniform(0.5, 1.5))
+        async with semaphore:
+            debut = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(model=MODELE_IA, messages=messages, timeout=30.0, **PARAMETRES_IA)
+            except openai.APIStatusError as e:
+                derniere_erreur = e
+                if e.status_code in STATUTS_A_REESSAYER:
+                    continue
+                break
+            except (openai.APIConnectionError, openai.APITimeoutError) as e:
+                derniere_erreur = e
+                continue
+            finally:
+                statistiques["latences"].append(time.perf_counter() - debut)
+        analyse = response.choices[0].message.content
+        if cache is not None and analyse:
+            cache.enregistrer(cle, analyse)
+        statistiques["succes"] += 1
+        return analyse
+
+    statistiques["echecs"] += 1
+    return f"❌ Erreur lors de l'analyse IA : {str(derniere_erreur)}"
+
+async def analyser_projets_async(entrees: Sequence[tuple], concurrence: int = 8, tentatives: int = 5,
+                                 delai_initial: float = 0.5, cache: Optional[CacheAnalysesIA] = None,
+                                 utiliser_cache: bool = True, quasi_doublons: bool = False) -> Tuple[list, dict]:
+    """
+    Analyse N projets en parallèle avec au plus `concurrence` requêtes simultanées.
+
+    `entrees` est une suite de tuples (resultats, situation, premier_bien, projet).
+    Les erreurs 429 / 5xx et réseau sont retentées avec un backoff exponentiel.
+    Retourne (analyses dans l'ordre des entrées, statistiques agrégées de latence).
+    """
+    api_key, erreur = _verifier_cle_api()
+    if erreur:
+        return [erreur] * len(entrees), {}
+
+    if utiliser_cache:
+        cache = cache or cache_par_defaut()
+    else:
+        cache = None
+
+    statistiques = {"succes": 0, "echecs": 0, "reprises": 0, "depuis_cache": 0, "latences": []}
+    semaphore = asyncio.Semaphore(concurrence)
+    debut = time.perf_counter()
+    # Un client asynchrone par lot : ses connexions sont partagées par toutes les requêtes du lot
+    async with openai.AsyncOpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL"), max_retries=0,
+                                  http_client=httpx.AsyncClient(limits=LIMITES_CONNEXIONS)) as client:
+        analyses = await asyncio.gather(*[
+            _analyser_un_projet_async(client, semaphore, entree, cache, quasi_doublons, tentatives, delai_initial, statistiques)
+            for entree in entrees
+        ])
+
+    latences = np.array(statistiques.pop("latences")) * 1000
+    statistiques.update({
+        "projets": len(entrees),
+        "duree_totale_s": time.perf_counter() - debut,
+        "requetes": int(latences.size),
+        "latence_p50_ms": float(np.percentile(latences, 50)) if latences.size else None,
+        "latence_p95_ms": float(np.percentile(latences, 95)) if latences.size else None,
+        "latence_max_ms": float(latences.max()) if latences.size else None,
+    })
+    return list(analyses), statistiques
+
+def analyser_projets(entrees: Sequence[tuple], **options) -> Tuple[list, dict]:
+    """Version synchrone de `analyser_projets_async` (pour les scripts et le batch)."""
+    return asyncio.run(analyser_projets_async(entrees, **options))
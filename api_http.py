@@ -0,0 +1,378 @@
+"""
+API HTTP/JSON du simulateur, sans dépendance web (bibliothèque standard uniquement).
+
+Points d'accès (POST, corps JSON validé par les modèles de data_models.py) :
+
+    /ratios      {situation, premier_bien?, projet?}                -> ratios de calcul_ratios
+    /projection  {projet, annees?, mensuelle?}                      -> projection de rentabilité annuelle ou mensuelle
+    /capacite    {situation, premier_bien?, apport, taux_nominal, duree_annees, loyer_attendu}
+    /pdf         {situation, premier_bien?, projet?, analyse_ia?}   -> rapport PDF (application/pdf)
+    /batch       {scenarios: [{situation, premier_bien?, projet?}, ...], annees?}
+    /portefeuille {portefeuille: {situation, biens: [...]}, mois?, par_bien?} -> projection mensuelle consolidée
+    GET /sante   -> {"statut": "ok"}
+    GET /metriques[?format=jsonl] -> durées par route et par étape (texte Prometheus ou JSON lines)
+
+Avec --processus > 1, chaque processus tient ses propres métriques : la requête GET
+tombe sur l'un d'eux (étiquette `pid` des séries).
+
+Usage : python api_http.py --port 8000 [--processus 4]
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field, ValidationError
+
+from calculs import calcul_ratios, totaux_situation
+from capacite_emprunt import capacite_emprunt
+from cli_simulation import simuler_bloc
+from data_models import NouveauProjet, PremierBien, Portefeuille, SituationActuelle
+from instrumentation import REGISTRE_PROCESSUS, chrono
+from portefeuille import projeter_portefeuille
+from projection_batch import projection_rentabilite_batch
+
+TAILLE_MAX_CORPS = 10 * 1024 * 1024  # 10 Mo
+SCENARIOS_MAX = 10_000
+BIENS_MAX = 5_000
+ANNEES_MAX = 50
+
+
+class RequeteRatios(BaseModel):
+    situation: SituationActuelle
+    premier_bien: Optional[PremierBien] = None
+    projet: Optional[NouveauProjet] = None
+
+
+class RequetePdf(RequeteRatios):
+    analyse_ia: Optional[str] = None
+
+
+class RequeteProjection(BaseModel):
+    projet: NouveauProjet
+    annees: int = Field(10, ge=1, le=ANNEES_MAX)
+    mensuelle: bool = False
+
+
+class RequeteCapacite(BaseModel):
+    situation: SituationActuelle
+    premier_bien: Optional[PremierBien] = None
+    apport: float = 0
+    taux_nominal: float = 3.5
+    duree_annees: int = Field(20, ge=1, le=ANNEES_MAX)
+    loyer_attendu: float = 0
+
+
+class RequeteBatch(BaseModel):
+    scenarios: List[RequeteRatios] = Field(max_length=SCENARIOS_MAX)
+    annees: int = Field(10, ge=1, le=ANNEES_MAX)
+
+
+class RequetePortefeuille(BaseModel):
+    portefeuille: Portefeuille
+    mois: int = Field(120, ge=1, le=ANNEES_MAX * 12)
+    par_bien: bool = False  # ajoute les séries mensuelles de chaque bien
+
+
+class ErreurRequete(Exception):
+    """Erreur renvoyée au client avec un statut HTTP et un détail JSON."""
+
+    def __init__(self, statut: int, message: str, details=None):
+        super().__init__(message)
+        self.statut = statut
+        self.details = details
+
+
+def _compatible_json(valeur):
+    """
+    Convertit les types NumPy et remplace NaN / infini par null (JSON strict).
+    Parcours récursif : réservé aux petites réponses, voir `_colonnes_en_lignes` pour les lots.
+    """
+    if isinstance(valeur, dict):
+        return {cle: _compatible_json(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_compatible_json(v) for v in valeur]
+    if isinstance(valeur, np.ndarray):
+        if valeur.dtype.kind == "f":
+            return np.where(np.isfinite(valeur), valeur, None).tolist()
+        return valeur.tolist()
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float) and not math.isfinite(valeur):
+        return None
+    return valeur
+
+
+def _colonnes_en_lignes(colonnes: pd.DataFrame) -> list:
+    """Lignes JSON d'un tableau de résultats, converties colonne par colonne (NaN -> None)."""
+    valeurs = {}
+    for nom, serie in colonnes.items():
+        tableau = serie.to_numpy()
+        if tableau.dtype.kind == "f":
+            tableau = np.where(np.isfinite(tableau), tableau, None)
+        valeurs[nom] = tableau.tolist()
+    noms = list(valeurs)
+    return [dict(zip(noms, ligne)) for ligne in zip(*valeurs.values())]
+
+
+def _verifier_porteurs(situation: SituationActuelle):
+    if situation.porteurs:
+        total = sum(p.pourcentage_projet for p in situation.porteurs)
+        if abs(total - 100) > 0.1:
+            raise ValueError(f"La somme des pourcentages doit être 100%, actuellement: {total}%")
+
+
+def ratios(requete: RequeteRatios) -> dict:
+    return calcul_ratios(requete.situation, requete.premier_bien, requete.projet).en_dict()
+
+
+def projection(requete: RequeteProjection) -> dict:
+    indicateurs = {cle: valeurs[0] for cle, valeurs in
+                   projection_rentabilite_batch(requete.projet.model_dump(), requete.annees, mensuelle=requete.mensuelle).items()}
+    if requete.mensuelle:
+        return _compatible_json({"mois": list(range(1, requete.annees * 12 + 1)), **indicateurs})
+    return _compatible_json({"annees": list(range(1, requete.annees + 1)), **indicateurs})
+
+
+def capacite(requete: RequeteCapacite) -> dict:
+    _verifier_porteurs(requete.situation)
+    return _compatible_json(capacite_emprunt(requete.situation, requete.premier_bien, requete.apport, requete.taux_nominal,
+                            requete.duree_annees, requete.loyer_attendu))
+
+
+def pdf(requete: RequetePdf) -> bytes:
+    from export_pdf import generer_pdf_simulation  # reportlab n'est chargé qu'au premier rapport demandé
+    resultats = calcul_ratios(requete.situation, requete.premier_bien, requete.projet)
+    return generer_pdf_simulation(resultats, requete.situation, requete.premier_bien, requete.projet, requete.analyse_ia).getvalue()
+
+
+def portefeuille(requete: RequetePortefeuille) -> dict:
+    """
+    Projection mensuelle d'un portefeuille : séries consolidées, situation de chaque bien
+    au dernier mois projeté et, avec `par_bien`, ses séries mensuelles (biens × mois).
+    """
+    biens = requete.portefeuille.biens
+    if len(biens) > BIENS_MAX:
+        raise ErreurRequete(422, f"Portefeuille de {len(biens)} biens, {BIENS_MAX} au plus")
+    _verifier_porteurs(requete.portefeuille.situation)
+    projection = projeter_portefeuille(requete.portefeuille, requete.mois)
+    fin = {cle: valeurs[:, -1].tolist() for cle, valeurs in projection.par_bien.items()}
+    reponse = {
+        "mois": projection.mois,
+        "consolide": projection.consolide,
+        "biens": [{"nom": bien.nom, **dict(zip(fin, ligne))} for bien, ligne in zip(biens, zip(*fin.values()))],
+    }
+    if requete.par_bien:
+        reponse["par_bien"] = projection.par_bien
+    return _compatible_json(reponse)
+
+
+_COLONNES_BATCH = ["revenus_mensuels", "charges_mensuelles", "credits_mensuels", "personnes_foyer",
+                   "mensualite_actuelle", "loyer_percu", "date_achat", "duree_pret_initiale",
+                   "prix_bien", "apport", "taux_nominal", "duree_annees", "loyer_attendu"]
+
+
+def batch(requete: RequeteBatch) -> dict:
+    """
+    Scénarios agrégés en colonnes puis calculés en une passe vectorisée.
+    Retourne, dans l'ordre des scénarios, les colonnes de résultats de `cli_simulation.simuler_bloc`.
+    """
+    lignes = []
+    for index, scenario in enumerate(requete.scenarios):
+        try:
+            _verifier_porteurs(scenario.situation)
+        except ValueError as erreur:
+            raise ErreurRequete(422, f"Scénario {index} : {erreur}")
+        premier_bien, projet = scenario.premier_bien, scenario.projet
+        # Un tuple par scénario (pas de dictionnaire), dans l'ordre de _COLONNES_BATCH
+        lignes.append((
+            *totaux_situation(scenario.situation), scenario.situation.personnes_foyer,
+            *((premier_bien.mensualite_actuelle, premier_bien.loyer_percu, premier_bien.date_achat,
+               premier_bien.duree_pret_initiale) if premier_bien else (0.0, 0.0, None, None)),
+            *((projet.prix_bien, projet.apport, projet.taux_nominal, projet.duree_annees, projet.loyer_attendu)
+              if projet else (0.0, 0.0, 0.0, 0, 0.0)),
+        ))
+    if not lignes:
+        return {"nombre": 0, "resultats": []}
+    entrees = pd.DataFrame.from_records(lignes, columns=_COLONNES_BATCH)
+    resultats = simuler_bloc(entrees, requete.annees).drop(columns=entrees.columns)
+    return {"nombre": len(lignes), "resultats": _colonnes_en_lignes(resultats)}
+
+
+# Route -> (modèle de requête, fonction de calcul)
+ROUTES = {
+    "/ratios": (RequeteRatios, ratios),
+    "/projection": (RequeteProjection, projection),
+    "/capacite": (RequeteCapacite, capacite),
+    "/pdf": (RequetePdf, pdf),
+    "/batch": (RequeteBatch, batch),
+    "/portefeuille": (RequetePortefeuille, portefeuille),
+}
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # connexions persistantes (keep-alive)
+    disable_nagle_algorithm = True
+    server_version = "ImmoSimuAPI/1.0"
+
+    def log_message(self, format, *args):  # noqa: A002 - une ligne par requête coûte plus cher que le calcul
+        if self.server.journaliser:
+            super().log_message(format, *args)
+
+    def _envoyer(self, statut: int, corps: bytes, type_contenu: str = "application/json"):
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _envoyer_json(self, statut: int, contenu):
+        # Les fonctions de calcul retournent des données déjà compatibles JSON (voir `_compatible_json`)
+        self._envoyer(statut, json.dumps(contenu, ensure_ascii=False, allow_nan=False).encode())
+
+    def _envoyer_erreur(self, statut: int, message: str, details=None):
+        contenu = {"erreur": message}
+        if details is not None:
+            contenu["details"] = details
+        self._envoyer_json(statut, contenu)
+
+    def do_GET(self):
+        chemin, _, parametres = self.path.partition("?")
+        if chemin == "/sante":
+            self._envoyer_json(200, {"statut": "ok"})
+        elif chemin == "/metriques":
+            if "format=jsonl" in parametres:
+                self._envoyer(200, REGISTRE_PROCESSUS.exporter_jsonl(pid=os.getpid()).encode(), "application/x-ndjson")
+            else:
+                self._envoyer(200, REGISTRE_PROCESSUS.exporter_prometheus({"pid": os.getpid()}).encode(),
+                              "text/plain; version=0.0.4")
+        else:
+            self._envoyer_erreur(404, f"Route inconnue : {self.path}")
+
+    def do_POST(self):
+        longueur = self.headers.get("Content-Length")
+        if longueur is None:
+            self.close_connection = True
+            self._envoyer_erreur(411, "En-tête Content-Length requis")
+            return
+        try:
+            longueur = int(longueur)
+        except ValueError:
+            longueur = -1
+        if longueur < 0:
+            # Corps illisible : la connexion ne peut pas être réutilisée
+            self.close_connection = True
+            self._envoyer_erreur(400, "En-tête Content-Length invalide")
+            return
+        if longueur > TAILLE_MAX_CORPS:
+            self.close_connection = True
+            self._envoyer_erreur(413, f"Corps de requête limité à {TAILLE_MAX_CORPS} octets")
+            return
+        corps = self.rfile.read(longueur)
+
+        route = ROUTES.get(self.path.split("?")[0].rstrip("/"))
+        if route is None:
+            self._envoyer_erreur(404, f"Route inconnue : {self.path}")
+            return
+        modele, fonction = route
+        try:
+            with chrono("api_validation"):
+                requete = modele.model_validate_json(corps)
+            with chrono(f"api_{fonction.__name__}"):
+                resultat = fonction(requete)
+        except ValidationError as erreur:
+            details = json.loads(erreur.json(include_url=False, include_input=False, include_context=False))
+            json_invalide = all(detail["type"] == "json_invalid" for detail in details)
+            self._envoyer_erreur(400 if json_invalide else 422, "JSON invalide" if json_invalide else "Requête invalide", details)
+            return
+        except ErreurRequete as erreur:
+            self._envoyer_erreur(erreur.statut, str(erreur), erreur.details)
+            return
+        except (ValueError, ArithmeticError) as erreur:  # entrée hors du domaine des formules
+            self._envoyer_erreur(422, str(erreur))
+            return
+        except Exception:
+            self.log_error("Erreur interne sur %s", self.path)
+            traceback.print_exc()
+            self._envoyer_erreur(500, "Erreur interne du serveur")
+            return
+
+        if isinstance(resultat, bytes):
+            self._envoyer(200, resultat, "application/pdf")
+        else:
+            self._envoyer_json(200, resultat)
+
+
+class ServeurAPI(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # file d'attente du listen() : 5 par défaut, insuffisant sous charge
+
+    def __init__(self, adresse, journaliser: bool = False, partager_port: bool = False):
+        self.partager_port = partager_port
+        super().__init__(adresse, GestionnaireAPI)
+        self.journaliser = journaliser
+
+    def server_bind(self):
+        if self.partager_port:
+            # Plusieurs processus écoutent le même port ; le noyau répartit les connexions
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _servir(hote: str, port: int, journaliser: bool, partager_port: bool):
+    serveur = ServeurAPI((hote, port), journaliser=journaliser, partager_port=partager_port)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--processus", type=int, default=1,
+                        help="Processus serveurs sur le même port (SO_REUSEPORT) : un par cœur pour dépasser la limite du GIL")
+    parser.add_argument("--journal", action="store_true", help="Journalise chaque requête sur la sortie d'erreur")
+    args = parser.parse_args(arguments)
+
+    if args.processus < 1:
+        parser.error("--processus doit être strictement positif")
+    if args.processus > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--processus > 1 nécessite SO_REUSEPORT (Linux, BSD, macOS)")
+    if args.processus > 1 and args.port == 0:
+        parser.error("--processus > 1 nécessite un port explicite")
+
+    print(f"API du simulateur sur http://{args.hote}:{args.port} - {args.processus} processus (Ctrl+C pour arrêter)", flush=True)
+    if args.processus == 1:
+        _servir(args.hote, args.port, args.journal, partager_port=False)
+        return
+    processus = [multiprocessing.Process(target=_servir, args=(args.hote, args.port, args.journal, True), daemon=True)
+                 for _ in range(args.processus)]
+    for serveur in processus:
+        serveur.start()
+    # Un SIGTERM au processus parent arrête aussi les processus serveurs
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for serveur in processus:
+            serveur.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for serveur in processus:
+            serveur.terminate()
+
+
+if __name__ == "__main__":
+    main()
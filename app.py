@@ -1,12 +1,26 @@
+import os
+from datetime import date
 import streamlit as st
 from data_models import SituationActuelle, NouveauProjet, PremierBien, PorteurProjet
-from calculs import calcul_ratios
-from export_pdf import generer_pdf_simulation
-from analyse_ia import analyser_projet_avec_ia
-from dashboard_rentabilite import afficher_dashboard_rentabilite
+from calculs import est_financable
+from capacite_emprunt import capacite_emprunt
+from graphe_calcul import creer_graphe_simulation
+from instrumentation import Registre, chrono, chronometre, demarrer_collecte, terminer_collecte
+from profilage import arreter_profil_rerun, demarrer_profil_rerun
+
+# Les modules lourds (plotly, pandas, reportlab, openai) sont importés par la
+# fonctionnalité qui les utilise, pas au démarrage : la plupart des sessions
+# n'ouvrent ni les dashboards, ni l'export PDF, ni l'analyse IA.
 
 st.set_page_config(page_title="Simulation Invest Immo", layout="wide")
 
+# Chronométrage des étapes de ce rerun (panneau de diagnostic : ?debug=perf)
+if 'mesures_session' not in st.session_state:
+    st.session_state['mesures_session'] = Registre()
+demarrer_collecte(st.session_state['mesures_session'])
+# Profilage à la demande (PROFILAGE=cprofile|echantillons ou ?profil=...), voir profilage.py
+demarrer_profil_rerun(st.session_state, mode=st.query_params.get("profil"))
+
 # --- Titre principal ---
 st.title("📊 Simulateur immobilier simplifié")
 
@@ -33,255 +47,312 @@ with st.expander("📖 Mode d’emploi (cliquez pour afficher)", expanded=True):
 
     ---
     💡 *Astuce : Vous pouvez tester plusieurs scénarios (modifier apport, durée, loyer attendu...) 
-    pour voir l’impact sur votre capacité d’emprunt.*
+    pour voir l’impact sur votre capacité d’emprunt, ou les comparer côte à côte dans la section « Comparaison de variantes ».*
     """)
 
-# --- Situation actuelle ---
-st.header("1. Votre situation actuelle")
+# --- Saisie ---
+# Fragment : modifier un champ ne réexécute que la saisie et la capacité d'emprunt ; les
+# résultats affichés dépendent des entrées figées au dernier clic sur « Calculer ».
+@st.fragment
+@chronometre("section_saisie")
+def section_saisie():
+    # --- Situation actuelle ---
+    st.header("1. Votre situation actuelle")
+
+    mode_porteurs = st.radio(
+        "Mode de saisie :",
+        ["Saisie simple", "Projet à plusieurs (couple, associés...)"],
+        help="Choisissez 'Projet à plusieurs' si vous voulez détailler les revenus/charges de chaque porteur du projet."
+    )
 
-mode_porteurs = st.radio(
-    "Mode de saisie :",
-    ["Saisie simple", "Projet à plusieurs (couple, associés...)"],
-    help="Choisissez 'Projet à plusieurs' si vous voulez détailler les revenus/charges de chaque porteur du projet."
-)
+    porteurs = []
+    if mode_porteurs == "Projet à plusieurs":
+        st.subheader("👥 Porteurs du projet")
 
-porteurs = []
-if mode_porteurs == "Projet à plusieurs":
-    st.subheader("👥 Porteurs du projet")
-    
-    nb_porteurs = st.number_input(
-        "Nombre de porteurs du projet",
-        min_value=2, max_value=4, value=2, step=1,
-        help="Nombre de personnes qui participent financièrement au projet (ex: 2 pour un couple)."
-    )
-    
-    total_pourcentage = 0
-    for i in range(nb_porteurs):
-        st.write(f"**Porteur {i+1} :**")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            nom = st.text_input(f"Nom/Prénom", value=f"Porteur {i+1}", key=f"nom_{i}")
-            revenus_porteur = st.number_input(
-                f"Revenus nets mensuels (€)", 
-                min_value=0.0, step=100.0, key=f"revenus_{i}",
-                help="Salaires nets de cette personne."
-            )
-            charges_porteur = st.number_input(
-                f"Charges mensuelles (€)", 
-                min_value=0.0, step=50.0, key=f"charges_{i}",
-                help="Charges fixes personnelles de cette personne."
-            )
-        
-        with col2:
-            credits_porteur = st.number_input(
-                f"Crédits mensuels (€)", 
-                min_value=0.0, step=50.0, key=f"credits_{i}",
-                help="Mensualités crédits personnels de cette personne."
-            )
-            pourcentage = st.number_input(
-                f"% de participation au projet", 
-                min_value=0.0, max_value=100.0, step=5.0, key=f"pourcentage_{i}",
-                help="Pourcentage de participation de cette personne dans le projet immobilier."
+        nb_porteurs = st.number_input(
+            "Nombre de porteurs du projet",
+            min_value=2, max_value=4, value=2, step=1,
+            help="Nombre de personnes qui participent financièrement au projet (ex: 2 pour un couple)."
+        )
+
+        total_pourcentage = 0
+        for i in range(nb_porteurs):
+            st.write(f"**Porteur {i+1} :**")
+            col1, col2 = st.columns(2)
+
+            with col1:
+                nom = st.text_input(f"Nom/Prénom", value=f"Porteur {i+1}", key=f"nom_{i}")
+                revenus_porteur = st.number_input(
+                    f"Revenus nets mensuels (€)", 
+                    min_value=0.0, step=100.0, key=f"revenus_{i}",
+                    help="Salaires nets de cette personne."
+                )
+                charges_porteur = st.number_input(
+                    f"Charges mensuelles (€)", 
+                    min_value=0.0, step=50.0, key=f"charges_{i}",
+                    help="Charges fixes personnelles de cette personne."
+                )
+
+            with col2:
+                credits_porteur = st.number_input(
+                    f"Crédits mensuels (€)", 
+                    min_value=0.0, step=50.0, key=f"credits_{i}",
+                    help="Mensualités crédits personnels de cette personne."
+                )
+                pourcentage = st.number_input(
+                    f"% de participation au projet", 
+                    min_value=0.0, max_value=100.0, step=5.0, key=f"pourcentage_{i}",
+                    help="Pourcentage de participation de cette personne dans le projet immobilier."
+                )
+
+            total_pourcentage += pourcentage
+
+            if revenus_porteur > 0 and pourcentage > 0:
+                porteurs.append(PorteurProjet(
+                    nom=nom,
+                    revenus_mensuels=revenus_porteur,
+                    charges_mensuelles=charges_porteur,
+                    credits_mensuels=credits_porteur,
+                    pourcentage_projet=pourcentage
+                ))
+
+        if abs(total_pourcentage - 100) > 0.1:
+            st.error(f"⚠️ La somme des pourcentages doit être 100%. Actuellement : {total_pourcentage}%")
+        else:
+            st.success(f"✅ Répartition OK : {total_pourcentage}%")
+
+        personnes = st.number_input(
+            "Nombre de personnes dans le foyer",
+            min_value=1, step=1,
+            help="Nombre total de personnes vivant dans le foyer (adulte(s) + enfants)."
+        )
+
+        with chrono("modeles"):
+            situation = SituationActuelle(
+                revenus_mensuels=0,  # Sera calculé à partir des porteurs
+                charges_mensuelles=0,  # Sera calculé à partir des porteurs
+                credits_mensuels=0,  # Sera calculé à partir des porteurs
+                personnes_foyer=personnes,
+                porteurs=porteurs,
             )
-        
-        total_pourcentage += pourcentage
-        
-        if revenus_porteur > 0 and pourcentage > 0:
-            porteurs.append(PorteurProjet(
-                nom=nom,
-                revenus_mensuels=revenus_porteur,
-                charges_mensuelles=charges_porteur,
-                credits_mensuels=credits_porteur,
-                pourcentage_projet=pourcentage
-            ))
-    
-    if abs(total_pourcentage - 100) > 0.1:
-        st.error(f"⚠️ La somme des pourcentages doit être 100%. Actuellement : {total_pourcentage}%")
+
     else:
-        st.success(f"✅ Répartition OK : {total_pourcentage}%")
+        # Mode simple
+        revenus = st.number_input(
+            "Revenus mensuels nets (salaires uniquement)",
+            min_value=0.0, step=100.0,
+            help="Vos salaires nets (après impôts et cotisations). Les loyers seront comptés séparément."
+        )
 
-    personnes = st.number_input(
-        "Nombre de personnes dans le foyer",
-        min_value=1, step=1,
-        help="Nombre total de personnes vivant dans le foyer (adulte(s) + enfants)."
-    )
+        charges = st.number_input(
+            "Charges mensuelles (hors crédits)",
+            min_value=0.0, step=50.0,
+            help="Vos charges fixes : alimentation, assurances, abonnements, factures, etc. ⚠️ N'incluez pas vos mensualités de prêts ici."
+        )
 
-    situation = SituationActuelle(
-        revenus_mensuels=0,  # Sera calculé à partir des porteurs
-        charges_mensuelles=0,  # Sera calculé à partir des porteurs
-        credits_mensuels=0,  # Sera calculé à partir des porteurs
-        personnes_foyer=personnes,
-        porteurs=porteurs,
-    )
+        credits = st.number_input(
+            "Mensualités autres crédits (hors immobilier)",
+            min_value=0.0, step=50.0,
+            help="Mensualités de crédits consommation, auto, etc. ⚠️ N'incluez pas les prêts immobiliers ici, ils seront traités séparément."
+        )
 
-else:
-    # Mode simple
-    revenus = st.number_input(
-        "Revenus mensuels nets (salaires uniquement)",
-        min_value=0.0, step=100.0,
-        help="Vos salaires nets (après impôts et cotisations). Les loyers seront comptés séparément."
-    )
+        personnes = st.number_input(
+            "Nombre de personnes dans le foyer",
+            min_value=1, step=1,
+            help="Nombre total de personnes vivant dans le foyer (adulte(s) + enfants). Sert à estimer le 'reste à vivre' nécessaire."
+        )
 
-    charges = st.number_input(
-        "Charges mensuelles (hors crédits)",
-        min_value=0.0, step=50.0,
-        help="Vos charges fixes : alimentation, assurances, abonnements, factures, etc. ⚠️ N'incluez pas vos mensualités de prêts ici."
-    )
+        with chrono("modeles"):
+            situation = SituationActuelle(
+                revenus_mensuels=revenus,
+                charges_mensuelles=charges,
+                credits_mensuels=credits,
+                personnes_foyer=personnes,
+            )
 
-    credits = st.number_input(
-        "Mensualités autres crédits (hors immobilier)",
-        min_value=0.0, step=50.0,
-        help="Mensualités de crédits consommation, auto, etc. ⚠️ N'incluez pas les prêts immobiliers ici, ils seront traités séparément."
-    )
+    # --- Premier bien existant ---
+    st.header("1.bis. Premier bien immobilier (optionnel)")
+    st.markdown("Si vous avez déjà un bien immobilier avec un prêt en cours :")
 
-    personnes = st.number_input(
-        "Nombre de personnes dans le foyer",
-        min_value=1, step=1,
-        help="Nombre total de personnes vivant dans le foyer (adulte(s) + enfants). Sert à estimer le 'reste à vivre' nécessaire."
-    )
+    a_premier_bien = st.checkbox("J'ai déjà un bien immobilier avec un prêt en cours")
 
-    situation = SituationActuelle(
-        revenus_mensuels=revenus,
-        charges_mensuelles=charges,
-        credits_mensuels=credits,
-        personnes_foyer=personnes,
-    )
+    premier_bien = None
+    if a_premier_bien:
+        prix_premier = st.number_input(
+            "Prix d'achat du premier bien (€)",
+            min_value=0.0, step=1000.0,
+            help="Prix d'achat de votre premier bien immobilier."
+        )
+
+        mensualite_premier = st.number_input(
+            "Mensualité actuelle du prêt (€)",
+            min_value=0.0, step=50.0,
+            help="Mensualité que vous payez actuellement pour ce bien."
+        )
+
+        loyer_premier = st.number_input(
+            "Loyer perçu (€)",
+            min_value=0.0, step=50.0,
+            help="Loyer mensuel perçu si c'est un investissement locatif. Saisir 0 si c'est votre résidence principale."
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            date_achat_premier = st.date_input(
+                "Date d'achat du bien",
+                help="Date à laquelle vous avez acheté ce bien immobilier."
+            )
 
-# --- Premier bien existant ---
-st.header("1.bis. Premier bien immobilier (optionnel)")
-st.markdown("Si vous avez déjà un bien immobilier avec un prêt en cours :")
+        with col2:
+            duree_pret_premier = st.number_input(
+                "Durée initiale du prêt (années)",
+                min_value=1, max_value=30, value=20, step=1,
+                help="Durée initiale du prêt immobilier pour ce bien."
+            )
 
-a_premier_bien = st.checkbox("J'ai déjà un bien immobilier avec un prêt en cours")
+        if prix_premier > 0 and mensualite_premier > 0:
+            with chrono("modeles"):
+                premier_bien = PremierBien(
+                    prix_achat=prix_premier,
+                    mensualite_actuelle=mensualite_premier,
+                    loyer_percu=loyer_premier,
+                    date_achat=date_achat_premier,
+                    duree_pret_initiale=duree_pret_premier
+                )
+
+    # --- Nouveau projet ---
+    st.header("2. Simulation du nouveau projet")
+
+    prix = st.number_input(
+        "Prix du bien (€)",
+        min_value=0.0, step=1000.0,
+        help="Prix d’achat du bien immobilier (hors frais de notaire et travaux)."
+    )
 
-premier_bien = None
-if a_premier_bien:
-    prix_premier = st.number_input(
-        "Prix d'achat du premier bien (€)",
+    apport = st.number_input(
+        "Apport personnel (€)",
         min_value=0.0, step=1000.0,
-        help="Prix d'achat de votre premier bien immobilier."
+        help="Somme que vous pouvez investir immédiatement (épargne disponible)."
     )
 
-    mensualite_premier = st.number_input(
-        "Mensualité actuelle du prêt (€)",
-        min_value=0.0, step=50.0,
-        help="Mensualité que vous payez actuellement pour ce bien."
+    taux = st.number_input(
+        "Taux nominal (%)",
+        min_value=0.0, step=0.1,
+        help="Taux d’intérêt proposé par la banque (hors assurance). Exemple : 3,5 %."
+    )
+
+    duree = st.number_input(
+        "Durée du prêt (années)",
+        min_value=1, max_value=30, value=20, step=1,
+        help="Durée du prêt immobilier, en années. Les banques financent rarement au-delà de 25 ans."
     )
 
-    loyer_premier = st.number_input(
-        "Loyer perçu (€)",
+    loyer = st.number_input(
+        "Loyer attendu (€)",
         min_value=0.0, step=50.0,
-        help="Loyer mensuel perçu si c'est un investissement locatif. Saisir 0 si c'est votre résidence principale."
+        help="Montant du loyer mensuel attendu (si investissement locatif). Saisir 0 si c'est une résidence principale."
     )
 
-    col1, col2 = st.columns(2)
-    with col1:
-        date_achat_premier = st.date_input(
-            "Date d'achat du bien",
-            help="Date à laquelle vous avez acheté ce bien immobilier."
-        )
-    
-    with col2:
-        duree_pret_premier = st.number_input(
-            "Durée initiale du prêt (années)",
-            min_value=1, max_value=30, value=20, step=1,
-            help="Durée initiale du prêt immobilier pour ce bien."
-        )
+    projet = None
+    if prix > 0 and duree > 0:
+        with chrono("modeles"):
+            projet = NouveauProjet(
+                prix_bien=prix,
+                apport=apport,
+                taux_nominal=taux,
+                duree_annees=duree,
+                loyer_attendu=loyer,
+            )
 
-    if prix_premier > 0 and mensualite_premier > 0:
-        premier_bien = PremierBien(
-            prix_achat=prix_premier,
-            mensualite_actuelle=mensualite_premier,
-            loyer_percu=loyer_premier,
-            date_achat=date_achat_premier,
-            duree_pret_initiale=duree_pret_premier
+    # --- Capacité d'emprunt ---
+    with st.expander("💡 Combien puis-je emprunter ?"):
+        st.markdown(
+            "Capacité maximale calculée directement à partir de votre situation, de votre apport, "
+            "du taux, de la durée et du loyer attendu saisis ci-dessus (endettement ≤ 35% et reste à vivre suffisant)."
         )
+        with chrono("capacite_emprunt"):
+            capacite = capacite_emprunt(situation, premier_bien, apport, taux, duree, loyer)
 
-# --- Nouveau projet ---
-st.header("2. Simulation du nouveau projet")
-
-prix = st.number_input(
-    "Prix du bien (€)",
-    min_value=0.0, step=1000.0,
-    help="Prix d’achat du bien immobilier (hors frais de notaire et travaux)."
-)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Mensualité maximale", f"{capacite['mensualite_max']:.0f} €")
+        with col2:
+            st.metric("Capital empruntable", f"{capacite['capital_max']:,.0f} €")
+        with col3:
+            st.metric("Prix maximum du bien", f"{capacite['prix_max']:,.0f} €")
 
-apport = st.number_input(
-    "Apport personnel (€)",
-    min_value=0.0, step=1000.0,
-    help="Somme que vous pouvez investir immédiatement (épargne disponible)."
-)
+        if capacite['mensualite_max'] <= 0:
+            st.warning("⚠️ Votre situation actuelle ne permet pas de mensualité supplémentaire.")
+        elif capacite['contrainte_endettement']:
+            st.caption("Contrainte limitante : taux d'endettement (35%).")
+        else:
+            st.caption("Contrainte limitante : reste à vivre minimum.")
 
-taux = st.number_input(
-    "Taux nominal (%)",
-    min_value=0.0, step=0.1,
-    help="Taux d’intérêt proposé par la banque (hors assurance). Exemple : 3,5 %."
-)
+        taux_grille = sorted({max(0.0, round(taux + ecart, 2)) for ecart in (-1.0, -0.5, 0.0, 0.5, 1.0)})
+        durees_grille = sorted({15, 20, 25, int(duree)})
+        # Une vingtaine de cases : le calcul scalaire évite d'importer NumPy au premier rendu
+        # (prix_max_grille, vectorisé, ne se justifie que sur de grandes grilles)
+        with chrono("capacite_emprunt"):
+            prix_grille = [[capacite_emprunt(situation, premier_bien, apport, t, d, loyer)["prix_max"] for d in durees_grille]
+                           for t in taux_grille]
+        # Tableau markdown plutôt que st.dataframe : pas de pandas au premier rendu
+        lignes_grille = ["| Taux | " + " | ".join(f"{d} ans" for d in durees_grille) + " |",
+                         "|---|" + "---:|" * len(durees_grille)]
+        for t, prix_taux in zip(taux_grille, prix_grille):
+            lignes_grille.append(f"| {t:.2f} % | " + " | ".join(f"{round(p, -3):,.0f} €" for p in prix_taux) + " |")
+        st.markdown("**Prix maximum selon le taux et la durée**")
+        st.markdown("\n".join(lignes_grille))
 
-duree = st.number_input(
-    "Durée du prêt (années)",
-    min_value=1, max_value=30, value=20, step=1,
-    help="Durée du prêt immobilier, en années. Les banques financent rarement au-delà de 25 ans."
-)
+    return situation, premier_bien, projet
 
-loyer = st.number_input(
-    "Loyer attendu (€)",
-    min_value=0.0, step=50.0,
-    help="Montant du loyer mensuel attendu (si investissement locatif). Saisir 0 si c'est une résidence principale."
-)
 
-projet = None
-if prix > 0 and duree > 0:
-    projet = NouveauProjet(
-        prix_bien=prix,
-        apport=apport,
-        taux_nominal=taux,
-        duree_annees=duree,
-        loyer_attendu=loyer,
-    )
+situation, premier_bien, projet = section_saisie()
 
 # --- Résultats ---
 st.header("3. Résultats de la simulation")
 
-# Bouton pour calculer et sauvegarder les résultats en session
+# Graphe de dépendances de la session : ratios, projection, figures et PDF ne sont
+# recalculés que si leurs entrées ont changé (voir graphe_calcul.py)
+if 'graphe' not in st.session_state:
+    st.session_state['graphe'] = creer_graphe_simulation()
+graphe = st.session_state['graphe']
+graphe.definir("jour", date.today())
+
+# Le bouton fige les entrées du graphe ; les résultats se recalculent à la demande
 if st.button("Calculer"):
-    resultats = calcul_ratios(situation, premier_bien, projet)
-    
-    # Sauvegarder les résultats en session state
-    st.session_state['resultats'] = resultats
-    st.session_state['situation'] = situation
-    st.session_state['premier_bien'] = premier_bien
-    st.session_state['projet'] = projet
-
-# Afficher les résultats si ils existent en session
-if 'resultats' in st.session_state:
-    resultats = st.session_state['resultats']
-    situation = st.session_state['situation']
-    premier_bien = st.session_state.get('premier_bien', None)
-    projet = st.session_state.get('projet', None)
+    graphe.definir("situation", situation)
+    graphe.definir("premier_bien", premier_bien)
+    graphe.definir("projet", projet)
+
+# Afficher les résultats si une simulation a été lancée
+if graphe.est_defini("situation"):
+    resultats = graphe.obtenir("ratios")
+    situation = graphe.obtenir("situation")
+    premier_bien = graphe.obtenir("premier_bien")
+    projet = graphe.obtenir("projet")
 
     # Détail des revenus
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Revenus salaires", f"{resultats['revenus_salaires']:.0f} €")
+        st.metric("Revenus salaires", f"{resultats.revenus_salaires:.0f} €")
     with col2:
-        st.metric("Revenus locatifs", f"{resultats['revenus_locatifs']:.0f} €")
+        st.metric("Revenus locatifs", f"{resultats.revenus_locatifs:.0f} €")
     with col3:
-        st.metric("Revenus totaux", f"{resultats['revenus_totaux']:.0f} €")
+        st.metric("Revenus totaux", f"{resultats.revenus_totaux:.0f} €")
 
     st.divider()
 
     # Détail des charges
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Mensualités immobilier", f"{resultats['mensualites_immobilier']:.0f} €")
+        st.metric("Mensualités immobilier", f"{resultats.mensualites_immobilier:.0f} €")
     with col2:
-        st.metric("Autres crédits", f"{resultats['mensualites_autres_credits']:.0f} €")
+        st.metric("Autres crédits", f"{resultats.mensualites_autres_credits:.0f} €")
     with col3:
-        st.metric("Total mensualités", f"{resultats['mensualites_totales']:.0f} €")
+        st.metric("Total mensualités", f"{resultats.mensualites_totales:.0f} €")
 
     if projet:
-        st.metric("💡 Mensualité du nouveau prêt", f"{resultats['mensualite_nouveau']:.0f} €")
+        st.metric("💡 Mensualité du nouveau prêt", f"{resultats.mensualite_nouveau:.0f} €")
 
     st.divider()
 
@@ -289,7 +360,7 @@ if 'resultats' in st.session_state:
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        taux_endettement_pct = resultats['taux_endettement'] * 100
+        taux_endettement_pct = resultats.taux_endettement * 100
         st.metric(
             "📊 Taux d'endettement", 
             f"{taux_endettement_pct:.1f} %",
@@ -301,7 +372,7 @@ if 'resultats' in st.session_state:
             st.success("✅ OK")
 
     with col2:
-        taux_effort_pct = resultats['taux_effort'] * 100
+        taux_effort_pct = resultats.taux_effort * 100
         st.metric(
             "💪 Taux d'effort", 
             f"{taux_effort_pct:.1f} %",
@@ -315,7 +386,7 @@ if 'resultats' in st.session_state:
             st.success("✅ Effort faible")
 
     with col3:
-        reste_a_vivre = resultats['reste_a_vivre']
+        reste_a_vivre = resultats.reste_a_vivre
         reste_min = 800 * situation.personnes_foyer
         st.metric(
             "💰 Reste à vivre", 
@@ -328,44 +399,44 @@ if 'resultats' in st.session_state:
             st.error("⚠️ Insuffisant")
 
     # Informations sur le premier bien si applicable
-    if premier_bien and resultats.get('anciennete_pret_annees', 0) > 0:
+    if premier_bien and resultats.anciennete_pret_annees > 0:
         st.divider()
         st.subheader("🏠 Informations sur votre premier bien")
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Ancienneté du prêt", f"{resultats['anciennete_pret_annees']:.1f} ans")
+            st.metric("Ancienneté du prêt", f"{resultats.anciennete_pret_annees:.1f} ans")
         with col2:
-            st.metric("Durée restante", f"{resultats['duree_restante_annees']:.1f} ans")
+            st.metric("Durée restante", f"{resultats.duree_restante_annees:.1f} ans")
         with col3:
-            pourcentage_rembourse = (resultats['anciennete_pret_mois'] / (resultats['anciennete_pret_mois'] + resultats['duree_restante_mois'])) * 100 if (resultats['anciennete_pret_mois'] + resultats['duree_restante_mois']) > 0 else 0
+            pourcentage_rembourse = (resultats.anciennete_pret_mois / (resultats.anciennete_pret_mois + resultats.duree_restante_mois)) * 100 if (resultats.anciennete_pret_mois + resultats.duree_restante_mois) > 0 else 0
             st.metric("% remboursé", f"{pourcentage_rembourse:.1f}%")
         with col4:
-            if resultats['duree_restante_annees'] <= 5:
+            if resultats.duree_restante_annees <= 5:
                 st.success("✅ Fin proche")
-            elif resultats['duree_restante_annees'] <= 10:
+            elif resultats.duree_restante_annees <= 10:
                 st.info("ℹ️ Moyen terme")
             else:
                 st.warning("⏳ Long terme")
 
     # Détails par porteur si applicable
-    if resultats.get('details_porteurs'):
+    if resultats.details_porteurs:
         st.divider()
         st.subheader("📊 Détail par porteur du projet")
         
-        for detail in resultats['details_porteurs']:
-            with st.expander(f"👤 {detail['nom']} - {detail['pourcentage']}% du projet"):
+        for detail in resultats.details_porteurs:
+            with st.expander(f"👤 {detail.nom} - {detail.pourcentage}% du projet"):
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    st.metric("Revenus salaires", f"{detail['revenus_salaires']:.0f} €")
-                    st.metric("Revenus locatifs", f"{detail['revenus_locatifs']:.0f} €")
-                    st.metric("Revenus totaux", f"{detail['revenus_totaux']:.0f} €")
+                    st.metric("Revenus salaires", f"{detail.revenus_salaires:.0f} €")
+                    st.metric("Revenus locatifs", f"{detail.revenus_locatifs:.0f} €")
+                    st.metric("Revenus totaux", f"{detail.revenus_totaux:.0f} €")
                 
                 with col2:
-                    st.metric("Mensualités totales", f"{detail['mensualites_totales']:.0f} €")
+                    st.metric("Mensualités totales", f"{detail.mensualites_totales:.0f} €")
                     
-                    taux_end_pct = detail['taux_endettement'] * 100
+                    taux_end_pct = detail.taux_endettement * 100
                     st.metric("Taux d'endettement", f"{taux_end_pct:.1f} %")
                     if taux_end_pct > 35:
                         st.error("⚠️ > 35%")
@@ -373,139 +444,242 @@ if 'resultats' in st.session_state:
                         st.success("✅ OK")
                 
                 with col3:
-                    taux_eff_pct = detail['taux_effort'] * 100
+                    taux_eff_pct = detail.taux_effort * 100
                     st.metric("Taux d'effort", f"{taux_eff_pct:.1f} %")
                     
-                    st.metric("Reste à vivre", f"{detail['reste_a_vivre']:.0f} €")
-                    if detail['reste_a_vivre'] >= 800:
+                    st.metric("Reste à vivre", f"{detail.reste_a_vivre:.0f} €")
+                    if detail.reste_a_vivre >= 800:
                         st.success("✅ OK")
                     else:
                         st.error("⚠️ Faible")
 
     st.divider()
 
+    # Mode « et si ? » : fragment, chaque curseur ne réexécute que cette section
+    @st.fragment
+    @chronometre("section_what_if")
+    def section_what_if(situation, premier_bien, projet):
+        from dashboard_what_if import afficher_what_if
+        afficher_what_if(situation, premier_bien, projet)
+
+    if projet:
+        section_what_if(situation, premier_bien, projet)
+        st.divider()
+
+    # Comparaison de variantes : toutes calculées en une passe vectorisée, dans leur propre fragment
+    @st.fragment
+    @chronometre("section_comparaison")
+    def section_comparaison(situation, premier_bien, projet):
+        from dashboard_comparaison import afficher_comparaison
+        afficher_comparaison(situation, premier_bien, projet)
+
+    if projet:
+        section_comparaison(situation, premier_bien, projet)
+        st.divider()
+
     # Dashboard de rentabilité (uniquement pour les investissements locatifs)
+    # Chaque dashboard est un fragment : ses propres widgets ne réexécutent que lui
+    @st.fragment
+    @chronometre("dashboard_rentabilite")
+    def section_rentabilite(situation, premier_bien, projet, resultats):
+        from dashboard_rentabilite import afficher_dashboard_rentabilite
+        afficher_dashboard_rentabilite(situation, premier_bien, projet, resultats, graphe)
+
+    @st.fragment
+    @chronometre("dashboard_sensibilite")
+    def section_sensibilite(situation, premier_bien, projet):
+        from dashboard_sensibilite import afficher_dashboard_sensibilite
+        afficher_dashboard_sensibilite(situation, premier_bien, projet, graphe)
+
     if projet and projet.loyer_attendu > 0:
-        afficher_dashboard_rentabilite(situation, premier_bien, projet, resultats)
+        section_rentabilite(situation, premier_bien, projet, resultats)
         st.divider()
 
-    # Analyse IA
-    st.header("🤖 Analyse IA - Conseiller Patrimonial")
-    st.markdown("""
-    Obtenez une analyse personnalisée de votre projet par notre IA spécialisée en conseil patrimonial.
-    L'IA analysera vos indicateurs financiers et vous donnera des recommandations adaptées à votre situation.
-    """)
-    
-    col1, col2 = st.columns([2, 1])
-    with col1:
-        if st.button("🔍 Analyser mon projet avec l'IA", type="secondary", use_container_width=True, key="btn_ia"):
-            # Conteneur pour l'indicateur de progression
-            progress_container = st.empty()
+    # Sensibilité du financement au taux, à la durée et à l'apport
+    if projet:
+        section_sensibilite(situation, premier_bien, projet)
+        st.divider()
+
+    # Analyse IA (fragment : seule cette section se réexécute pendant la diffusion)
+    analyse_en_cours = st.session_state.get('analyse_ia_en_cours')
+
+    @st.fragment(run_every=0.3 if analyse_en_cours is not None else None)
+    def section_analyse_ia():
+        st.header("🤖 Analyse IA - Conseiller Patrimonial")
+        st.markdown("""
+        Obtenez une analyse personnalisée de votre projet par notre IA spécialisée en conseil patrimonial.
+        L'IA analysera vos indicateurs financiers et vous donnera des recommandations adaptées à votre situation.
+        """)
+        
+        analyse_en_cours = st.session_state.get('analyse_ia_en_cours')
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            if st.button("🔍 Analyser mon projet avec l'IA", type="secondary", use_container_width=True,
+                         key="btn_ia", disabled=analyse_en_cours is not None):
+                # L'appel tourne en arrière-plan : le reste de la page reste utilisable
+                from analyse_ia import AnalyseEnArrierePlan
+                st.session_state['analyse_ia_en_cours'] = AnalyseEnArrierePlan(resultats, situation, premier_bien, projet)
+                st.rerun()
+        
+        with col2:
+            st.info("""
+            💡 **À propos de l'analyse IA**
             
-            with progress_container.container():
-                # Barre de progression
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Simulation du processus avec vraie progression
-                status_text.text("🔄 Connexion à l'IA...")
-                progress_bar.progress(20)
-                
-                # Analyser avec l'IA
-                try:
-                    status_text.text("🤖 Analyse en cours par notre conseiller IA...")
-                    progress_bar.progress(50)
-                    
-                    analyse = analyser_projet_avec_ia(resultats, situation, premier_bien, projet)
-                    progress_bar.progress(90)
-                    
-                    # Sauvegarder l'analyse en session
-                    st.session_state['derniere_analyse_ia'] = analyse
-                    
-                    status_text.text("✅ Analyse terminée !")
-                    progress_bar.progress(100)
-                    
-                except Exception as e:
-                    status_text.text("❌ Erreur lors de l'analyse")
-                    st.error(f"Erreur : {str(e)}")
-                    progress_bar.progress(0)
+            Notre IA utilise GPT-4o et agit comme un conseiller patrimonial expérimenté.
             
-            # Nettoyer le conteneur de progression après un délai
-            import time
-            time.sleep(1)
-            progress_container.empty()
-    
-    with col2:
-        st.info("""
-        💡 **À propos de l'analyse IA**
+            ⚠️ Cette analyse est à titre informatif et ne remplace pas l'avis d'un professionnel.
+            """)
         
-        Notre IA utilise GPT-4o et agit comme un conseiller patrimonial expérimenté.
+        if analyse_en_cours is not None:
+            if analyse_en_cours.termine:
+                # Fin de la diffusion : on fige le résultat et on arrête le rafraîchissement
+                st.session_state['derniere_analyse_ia'] = analyse_en_cours.texte
+                st.session_state['mesures_analyse_ia'] = analyse_en_cours.mesures
+                del st.session_state['analyse_ia_en_cours']
+                st.rerun()
+            st.markdown("### 📋 Analyse et Recommandations")
+            st.markdown(analyse_en_cours.texte + " ▌" if analyse_en_cours.texte else "🔄 Connexion à l'IA...")
+            return
         
-        ⚠️ Cette analyse est à titre informatif et ne remplace pas l'avis d'un professionnel.
-        """)
-    
-    # Afficher l'analyse si elle existe
-    if 'derniere_analyse_ia' in st.session_state:
-        st.markdown("### 📋 Analyse et Recommandations")
-        
-        # Afficher l'analyse dans un container stylé
-        with st.container():
-            st.markdown(f"""
-            <div style="
-                background-color: #f8f9fa;
-                border-left: 5px solid #007bff;
-                padding: 15px;
-                margin: 10px 0;
-                border-radius: 5px;
-            ">
-            """ + st.session_state['derniere_analyse_ia'].replace('\n', '<br>') + """
-            </div>
-            """, unsafe_allow_html=True)
+        # Afficher l'analyse si elle existe
+        if 'derniere_analyse_ia' in st.session_state:
+            st.markdown("### 📋 Analyse et Recommandations")
+            
+            # Afficher l'analyse dans un container stylé
+            with st.container():
+                st.markdown(f"""
+                <div style="
+                    background-color: #f8f9fa;
+                    border-left: 5px solid #007bff;
+                    padding: 15px;
+                    margin: 10px 0;
+                    border-radius: 5px;
+                ">
+                """ + st.session_state['derniere_analyse_ia'].replace('\n', '<br>') + """
+                </div>
+                """, unsafe_allow_html=True)
+            
+            mesures = st.session_state.get('mesures_analyse_ia') or {}
+            if mesures.get('depuis_cache'):
+                st.caption("⚡ Analyse restituée depuis le cache.")
+            elif mesures.get('premier_jeton_s') is not None:
+                st.caption(f"⏱️ Premiers mots en {mesures['premier_jeton_s']:.1f} s, analyse complète en {mesures['total_s']:.1f} s.")
+
+    section_analyse_ia()
 
     st.divider()
 
-    # Bouton d'export PDF
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        if st.button("📄 Générer le rapport PDF", type="primary", use_container_width=True, key="btn_pdf"):
-            try:
-                # Récupérer l'analyse IA si elle existe dans la session
-                analyse_ia = st.session_state.get('derniere_analyse_ia', None)
+    # Bouton d'export PDF (fragment : générer et télécharger ne réexécutent pas la page)
+    @st.fragment
+    def section_export_pdf():
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            if st.button("📄 Générer le rapport PDF", type="primary", use_container_width=True, key="btn_pdf"):
+                try:
+                    # Récupérer l'analyse IA si elle existe dans la session
+                    analyse_ia = st.session_state.get('derniere_analyse_ia', None)
                 
-                # Générer le PDF directement
-                pdf_buffer = generer_pdf_simulation(resultats, situation, premier_bien, projet, analyse_ia)
+                    # Le PDF n'est régénéré que si les résultats ou l'analyse ont changé (reportlab chargé ici seulement)
+                    graphe.definir("analyse_ia", analyse_ia)
+                    with chrono("export_pdf"):
+                        pdf_data = graphe.obtenir("pdf")
                 
-                # Créer le nom du fichier avec la date
-                from datetime import datetime
-                nom_fichier = f"simulation_immobiliere_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+                    # Créer le nom du fichier avec la date
+                    from datetime import datetime
+                    nom_fichier = f"simulation_immobiliere_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
                 
-                # Sauvegarder le PDF en session pour éviter les conflits
-                st.session_state['pdf_data'] = pdf_buffer.getvalue()
-                st.session_state['pdf_filename'] = nom_fichier
+                    # Sauvegarder le PDF en session pour éviter les conflits
+                    st.session_state['pdf_data'] = pdf_data
+                    st.session_state['pdf_filename'] = nom_fichier
                 
-                st.success("✅ PDF généré avec succès ! Utilisez le bouton ci-dessous pour télécharger.")
+                    st.success("✅ PDF généré avec succès ! Utilisez le bouton ci-dessous pour télécharger.")
                 
-            except Exception as e:
-                st.error(f"❌ Erreur lors de la génération du PDF : {str(e)}")
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de la génération du PDF : {str(e)}")
+
+        # Bouton de téléchargement séparé (évite les conflits)
+        if 'pdf_data' in st.session_state and 'pdf_filename' in st.session_state:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                st.download_button(
+                    label="💾 Télécharger le rapport PDF",
+                    data=st.session_state['pdf_data'],
+                    file_name=st.session_state['pdf_filename'],
+                    mime="application/pdf",
+                    use_container_width=True,
+                    key="download_pdf_final"
+                )
+
+    section_export_pdf()
 
-    # Bouton de téléchargement séparé (évite les conflits)
-    if 'pdf_data' in st.session_state and 'pdf_filename' in st.session_state:
-        col1, col2, col3 = st.columns([1, 2, 1])
+    st.divider()
+
+    # Historique des scénarios (SQLite) : enregistrer, retrouver et comparer d'une session à l'autre
+    @st.fragment
+    @chronometre("section_scenarios")
+    def section_scenarios(situation, premier_bien, projet, resultats):
+        from datetime import datetime
+        from stockage_scenarios import stockage_par_defaut
+
+        st.header("🗂️ Historique des scénarios")
+        stockage = stockage_par_defaut()
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            foyer = st.text_input("Foyer", value="Mon foyer", key="scenario_foyer").strip() or "Mon foyer"
         with col2:
-            st.download_button(
-                label="💾 Télécharger le rapport PDF",
-                data=st.session_state['pdf_data'],
-                file_name=st.session_state['pdf_filename'],
-                mime="application/pdf",
-                use_container_width=True,
-                key="download_pdf_final"
-            )
+            nom = st.text_input("Nom du scénario", key="scenario_nom", placeholder="ex. apport 30 k€, 25 ans")
+        with col3:
+            st.write("")
+            if st.button("💾 Enregistrer ce scénario", use_container_width=True, key="btn_scenario"):
+                projection = None
+                if projet and projet.loyer_attendu > 0:
+                    # Projection annuelle à l'horizon affiché, quelle que soit la résolution du dashboard
+                    from dashboard_rentabilite import calculer_projection_rentabilite_en_cache
+                    annees, _ = graphe.obtenir("options_projection")
+                    projection = calculer_projection_rentabilite_en_cache(situation, premier_bien, projet, resultats, annees)
+                identifiant = stockage.enregistrer(foyer, situation, premier_bien, projet, resultats,
+                                                   projection, nom=nom or None)
+                st.success(f"Scénario n°{identifiant} enregistré")
+
+        scenarios = stockage.lister(foyer=foyer)
+        if not scenarios:
+            st.caption("Aucun scénario enregistré pour ce foyer.")
+            return
+
+        libelles = {
+            s["id"]: f"n°{s['id']} · {s['nom'] or 'sans nom'} · {datetime.fromtimestamp(s['cree_le']):%d/%m/%Y %H:%M}"
+                     f" · {'✅' if s['financable'] else '⚠️'}"
+            for s in scenarios
+        }
+        choisis = st.multiselect("Scénarios à comparer", list(libelles), format_func=libelles.get,
+                                 default=list(libelles)[:2], key="scenarios_compares")
+        if not choisis:
+            return
+        comparaison = stockage.comparer(choisis, projection=False)
+        lignes = (
+            ("Verdict", lambda i: "✅ Finançable" if comparaison["financable"][i] else "⚠️ Risque"),
+            ("Prix du bien", lambda i: f"{comparaison['prix_bien'][i]:,.0f} €" if comparaison["prix_bien"][i] is not None else "—"),
+            ("Apport", lambda i: f"{comparaison['apport'][i]:,.0f} €" if comparaison["apport"][i] is not None else "—"),
+            ("Taux", lambda i: f"{comparaison['taux_nominal'][i]:.2f} %" if comparaison["taux_nominal"][i] is not None else "—"),
+            ("Durée", lambda i: f"{comparaison['duree_annees'][i]} ans" if comparaison["duree_annees"][i] is not None else "—"),
+            ("Mensualité nouveau prêt", lambda i: f"{comparaison['mensualite_nouveau'][i]:,.0f} €"),
+            ("Taux d'endettement", lambda i: f"{comparaison['taux_endettement'][i] * 100:.1f} %"),
+            ("Taux d'effort", lambda i: f"{comparaison['taux_effort'][i] * 100:.1f} %"),
+            ("Reste à vivre", lambda i: f"{comparaison['reste_a_vivre'][i]:,.0f} €"),
+        )
+        entetes = [f"n°{i}" + (f" · {n}" if n else "") for i, n in zip(comparaison["id"], comparaison["nom"])]
+        tableau = ["| | " + " | ".join(entetes) + " |", "|---" * (len(entetes) + 1) + "|"]
+        tableau += [f"| {libelle} | " + " | ".join(valeur(i) for i in range(len(entetes))) + " |"
+                    for libelle, valeur in lignes]
+        st.markdown("\n".join(tableau))
+
+    section_scenarios(situation, premier_bien, projet, resultats)
 
     st.divider()
 
     # Verdict global
-    if (resultats['taux_endettement'] <= 0.35 and 
-        resultats['reste_a_vivre'] >= reste_min):
+    if est_financable(resultats, situation.personnes_foyer):
         st.success(
             "🎉 **PROJET FINANÇABLE** ✅\n\n"
             "Votre taux d'endettement et reste à vivre respectent les règles bancaires habituelles.\n"
@@ -513,9 +687,9 @@ if 'resultats' in st.session_state:
         )
     else:
         messages_problemes = []
-        if resultats['taux_endettement'] > 0.35:
-            messages_problemes.append(f"• Taux d'endettement trop élevé : {resultats['taux_endettement']*100:.1f}% (max 35%)")
-        if resultats['reste_a_vivre'] < reste_min:
+        if resultats.taux_endettement > 0.35:
+            messages_problemes.append(f"• Taux d'endettement trop élevé : {resultats.taux_endettement*100:.1f}% (max 35%)")
+        if resultats.reste_a_vivre < reste_min:
             messages_problemes.append(f"• Reste à vivre insuffisant : {reste_a_vivre:.0f}€ (min {reste_min}€)")
 
         st.error(
@@ -529,4 +703,14 @@ if 'resultats' in st.session_state:
         )
 
 else:
-    st.info("👆 Cliquez sur 'Calculer' pour voir les résultats de votre simulation.")
\ No newline at end of file
+    st.info("👆 Cliquez sur 'Calculer' pour voir les résultats de votre simulation.")
+
+# --- Diagnostic de performance ---
+arreter_profil_rerun(st.session_state)
+collecte = terminer_collecte()
+if collecte is not None and os.getenv("MESURES_CHEMIN_JSONL"):
+    with open(os.environ["MESURES_CHEMIN_JSONL"], "a", encoding="utf-8") as journal:
+        journal.write(collecte.en_jsonl())
+if st.query_params.get("debug") == "perf" or os.getenv("MESURES_PANNEAU") == "1":
+    from panneau_performance import afficher_panneau_performance
+    afficher_panneau_performance(collecte, st.session_state['mesures_session'])
@@ -0,0 +1,304 @@
+"""
+Simulation en lot multi-processus, par fragments (shards), avec reprise sur interruption.
+
+Le fichier d'entrée est découpé en fragments traités par un pool de processus.
+Chaque fragment est écrit de façon atomique (fichier temporaire puis `os.replace`)
+et consigné dans un manifeste JSON : relancer la même commande après une
+interruption ne recalcule que les fragments manquants. Exemples :
+
+    python batch_parallele.py prospects.csv resultats/ --processus 8
+    python batch_parallele.py prospects.parquet resultats/ --fusionner resultats.parquet
+
+Le découpage d'un CSV se fait par offsets d'octets (les champs ne doivent pas
+contenir de retour à la ligne) ; celui d'un Parquet par groupes de lignes, un
+groupe plus grand qu'un fragment étant lui-même découpé en plages de lignes.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cli_simulation import _Ecrivain, _format, _pyarrow, colonnes_texte, entete_csv, simuler_bloc
+from profilage import MODES, profiler
+
+NOM_MANIFESTE = "manifeste.json"
+TAILLE_LECTURE = 16 * 1024 * 1024  # octets lus à la fois pour repérer les fins de ligne
+
+
+def _ecrire_json_atomique(chemin: Path, contenu: dict):
+    temporaire = chemin.with_name(chemin.name + ".tmp")
+    with open(temporaire, "w", encoding="utf-8") as fichier:
+        json.dump(contenu, fichier, ensure_ascii=False, indent=2)
+        fichier.flush()
+        os.fsync(fichier.fileno())
+    os.replace(temporaire, chemin)
+
+
+def _decouper_csv(chemin: str, taille_shard: int) -> List[dict]:
+    """Offsets d'octets [debut, fin) de fragments de `taille_shard` lignes (hors en-tête)."""
+    with open(chemin, "rb") as fichier:
+        fichier.readline()  # en-tête
+        bornes = [fichier.tell()]
+        lignes = 0
+        position = bornes[0]
+        while True:
+            bloc = fichier.read(TAILLE_LECTURE)
+            if not bloc:
+                break
+            fins = np.flatnonzero(np.frombuffer(bloc, dtype=np.uint8) == ord("\n"))
+            # Fins de ligne qui closent un fragment complet dans ce bloc
+            for index in range(taille_shard - lignes - 1, len(fins), taille_shard):
+                bornes.append(position + int(fins[index]) + 1)
+            lignes = (lignes + len(fins)) % taille_shard
+            position += len(bloc)
+    if position > bornes[-1]:
+        bornes.append(position)
+    colonnes = entete_csv(chemin)
+    return [{"debut": debut, "fin": fin, "colonnes": colonnes} for debut, fin in zip(bornes[:-1], bornes[1:])]
+
+
+def _decouper_parquet(chemin: str, taille_shard: int) -> List[dict]:
+    """
+    Groupes de lignes Parquet consécutifs totalisant environ `taille_shard` lignes. Un groupe
+    de plus de `taille_shard` lignes (fichier écrit d'un seul bloc, par exemple) est découpé
+    en plages `lignes` [debut, fin) : chaque fragment relit alors tout le groupe, mais la
+    lecture coûte peu devant le calcul et les fragments restent répartis sur les processus.
+    """
+    metadonnees = _pyarrow().parquet.ParquetFile(chemin).metadata
+    fragments, courant, lignes = [], [], 0
+    for index in range(metadonnees.num_row_groups):
+        taille_groupe = metadonnees.row_group(index).num_rows
+        if taille_groupe > taille_shard:
+            if courant:
+                fragments.append({"groupes": courant})
+                courant, lignes = [], 0
+            fragments += [{"groupes": [index], "lignes": [debut, min(debut + taille_shard, taille_groupe)]}
+                          for debut in range(0, taille_groupe, taille_shard)]
+            continue
+        courant.append(index)
+        lignes += taille_groupe
+        if lignes >= taille_shard:
+            fragments.append({"groupes": courant})
+            courant, lignes = [], 0
+    if courant:
+        fragments.append({"groupes": courant})
+    return fragments
+
+
+def _colonnes_texte(entree: str, format_entree: str) -> List[str]:
+    """
+    Colonnes de texte de l'entrée (voir `cli_simulation.colonnes_texte`) ; pour un Parquet,
+    ses colonnes non numériques, à relire en texte dans des fragments CSV.
+    """
+    if format_entree == "csv":
+        return colonnes_texte(entete_csv(entree))
+    types = _pyarrow().types
+    return [champ.name for champ in _pyarrow().parquet.read_schema(entree)
+            if not (types.is_integer(champ.type) or types.is_floating(champ.type) or types.is_boolean(champ.type))]
+
+
+def _lire_fragment(chemin: str, format_entree: str, fragment: dict, texte: List[str]) -> pd.DataFrame:
+    if format_entree == "parquet":
+        table = _pyarrow().parquet.ParquetFile(chemin).read_row_groups(fragment["groupes"])
+        if "lignes" in fragment:
+            debut, fin = fragment["lignes"]
+            table = table.slice(debut, fin - debut)
+        return table.to_pandas()
+    with open(chemin, "rb") as fichier:
+        fichier.seek(fragment["debut"])
+        contenu = fichier.read(fragment["fin"] - fragment["debut"])
+    # Colonnes de texte déclarées d'avance : même type dans tous les fragments, même vides
+    return pd.read_csv(io.BytesIO(contenu), header=None, names=fragment["colonnes"],
+                       dtype={colonne: str for colonne in texte} or None)
+
+
+def _traiter_fragment(tache: dict) -> dict:
+    """Exécuté dans un processus du pool : lit, simule et écrit un fragment de façon atomique."""
+    # Un profil par fragment : le processus parent ne fait qu'attendre
+    with profiler(f"fragment_{tache['index']:05d}", tache.get("profil")):
+        return _simuler_fragment(tache)
+
+
+def _simuler_fragment(tache: dict) -> dict:
+    debut = time.perf_counter()
+    bloc = _lire_fragment(tache["entree"], tache["format_entree"], tache["fragment"], tache["texte"])
+    lecture = time.perf_counter()
+    resultats = simuler_bloc(bloc, tache["annees"], tache["par_annee"])
+    calcul = time.perf_counter()
+
+    destination = Path(tache["sortie"])
+    temporaire = destination.with_name(destination.name + f".{os.getpid()}.tmp")
+    ecrivain = _Ecrivain(str(temporaire), tache["format_sortie"], tache["texte"])
+    try:
+        ecrivain.ecrire(resultats)
+    finally:
+        ecrivain.fermer()
+    os.replace(temporaire, destination)
+    fin = time.perf_counter()
+    return {
+        "index": tache["index"],
+        "lignes": len(bloc),
+        "lecture_s": lecture - debut,
+        "calcul_s": calcul - lecture,
+        "ecriture_s": fin - calcul,
+        "duree_s": fin - debut,
+        "processus": os.getpid(),
+    }
+
+
+def _empreinte_entree(chemin: str) -> dict:
+    infos = os.stat(chemin)
+    return {"chemin": os.path.abspath(chemin), "taille": infos.st_size, "modifie_le": infos.st_mtime}
+
+
+def simuler_en_parallele(entree: str, dossier_sortie: str, processus: Optional[int] = None, taille_shard: int = 250_000,
+                         annees: int = 10, par_annee: bool = False, format_entree: Optional[str] = None,
+                         format_sortie: str = "parquet", recommencer: bool = False, progression: bool = True,
+                         profil: Optional[str] = None) -> dict:
+    """
+    Simule `entree` par fragments dans un pool de `processus` processus (tous les cœurs par défaut).
+
+    Les résultats sont écrits dans `dossier_sortie` (un fichier par fragment) avec un
+    manifeste de reprise. Un manifeste existant pour la même entrée et les mêmes
+    paramètres est repris ; `recommencer` repart de zéro. `profil` (cprofile ou echantillons)
+    écrit un profil par fragment, voir profilage.py.
+    Retourne le bilan : lignes, durée, débit et temps par fragment.
+    """
+    format_entree = _format(entree, format_entree)
+    processus = processus or os.cpu_count() or 1
+    dossier = Path(dossier_sortie)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin_manifeste = dossier / NOM_MANIFESTE
+
+    parametres = {"taille_shard": taille_shard, "annees": annees, "par_annee": par_annee,
+                  "format_entree": format_entree, "format_sortie": format_sortie}
+    empreinte = _empreinte_entree(entree)
+    manifeste = None
+    if chemin_manifeste.exists() and not recommencer:
+        manifeste = json.loads(chemin_manifeste.read_text(encoding="utf-8"))
+        if manifeste.get("entree") != empreinte or manifeste.get("parametres") != parametres:
+            raise ValueError(f"{chemin_manifeste} correspond à une autre entrée ou d'autres paramètres : "
+                             "utilisez --recommencer ou un autre dossier de sortie")
+    if manifeste is None:
+        decoupe = _decouper_parquet if format_entree == "parquet" else _decouper_csv
+        manifeste = {"entree": empreinte, "parametres": parametres, "colonnes_texte": _colonnes_texte(entree, format_entree),
+                     "fragments": [{"fragment": fragment, "fichier": f"fragment_{index:05d}.{format_sortie}", "statut": "a_faire"}
+                                   for index, fragment in enumerate(decoupe(entree, taille_shard))]}
+        _ecrire_json_atomique(chemin_manifeste, manifeste)
+
+    fragments = manifeste["fragments"]
+    # Un Parquet d'entrée garde ses types dans les fragments ; un CSV, ses colonnes de texte
+    texte = manifeste.get("colonnes_texte", _colonnes_texte(entree, format_entree)) if format_entree == "csv" else []
+    taches = [
+        {"index": index, "entree": entree, "format_entree": format_entree, "fragment": infos["fragment"],
+         "sortie": str(dossier / infos["fichier"]), "format_sortie": format_sortie, "annees": annees, "par_annee": par_annee,
+         "texte": texte, "profil": profil}
+        for index, infos in enumerate(fragments)
+        if infos["statut"] != "termine" or not (dossier / infos["fichier"]).exists()
+    ]
+    deja_faits = len(fragments) - len(taches)
+    if progression and deja_faits:
+        print(f"Reprise : {deja_faits}/{len(fragments)} fragments déjà terminés", file=sys.stderr)
+
+    debut = time.perf_counter()
+    lignes = 0
+    pool = ProcessPoolExecutor(max_workers=processus)
+    try:
+        for future in as_completed([pool.submit(_traiter_fragment, tache) for tache in taches]):
+            mesure = future.result()
+            fragments[mesure["index"]].update(statut="termine", **{cle: mesure[cle] for cle in
+                                                                   ("lignes", "lecture_s", "calcul_s", "ecriture_s", "duree_s")})
+            _ecrire_json_atomique(chemin_manifeste, manifeste)
+            lignes += mesure["lignes"]
+            if progression:
+                termines = sum(infos["statut"] == "termine" for infos in fragments)
+                print(f"fragment {mesure['index']:5d} : {mesure['lignes']:,} lignes en {mesure['duree_s']:.2f} s "
+                      f"(lecture {mesure['lecture_s']:.2f} / calcul {mesure['calcul_s']:.2f} / écriture {mesure['ecriture_s']:.2f}) "
+                      f"- {termines}/{len(fragments)}", file=sys.stderr)
+    except BaseException:
+        # Interruption (Ctrl+C, erreur) : les fragments en file sont abandonnés, ceux terminés restent au manifeste
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    duree = time.perf_counter() - debut
+    return {
+        "fragments": len(fragments),
+        "fragments_calcules": len(taches),
+        "lignes": lignes,
+        "duree_s": duree,
+        "lignes_par_s": lignes / duree if duree > 0 else 0.0,
+        "processus": processus,
+        "durees_fragments_s": [infos.get("duree_s") for infos in fragments],
+    }
+
+
+def fusionner(dossier_sortie: str, chemin: str, format_sortie: Optional[str] = None):
+    """
+    Concatène les fragments terminés, dans l'ordre du fichier d'entrée, en un seul fichier.
+    Les colonnes de texte de l'entrée (relevées au manifeste) sont lues et écrites en texte :
+    le schéma ne dépend pas du premier fragment, même si une colonne y est entièrement vide.
+    """
+    dossier = Path(dossier_sortie)
+    manifeste = json.loads((dossier / NOM_MANIFESTE).read_text(encoding="utf-8"))
+    fragments = manifeste["fragments"]
+    if any(infos["statut"] != "termine" for infos in fragments):
+        raise ValueError("Tous les fragments ne sont pas terminés : relancez la simulation avant de fusionner")
+    format_entree = manifeste["parametres"]["format_entree"]
+    format_fragments = manifeste["parametres"]["format_sortie"]
+    # Manifeste d'une version antérieure : colonnes relevées sur l'entrée
+    texte = (manifeste["colonnes_texte"] if "colonnes_texte" in manifeste
+             else _colonnes_texte(manifeste["entree"]["chemin"], format_entree))
+    if format_entree == "parquet" and format_fragments == "parquet":
+        texte = []  # fragments aux types du Parquet d'entrée, identiques d'un fragment à l'autre
+    ecrivain = _Ecrivain(chemin, _format(chemin, format_sortie), texte)
+    try:
+        for infos in fragments:
+            fichier = dossier / infos["fichier"]
+            bloc = (pd.read_parquet(fichier) if format_fragments == "parquet"
+                    else pd.read_csv(fichier, dtype={colonne: str for colonne in texte}))
+            ecrivain.ecrire(bloc)
+    finally:
+        ecrivain.fermer()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entree", help="Fichier CSV ou Parquet des foyers et projets")
+    parser.add_argument("dossier_sortie", help="Dossier des fragments de résultats et du manifeste de reprise")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--taille-shard", type=int, default=250_000, help="Lignes par fragment")
+    parser.add_argument("--annees", type=int, default=10, help="Horizon de la projection de rentabilité (années)")
+    parser.add_argument("--par-annee", action="store_true", help="Écrire les indicateurs de chaque année")
+    parser.add_argument("--format-entree", choices=["csv", "parquet"])
+    parser.add_argument("--format-sortie", choices=["csv", "parquet"], default="parquet", help="Format des fragments")
+    parser.add_argument("--fusionner", metavar="FICHIER", help="Concatène ensuite les fragments dans ce fichier")
+    parser.add_argument("--recommencer", action="store_true", help="Ignore le manifeste existant et repart de zéro")
+    parser.add_argument("--profil", choices=MODES, help="Profile chaque fragment (défaut : variable PROFILAGE)")
+    args = parser.parse_args(arguments)
+
+    if args.annees < 1 or args.taille_shard < 1 or (args.processus is not None and args.processus < 1):
+        parser.error("--annees, --taille-shard et --processus doivent être strictement positifs")
+    try:
+        bilan = simuler_en_parallele(args.entree, args.dossier_sortie, args.processus, args.taille_shard, args.annees,
+                                     args.par_annee, args.format_entree, args.format_sortie, args.recommencer,
+                                     profil=args.profil)
+        if args.fusionner:
+            fusionner(args.dossier_sortie, args.fusionner)
+    except (FileNotFoundError, ValueError) as erreur:
+        parser.exit(1, f"Erreur : {erreur}\n")
+    durees = [duree for duree in bilan["durees_fragments_s"] if duree is not None]
+    print(f"{bilan['lignes']:,} lignes simulées en {bilan['duree_s']:.2f} s ({bilan['lignes_par_s']:,.0f} lignes/s) "
+          f"sur {bilan['processus']} processus - {bilan['fragments_calcules']}/{bilan['fragments']} fragments calculés"
+          + (f", {np.mean(durees):.2f} s par fragment en moyenne" if durees else ""))
+
+
+if __name__ == "__main__":
+    main()
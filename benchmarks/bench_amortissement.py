@@ -0,0 +1,63 @@
+"""
+Benchmark : synthèse annuelle d'amortissement pour des milliers de prêts de 30 ans,
+comparée à une boucle mensuelle en Python pur.
+
+Usage : python benchmarks/bench_amortissement.py --prets 10000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from amortissement import amortissement_annuel  # noqa: E402
+from calculs import mensualite_credit  # noqa: E402
+
+
+def boucle_mensuelle(capital: float, taux: float, duree: int) -> list:
+    """Soldes de fin d'année calculés échéance par échéance."""
+    mensualite = mensualite_credit(capital, taux, duree)
+    i = taux / 100 / 12
+    restant = capital
+    soldes = []
+    for mois in range(1, duree * 12 + 1):
+        restant -= mensualite - restant * i
+        if mois % 12 == 0:
+            soldes.append(max(restant, 0.0))
+    return soldes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prets", type=int, default=10_000)
+    parser.add_argument("--echantillon-boucle", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    capital = rng.uniform(50_000, 500_000, args.prets)
+    taux = rng.uniform(1.0, 5.0, args.prets)
+    duree = np.full(args.prets, 30)
+
+    debut = time.perf_counter()
+    synthese = amortissement_annuel(capital, taux, duree)
+    duree_vec = time.perf_counter() - debut
+    octets = sum(v.nbytes for v in synthese.values())
+
+    n_boucle = min(args.echantillon_boucle, args.prets)
+    debut = time.perf_counter()
+    soldes = [boucle_mensuelle(c, t, 30) for c, t in zip(capital[:n_boucle], taux[:n_boucle])]
+    duree_boucle = (time.perf_counter() - debut) * args.prets / n_boucle
+
+    ecart = np.max(np.abs(np.array(soldes) - synthese["capital_restant"][:n_boucle]))
+
+    print(f"{args.prets} prêts x 30 ans")
+    print(f"  amortissement_annuel  : {duree_vec * 1000:8.1f} ms  ({octets / 1e6:.1f} Mo de résultats)")
+    print(f"  boucle mensuelle (est): {duree_boucle * 1000:8.1f} ms")
+    print(f"  écart maximal         : {ecart:.2e} €")
+
+
+if __name__ == "__main__":
+    main()
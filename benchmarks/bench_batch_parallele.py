@@ -0,0 +1,47 @@
+"""
+Benchmark : passage à l'échelle de `batch_parallele` selon le nombre de processus.
+
+Génère un CSV de foyers aléatoires puis le simule avec 1, 2, 4... processus
+(jusqu'au nombre de cœurs) et affiche le débit et l'accélération obtenus.
+
+Usage : python benchmarks/bench_batch_parallele.py --lignes 2000000 --taille-shard 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from batch_parallele import simuler_en_parallele  # noqa: E402
+from bench_calcul_ratios_batch import generer_foyers  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lignes", type=int, default=1_000_000)
+    parser.add_argument("--taille-shard", type=int, default=100_000)
+    parser.add_argument("--processus-max", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    niveaux = sorted({1, args.processus_max} | {2 ** k for k in range(1, 8) if 2 ** k < args.processus_max})
+    with tempfile.TemporaryDirectory() as dossier:
+        entree = Path(dossier) / "foyers.csv"
+        generer_foyers(args.lignes).to_csv(entree, index=False)
+        print(f"{args.lignes:,} lignes, fragments de {args.taille_shard:,} lignes, {os.cpu_count()} cœur(s)")
+
+        reference = None
+        for processus in niveaux:
+            bilan = simuler_en_parallele(str(entree), str(Path(dossier) / f"sortie_{processus}"), processus,
+                                         args.taille_shard, progression=False)
+            reference = reference or bilan["duree_s"]
+            durees = bilan["durees_fragments_s"]
+            print(f"  {processus:3d} processus : {bilan['duree_s']:6.2f} s, {bilan['lignes_par_s']:10,.0f} lignes/s, "
+                  f"accélération x{reference / bilan['duree_s']:.2f} (efficacité {reference / bilan['duree_s'] / processus:.0%}), "
+                  f"fragment {min(durees):.2f}-{max(durees):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark : calcul_ratios + projection sans cache, puis avec le cache LRU sur un flux
+de requêtes où la plupart des scénarios sont répétés.
+
+Usage : python benchmarks/bench_cache_calculs.py --requetes 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cache_calculs import calcul_ratios_en_cache, statistiques_caches  # noqa: E402
+from calculs import calcul_ratios  # noqa: E402
+from dashboard_rentabilite import calculer_projection_rentabilite, calculer_projection_rentabilite_en_cache  # noqa: E402
+from data_models import NouveauProjet, SituationActuelle  # noqa: E402
+
+
+def scenarios(n: int, part_repetee: float = 0.9, graine: int = 0):
+    """Flux de scénarios : `part_repetee` tirés parmi 20 scénarios par défaut, le reste unique."""
+    rng = np.random.default_rng(graine)
+    for k in range(n):
+        if rng.random() < part_repetee:
+            base = int(rng.integers(20))
+            revenus, prix = 3000 + 100 * base, 150_000 + 5_000 * base
+        else:
+            revenus, prix = float(rng.uniform(2000, 8000)), float(rng.uniform(100_000, 400_000))
+        situation = SituationActuelle(revenus_mensuels=revenus, charges_mensuelles=900, credits_mensuels=0)
+        projet = NouveauProjet(prix_bien=prix, apport=20_000, taux_nominal=3.5, duree_annees=20, loyer_attendu=800)
+        yield situation, projet
+
+
+def executer(flux: list, ratios, projection) -> float:
+    debut = time.perf_counter()
+    for situation, projet in flux:
+        resultats = ratios(situation, None, projet)
+        projection(situation, None, projet, resultats)
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requetes", type=int, default=5_000)
+    args = parser.parse_args()
+
+    flux = list(scenarios(args.requetes))
+    sans_cache = executer(flux, calcul_ratios, calculer_projection_rentabilite)
+    avec_cache = executer(flux, calcul_ratios_en_cache, calculer_projection_rentabilite_en_cache)
+
+    print(f"{args.requetes} requêtes (90% de scénarios répétés)")
+    print(f"  sans cache : {sans_cache * 1000:8.1f} ms")
+    print(f"  avec cache : {avec_cache * 1000:8.1f} ms  (x{sans_cache / avec_cache:.1f})")
+    for nom, stats in statistiques_caches().items():
+        print(f"  {nom}: {stats['succes']} succès / {stats['echecs']} échecs ({stats['taux_succes']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
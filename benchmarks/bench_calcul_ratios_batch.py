@@ -0,0 +1,100 @@
+"""
+Benchmark : boucle `calcul_ratios` (modèles pydantic ligne par ligne) contre `calcul_ratios_batch`.
+
+Usage : python benchmarks/bench_calcul_ratios_batch.py --lignes 50000
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calculs import calcul_ratios  # noqa: E402
+from calculs_batch import calcul_ratios_batch  # noqa: E402
+from data_models import NouveauProjet, PremierBien, SituationActuelle  # noqa: E402
+
+
+def generer_foyers(n: int, graine: int = 42) -> pd.DataFrame:
+    """Génère un fichier de foyers aléatoires, dont un tiers avec un premier bien."""
+    rng = np.random.default_rng(graine)
+    a_premier_bien = rng.random(n) < 1 / 3
+    jours = rng.integers(30, 15 * 365, n)
+    return pd.DataFrame({
+        "revenus_mensuels": rng.uniform(1500, 9000, n).round(0),
+        "charges_mensuelles": rng.uniform(300, 2500, n).round(0),
+        "credits_mensuels": rng.choice([0, 0, 150, 300], n).astype(float),
+        "mensualite_actuelle": np.where(a_premier_bien, rng.uniform(400, 1500, n).round(0), 0.0),
+        "loyer_percu": np.where(a_premier_bien, rng.uniform(0, 1200, n).round(0), 0.0),
+        "date_achat": [date.today() - timedelta(days=int(j)) if p else None for j, p in zip(jours, a_premier_bien)],
+        "duree_pret_initiale": np.where(a_premier_bien, rng.choice([15, 20, 25], n), 0),
+        "prix_bien": rng.uniform(80_000, 450_000, n).round(-3),
+        "apport": rng.uniform(0, 60_000, n).round(-3),
+        "taux_nominal": rng.uniform(2.5, 4.5, n).round(2),
+        "duree_annees": rng.choice([15, 20, 25], n),
+        "loyer_attendu": rng.choice([0.0, 600.0, 850.0, 1100.0], n),
+    })
+
+
+def boucle_scalaire(df: pd.DataFrame) -> list:
+    """Approche actuelle : construction des modèles et appel de calcul_ratios ligne par ligne."""
+    resultats = []
+    for ligne in df.itertuples(index=False):
+        situation = SituationActuelle(
+            revenus_mensuels=ligne.revenus_mensuels,
+            charges_mensuelles=ligne.charges_mensuelles,
+            credits_mensuels=ligne.credits_mensuels,
+        )
+        premier_bien = None
+        if ligne.mensualite_actuelle > 0:
+            premier_bien = PremierBien(
+                prix_achat=0,
+                mensualite_actuelle=ligne.mensualite_actuelle,
+                loyer_percu=ligne.loyer_percu,
+                date_achat=ligne.date_achat,
+                duree_pret_initiale=int(ligne.duree_pret_initiale),
+            )
+        projet = NouveauProjet(
+            prix_bien=ligne.prix_bien,
+            apport=ligne.apport,
+            taux_nominal=ligne.taux_nominal,
+            duree_annees=int(ligne.duree_annees),
+            loyer_attendu=ligne.loyer_attendu,
+        )
+        resultats.append(calcul_ratios(situation, premier_bien, projet))
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lignes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = generer_foyers(args.lignes)
+
+    debut = time.perf_counter()
+    scalaires = boucle_scalaire(df)
+    duree_boucle = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    batch = calcul_ratios_batch(df)
+    duree_batch = time.perf_counter() - debut
+
+    # Vérification d'équivalence avec la version unitaire
+    for cle in batch:
+        attendu = np.array([r[cle] for r in scalaires], dtype=np.float64)
+        if not np.allclose(batch[cle], attendu, rtol=1e-12, atol=1e-9):
+            raise SystemExit(f"Écart entre version unitaire et batch sur '{cle}'")
+
+    print(f"{args.lignes} foyers")
+    print(f"  boucle calcul_ratios : {duree_boucle:8.3f} s  ({args.lignes / duree_boucle:>12,.0f} lignes/s)")
+    print(f"  calcul_ratios_batch  : {duree_batch:8.3f} s  ({args.lignes / duree_batch:>12,.0f} lignes/s)")
+    print(f"  accélération         : x{duree_boucle / duree_batch:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
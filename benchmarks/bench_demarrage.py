@@ -0,0 +1,66 @@
+"""
+Benchmark du démarrage à froid de app.py, dans un nouveau processus à chaque mesure :
+temps d'import de Streamlit, temps du premier rendu (imports de app.py compris)
+et modules lourds effectivement chargés.
+
+Usage : python benchmarks/bench_demarrage.py --repetitions 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+
+MODULES_LOURDS = ["numpy", "pandas", "plotly.express", "plotly.graph_objects", "reportlab.platypus", "openai", "httpx", "pyarrow"]
+
+# Exécuté dans un processus neuf : rien n'est encore importé
+SCRIPT_MESURE = """
+import json, logging, sys, time
+debut = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+import_streamlit = time.perf_counter() - debut
+deja_charges = [m for m in {modules!r} if m in sys.modules]
+logging.disable(logging.WARNING)
+app = AppTest.from_file({app!r}, default_timeout=120)
+debut_rendu = time.perf_counter()
+app.run()
+premier_rendu = time.perf_counter() - debut_rendu
+if app.exception:
+    raise SystemExit(f"app.py a levé une exception : {{app.exception[0].value}}")
+print(json.dumps({{
+    "import_streamlit_s": import_streamlit,
+    "premier_rendu_s": premier_rendu,
+    "total_s": time.perf_counter() - debut,
+    "modules_streamlit": deja_charges,
+    "modules_charges": [m for m in {modules!r} if m in sys.modules and m not in deja_charges],
+}}))
+"""
+
+
+def mesurer_demarrage() -> dict:
+    """Une mesure de démarrage à froid (nouveau processus Python)."""
+    script = SCRIPT_MESURE.format(app=str(RACINE / "app.py"), modules=MODULES_LOURDS)
+    sortie = subprocess.run([sys.executable, "-c", script], cwd=RACINE, capture_output=True, text=True, check=True)
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    mesures = [mesurer_demarrage() for _ in range(args.repetitions)]
+    for cle, libelle in (("import_streamlit_s", "Import de Streamlit"), ("premier_rendu_s", "Premier rendu de app.py"),
+                         ("total_s", "Total")):
+        valeurs = [m[cle] * 1000 for m in mesures]
+        print(f"{libelle:26s}: médiane {statistics.median(valeurs):7.0f} ms (min {min(valeurs):.0f}, max {max(valeurs):.0f})")
+    print(f"Modules lourds chargés par Streamlit lui-même : {', '.join(mesures[-1]['modules_streamlit']) or 'aucun'}")
+    print(f"Modules lourds chargés par app.py au premier rendu : {', '.join(mesures[-1]['modules_charges']) or 'aucun'}")
+
+
+if __name__ == "__main__":
+    main()
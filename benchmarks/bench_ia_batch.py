@@ -0,0 +1,74 @@
+"""
+Benchmark hors ligne de l'analyse IA contre le serveur mock local :
+client recréé à chaque appel, client partagé, puis lot asynchrone à concurrence bornée.
+
+Usage : python benchmarks/bench_ia_batch.py --projets 50 --latence 0.2 --taux-erreur 0.05
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import openai
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serveur_mock_openai import demarrer_serveur_mock  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projets", type=int, default=50)
+    parser.add_argument("--latence", type=float, default=0.2)
+    parser.add_argument("--taux-erreur", type=float, default=0.05)
+    parser.add_argument("--concurrence", type=int, default=16)
+    parser.add_argument("--sequentiels", type=int, default=10, help="Appels mesurés pour les modes séquentiels")
+    args = parser.parse_args()
+
+    serveur, url = demarrer_serveur_mock(latence=args.latence, taux_erreur=0.0)
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-mock-" + "0" * 40)
+
+    from analyse_ia import MODELE_IA, PARAMETRES_IA, analyser_projets, construire_messages, obtenir_client
+    from calculs import calcul_ratios
+    from data_models import NouveauProjet, SituationActuelle
+
+    situation = SituationActuelle(revenus_mensuels=4800, charges_mensuelles=1200, credits_mensuels=0, personnes_foyer=2)
+    entrees = []
+    for k in range(args.projets):
+        projet = NouveauProjet(prix_bien=150_000 + 2_000 * k, apport=20_000, taux_nominal=3.6, duree_annees=20, loyer_attendu=850)
+        entrees.append((calcul_ratios(situation, None, projet), situation, None, projet))
+    messages = construire_messages(*entrees[0])
+
+    # 1. Ancien fonctionnement : un client (et une connexion) par appel
+    debut = time.perf_counter()
+    for _ in range(args.sequentiels):
+        client = openai.OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        client.chat.completions.create(model=MODELE_IA, messages=messages, **PARAMETRES_IA)
+    par_appel_nouveau = (time.perf_counter() - debut) / args.sequentiels
+
+    # 2. Client partagé : connexions réutilisées
+    client = obtenir_client(os.environ["OPENAI_API_KEY"])
+    client.chat.completions.create(model=MODELE_IA, messages=messages, **PARAMETRES_IA)
+    debut = time.perf_counter()
+    for _ in range(args.sequentiels):
+        client.chat.completions.create(model=MODELE_IA, messages=messages, **PARAMETRES_IA)
+    par_appel_partage = (time.perf_counter() - debut) / args.sequentiels
+
+    # 3. Lot asynchrone avec erreurs injectées et reprises
+    serveur.config["taux_erreur"] = args.taux_erreur
+    analyses, stats = analyser_projets(entrees, concurrence=args.concurrence, utiliser_cache=False, delai_initial=0.1)
+
+    print(f"Serveur mock : latence {args.latence * 1000:.0f} ms, {args.taux_erreur:.0%} d'erreurs (lot uniquement)")
+    print(f"  client recréé à chaque appel : {par_appel_nouveau * 1000:7.1f} ms / appel")
+    print(f"  client partagé               : {par_appel_partage * 1000:7.1f} ms / appel")
+    print(f"  lot asynchrone x{args.concurrence:<3}            : {stats['duree_totale_s']:.2f} s pour {stats['projets']} projets "
+          f"({stats['projets'] / stats['duree_totale_s']:.1f} projets/s)")
+    print(f"    succès {stats['succes']}, échecs {stats['echecs']}, reprises {stats['reprises']}")
+    print(f"    latence p50 {stats['latence_p50_ms']:.0f} ms, p95 {stats['latence_p95_ms']:.0f} ms, max {stats['latence_max_ms']:.0f} ms")
+    serveur.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark : projection Monte Carlo, 100 000 chemins x 30 ans sur un cœur (objectif < 200 ms).
+
+Usage : python benchmarks/bench_monte_carlo.py --chemins 100000 --annees 30
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_models import NouveauProjet  # noqa: E402
+from projection_stochastique import simuler_projection_stochastique  # noqa: E402
+
+OBJECTIF_MS = 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chemins", type=int, default=100_000)
+    parser.add_argument("--annees", type=int, default=30)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    projet = NouveauProjet(prix_bien=220_000, apport=30_000, taux_nominal=3.6, duree_annees=25, loyer_attendu=950)
+    simuler_projection_stochastique(projet, annees=args.annees, n_chemins=1_000, graine=0)  # échauffement
+
+    durees = []
+    for _ in range(args.repetitions):
+        debut = time.perf_counter()
+        simuler_projection_stochastique(projet, annees=args.annees, n_chemins=args.chemins, graine=42)
+        durees.append(time.perf_counter() - debut)
+
+    tracemalloc.start()
+    bandes = simuler_projection_stochastique(projet, annees=args.annees, n_chemins=args.chemins, graine=42)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    meilleure = min(durees) * 1000
+    print(f"{args.chemins} chemins x {args.annees} ans")
+    print(f"  meilleur temps : {meilleure:.1f} ms (objectif {OBJECTIF_MS} ms : {'OK' if meilleure < OBJECTIF_MS else 'DÉPASSÉ'})")
+    print(f"  pic mémoire    : {pic / 1e6:.1f} Mo")
+    fin = bandes["patrimoine_net"].iloc[-1]
+    print(f"  patrimoine net à {args.annees} ans : P5 {fin['p5']:,.0f} / P50 {fin['p50']:,.0f} / P95 {fin['p95']:,.0f} €")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark : projection mensuelle d'un portefeuille de N biens (un ou deux prêts chacun, dont
+certains déjà entamés ou à venir). Mesure séparément la validation des modèles pydantic, la mise
+en colonnes et la projection biens × mois, contre l'objectif d'une réponse interactive (100 ms).
+
+Usage : python benchmarks/bench_portefeuille.py --biens 10 100 1000 --mois 360
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_models import Portefeuille  # noqa: E402
+from portefeuille import colonnes_portefeuille, projection_portefeuille  # noqa: E402
+
+OBJECTIF_MS = 100
+
+
+def generer_portefeuille(biens: int, graine: int = 42) -> dict:
+    """Portefeuille aléatoire (reproductible), au format JSON d'une requête."""
+    rng = np.random.default_rng(graine)
+    aujourd_hui = date.today()
+    liste = []
+    for i in range(biens):
+        valeur = round(float(rng.uniform(80_000, 600_000)), -3)
+        prets = [{
+            "capital_emprunte": float(valeur * rng.uniform(0.5, 0.9)),
+            "taux_nominal": round(float(rng.uniform(1.0, 4.5)), 2),
+            "duree_annees": int(rng.choice([15, 20, 25])),
+            "date_debut": (aujourd_hui - timedelta(days=int(rng.integers(-365, 12 * 365)))).isoformat(),
+        }]
+        if rng.random() < 0.3:  # prêt travaux
+            prets.append({"capital_emprunte": float(rng.uniform(10_000, 50_000)), "taux_nominal": 2.0, "duree_annees": 10})
+        liste.append({
+            "nom": f"Lot {i + 1}",
+            "valeur_actuelle": valeur,
+            "loyer_mensuel": round(valeur * float(rng.uniform(0.004, 0.006))),
+            "charges_mensuelles": None if rng.random() < 0.5 else round(float(rng.uniform(50, 400))),
+            "prets": prets,
+        })
+    return {"situation": {"revenus_mensuels": 12_000, "charges_mensuelles": 2_500, "credits_mensuels": 0}, "biens": liste}
+
+
+def chronometrer(fonction, repetitions: int = 7):
+    """Meilleur temps en ms sur `repetitions` appels, et le dernier résultat."""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur * 1000, resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--biens", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--mois", type=int, default=360)
+    args = parser.parse_args()
+
+    print(f"Projection sur {args.mois} mois")
+    print(f"  {'biens':>6} {'prêts':>6} {'validation':>11} {'colonnes':>10} {'projection':>11} {'total':>9}")
+    for nombre in args.biens:
+        donnees = generer_portefeuille(nombre)
+        duree_validation, portefeuille = chronometrer(lambda: Portefeuille.model_validate(donnees))
+        duree_colonnes, (biens, prets) = chronometrer(lambda: colonnes_portefeuille(portefeuille))
+        duree_projection, _ = chronometrer(lambda: projection_portefeuille(biens, prets, args.mois, 12_000, 2_500))
+        total = duree_validation + duree_colonnes + duree_projection
+        etat = "ok" if total < OBJECTIF_MS else f"> {OBJECTIF_MS} ms"
+        print(f"  {nombre:>6} {len(prets['bien']):>6} {duree_validation:8.1f} ms {duree_colonnes:7.1f} ms "
+              f"{duree_projection:8.1f} ms {total:6.1f} ms  {etat}")
+
+
+if __name__ == "__main__":
+    main()
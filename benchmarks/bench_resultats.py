@@ -0,0 +1,75 @@
+"""
+Benchmark : représentation des résultats de N foyers. Un dictionnaire par ligne (ancien
+format), un enregistrement à slots par ligne (`ResultatRatios`), ou le bloc en colonnes
+de `calcul_ratios_batch` (`TableauRatios`). Mesure le temps de construction et la mémoire
+allouée (tracemalloc), calcul vectorisé des ratios compris.
+
+Usage : python benchmarks/bench_resultats.py --lignes 200000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_calcul_ratios_batch import generer_foyers  # noqa: E402
+from calculs_batch import calcul_ratios_batch  # noqa: E402
+from resultats import COLONNES_RATIOS, ResultatRatios  # noqa: E402
+
+
+def dictionnaires(df) -> list:
+    """Ancien format : un dictionnaire de 15 clés par foyer."""
+    colonnes = calcul_ratios_batch(df)
+    return [dict(zip(COLONNES_RATIOS, ligne)) for ligne in zip(*(colonnes[nom].tolist() for nom in COLONNES_RATIOS))]
+
+
+def enregistrements(df) -> list:
+    """Un `ResultatRatios` (slots, sans dictionnaire d'instance) par foyer."""
+    colonnes = calcul_ratios_batch(df)
+    return [ResultatRatios(*ligne[:11], (), *ligne[11:])
+            for ligne in zip(*(colonnes[nom].tolist() for nom in COLONNES_RATIOS))]
+
+
+def tableau(df):
+    """Bloc float64 en colonnes, sans objet Python par foyer."""
+    return calcul_ratios_batch(df)
+
+
+def mesurer(fonction, df):
+    debut = time.perf_counter()
+    fonction(df)
+    duree = time.perf_counter() - debut
+    tracemalloc.start()
+    resultat = fonction(df)
+    _, pic = tracemalloc.get_traced_memory()
+    courant = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultat
+    return duree, pic, courant
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lignes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = generer_foyers(args.lignes)
+    print(f"{args.lignes} foyers")
+    print(f"  {'représentation':<28} {'temps':>9} {'pic mémoire':>12} {'conservé':>10} {'octets/foyer':>13}")
+    mesures = {}
+    for nom, fonction in (("dictionnaires par ligne", dictionnaires),
+                          ("enregistrements à slots", enregistrements),
+                          ("TableauRatios (colonnes)", tableau)):
+        duree, pic, conserve = mesurer(fonction, df)
+        mesures[nom] = (duree, conserve)
+        print(f"  {nom:<28} {duree * 1000:7.0f} ms {pic / 1e6:9.1f} Mo {conserve / 1e6:7.1f} Mo {conserve / args.lignes:12.0f}")
+
+    duree_dicts, memoire_dicts = mesures["dictionnaires par ligne"]
+    duree_tableau, memoire_tableau = mesures["TableauRatios (colonnes)"]
+    print(f"  colonnes / dictionnaires : temps ÷{duree_dicts / duree_tableau:,.0f}, mémoire ÷{memoire_dicts / memoire_tableau:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
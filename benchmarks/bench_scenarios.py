@@ -0,0 +1,136 @@
+"""
+Benchmark : historique des scénarios (`stockage_scenarios`) rempli de N scénarios. Mesure
+l'insertion, puis la liste (sans filtre, par foyer, par verdict, par période, page suivante)
+et la comparaison de 2, 10 et 20 scénarios, contre l'objectif de 100 ms, et affiche le plan
+de requête SQLite pour vérifier l'usage des index.
+
+Usage : python benchmarks/bench_scenarios.py --scenarios 1000000
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_calcul_ratios_batch import generer_foyers  # noqa: E402
+from calculs import calcul_ratios  # noqa: E402
+from dashboard_rentabilite import calculer_projection_rentabilite  # noqa: E402
+from stockage_scenarios import _INSERTION, StockageScenarios  # noqa: E402
+from validation_lot import modeles_de_confiance  # noqa: E402
+
+OBJECTIF_MS = 100
+DEBUT_HISTORIQUE = 1_600_000_000.0  # septembre 2020
+
+
+def modeles(nombre: int) -> list:
+    """Scénarios types : (situation, premier bien, projet, résultats, projection)."""
+    scenarios = []
+    for situation, premier_bien, projet in modeles_de_confiance(generer_foyers(nombre)):
+        resultats = calcul_ratios(situation, premier_bien, projet)
+        projection = calculer_projection_rentabilite(situation, premier_bien, projet, resultats, projet.duree_annees)
+        scenarios.append((situation, premier_bien, projet, resultats, projection))
+    return scenarios
+
+
+def remplir(stockage: StockageScenarios, types: list, nombre: int, foyers: int, paquet: int = 50_000):
+    """
+    Insère `nombre` scénarios en recopiant les lignes des scénarios types (le coût de sérialisation
+    des modèles est mesuré à part) : foyer, nom et date varient, dates croissantes sur cinq ans.
+    """
+    lignes_types = [StockageScenarios._ligne("", *scenario) for scenario in types]
+    rng = np.random.default_rng(7)
+    dates = np.sort(rng.uniform(DEBUT_HISTORIQUE, DEBUT_HISTORIQUE + 5 * 365 * 86400, nombre))
+    numeros_foyer = rng.integers(0, foyers, nombre)
+    numeros_type = rng.integers(0, len(lignes_types), nombre)
+    connexion = stockage._connexion
+    for debut in range(0, nombre, paquet):
+        fin = min(debut + paquet, nombre)
+        connexion.execute("BEGIN")
+        connexion.executemany(_INSERTION, (
+            (f"foyer-{numeros_foyer[i]}", f"scénario {i}", float(dates[i]), *lignes_types[numeros_type[i]][3:])
+            for i in range(debut, fin)
+        ))
+        connexion.execute("COMMIT")
+
+
+def chronometrer(fonction, repetitions: int = 20) -> float:
+    """Meilleur temps sur `repetitions` appels, en ms."""
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=1_000_000)
+    parser.add_argument("--foyers", type=int, default=20_000)
+    parser.add_argument("--chemin", help="fichier SQLite (par défaut : fichier temporaire)")
+    args = parser.parse_args()
+
+    types = modeles(200)
+    with tempfile.TemporaryDirectory() as dossier:
+        stockage = StockageScenarios(args.chemin or str(Path(dossier) / "scenarios.sqlite"))
+
+        debut = time.perf_counter()
+        stockage.enregistrer_plusieurs(
+            dict(foyer="foyer-0", situation=s, premier_bien=pb, projet=p, resultats=r, projection=proj)
+            for s, pb, p, r, proj in types * 10
+        )
+        duree_modeles = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        remplir(stockage, types, args.scenarios, args.foyers)
+        duree_remplissage = time.perf_counter() - debut
+        total = stockage.compter()
+        taille = Path(stockage.chemin).stat().st_size
+        print(f"{total} scénarios, {args.foyers} foyers, {taille / 1e6:,.0f} Mo ({taille / total:,.0f} octets/scénario)")
+        print(f"  enregistrer_plusieurs (modèles)  : {len(types) * 10 / duree_modeles:>10,.0f} scénarios/s")
+        print(f"  remplissage (lignes préparées)   : {args.scenarios / duree_remplissage:>10,.0f} scénarios/s")
+
+        milieu = DEBUT_HISTORIQUE + 2.5 * 365 * 86400
+        page = stockage.lister(foyer="foyer-42")
+        ids = [ligne["id"] for ligne in stockage.lister(limite=2_000)][::100]
+        rng = np.random.default_rng(3)
+        ids_disperses = rng.integers(1, total + 1, 20).tolist()
+        mesures = {
+            "lister (50 plus récents)": lambda: stockage.lister(),
+            "lister par foyer": lambda: stockage.lister(foyer="foyer-42"),
+            "lister par foyer, page suivante": lambda: stockage.lister(foyer="foyer-42", avant=page[-1]["cree_le"],
+                                                                     avant_id=page[-1]["id"]),
+            "lister par verdict": lambda: stockage.lister(financable=False),
+            "lister par période (1 mois)": lambda: stockage.lister(depuis=milieu, avant=milieu + 30 * 86400),
+            "lister par verdict et période": lambda: stockage.lister(financable=True, depuis=milieu, avant=milieu + 30 * 86400),
+            "foyers distincts": lambda: stockage.foyers(),
+            "charger": lambda: stockage.charger(ids_disperses[0]),
+            "comparer 2": lambda: stockage.comparer(ids_disperses[:2]),
+            "comparer 10": lambda: stockage.comparer(ids_disperses[:10]),
+            "comparer 20": lambda: stockage.comparer(ids_disperses),
+            "comparer 20 (récents, sans projection)": lambda: stockage.comparer(ids[:20], projection=False),
+        }
+        print(f"  {'opération':<40} {'meilleur temps':>15}")
+        for nom, fonction in mesures.items():
+            duree = chronometrer(fonction)
+            etat = "ok" if duree < OBJECTIF_MS else f"> {OBJECTIF_MS} ms"
+            print(f"  {nom:<40} {duree:12.2f} ms  {etat}")
+
+        print("  plans de requête :")
+        for requete, parametres in (
+            ("SELECT id FROM scenarios WHERE foyer = ? AND (cree_le, id) < (?, ?) ORDER BY cree_le DESC, id DESC LIMIT 50",
+             ("foyer-42", milieu, 0)),
+            ("SELECT id FROM scenarios WHERE financable = ? ORDER BY cree_le DESC, id DESC LIMIT 50", (0,)),
+            ("SELECT id FROM scenarios WHERE cree_le >= ? AND cree_le < ? ORDER BY cree_le DESC, id DESC LIMIT 50", (milieu, milieu)),
+        ):
+            plan = stockage._connexion.execute(f"EXPLAIN QUERY PLAN {requete}", parametres).fetchall()
+            print(f"    {requete.split('WHERE ')[1].split(' ORDER')[0]:<30} -> {'; '.join(etape[-1] for etape in plan)}")
+        stockage._connexion.close()
+
+
+if __name__ == "__main__":
+    main()
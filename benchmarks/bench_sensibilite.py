@@ -0,0 +1,41 @@
+"""
+Benchmark : grille de sensibilité 50 taux x 26 durées x 40 apports (objectif bien inférieur à 50 ms).
+
+Usage : python benchmarks/bench_sensibilite.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dashboard_sensibilite import calculer_grille_sensibilite  # noqa: E402
+from data_models import PremierBien, SituationActuelle  # noqa: E402
+
+OBJECTIF_MS = 50
+
+
+def main():
+    situation = SituationActuelle(revenus_mensuels=5200, charges_mensuelles=1400, credits_mensuels=150, personnes_foyer=3)
+    premier_bien = PremierBien(prix_achat=180_000, mensualite_actuelle=720, loyer_percu=650)
+    taux = np.linspace(1.5, 6.0, 50)
+    durees = np.arange(5, 31)
+    apports = np.linspace(0, 80_000, 40)
+
+    durees_mesurees = []
+    for _ in range(20):
+        debut = time.perf_counter()
+        grille = calculer_grille_sensibilite(situation, premier_bien, 250_000, 900, taux, durees, apports)
+        durees_mesurees.append(time.perf_counter() - debut)
+
+    meilleure = min(durees_mesurees) * 1000
+    cellules = grille["mensualite"].size
+    print(f"Grille {len(taux)} x {len(durees)} x {len(apports)} = {cellules} cellules")
+    print(f"  meilleur temps : {meilleure:.2f} ms (objectif {OBJECTIF_MS} ms : {'OK' if meilleure < OBJECTIF_MS else 'DÉPASSÉ'})")
+    print(f"  médiane        : {np.median(durees_mesurees) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark : construction des modèles d'un lot de foyers, validation pydantic ligne par ligne
+contre validation en colonnes (`validation_lot`) suivie d'une construction sans validation.
+
+Usage : python benchmarks/bench_validation_lot.py --lignes 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_calcul_ratios_batch import generer_foyers  # noqa: E402
+from data_models import NouveauProjet, PremierBien, SituationActuelle  # noqa: E402
+from validation_lot import modeles_de_confiance, valider_colonnes  # noqa: E402
+
+
+def modeles_valides(df) -> list:
+    """Approche de référence : validation pydantic complète de chaque modèle."""
+    modeles = []
+    for ligne in df.itertuples(index=False):
+        situation = SituationActuelle(
+            revenus_mensuels=ligne.revenus_mensuels,
+            charges_mensuelles=ligne.charges_mensuelles,
+            credits_mensuels=ligne.credits_mensuels,
+        )
+        premier_bien = None
+        if ligne.mensualite_actuelle > 0:
+            premier_bien = PremierBien(
+                prix_achat=0,
+                mensualite_actuelle=ligne.mensualite_actuelle,
+                loyer_percu=ligne.loyer_percu,
+                date_achat=ligne.date_achat,
+                duree_pret_initiale=int(ligne.duree_pret_initiale),
+            )
+        projet = NouveauProjet(
+            prix_bien=ligne.prix_bien,
+            apport=ligne.apport,
+            taux_nominal=ligne.taux_nominal,
+            duree_annees=int(ligne.duree_annees),
+            loyer_attendu=ligne.loyer_attendu,
+        )
+        modeles.append((situation, premier_bien, projet))
+    return modeles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lignes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = generer_foyers(args.lignes)
+
+    debut = time.perf_counter()
+    reference = modeles_valides(df)
+    duree_reference = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    valider_colonnes(df)
+    duree_validation = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    confiance = modeles_de_confiance(df, valider=False)
+    duree_construction = time.perf_counter() - debut
+
+    # Mêmes modèles, champ pour champ
+    for attendus, obtenus in zip(reference, confiance):
+        for attendu, obtenu in zip(attendus, obtenus):
+            if (attendu is None) != (obtenu is None) or (attendu is not None and attendu.model_dump() != obtenu.model_dump()):
+                raise SystemExit(f"Modèles différents : {attendu} / {obtenu}")
+
+    duree_confiance = duree_validation + duree_construction
+    print(f"{args.lignes} foyers")
+    print(f"  validation pydantic ligne par ligne : {duree_reference:8.3f} s  ({args.lignes / duree_reference:>10,.0f} lignes/s)")
+    print(f"  validation en colonnes              : {duree_validation:8.3f} s")
+    print(f"  + construction sans validation      : {duree_construction:8.3f} s  ({args.lignes / duree_confiance:>10,.0f} lignes/s)")
+    print(f"  accélération                        : x{duree_reference / duree_confiance:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Test de charge de l'API HTTP (api_http.py) : débit et latences p50 / p99.
+
+Sans --url, un serveur est lancé dans un processus séparé sur un port libre.
+Chaque client est un processus qui garde une connexion persistante (keep-alive)
+et enchaîne les requêtes pendant la durée demandée.
+
+Usage : python benchmarks/charge_api.py --route ratios --clients 8 --duree 10
+        python benchmarks/charge_api.py --url http://127.0.0.1:8000 --route batch --taille-batch 500
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+RACINE = Path(__file__).resolve().parent.parent
+
+SITUATION = {"revenus_mensuels": 4200, "charges_mensuelles": 1100, "credits_mensuels": 150, "personnes_foyer": 2}
+PREMIER_BIEN = {"prix_achat": 180000, "mensualite_actuelle": 750, "loyer_percu": 650, "date_achat": "2019-06-01", "duree_pret_initiale": 20}
+PROJET = {"prix_bien": 210000, "apport": 25000, "taux_nominal": 3.6, "duree_annees": 20, "loyer_attendu": 900}
+
+
+def corps_requete(route: str, taille_batch: int) -> dict:
+    if route == "ratios":
+        return {"situation": SITUATION, "premier_bien": PREMIER_BIEN, "projet": PROJET}
+    if route == "projection":
+        return {"projet": PROJET, "annees": 10}
+    if route == "capacite":
+        return {"situation": SITUATION, "premier_bien": PREMIER_BIEN, "apport": 25000, "taux_nominal": 3.6, "duree_annees": 20}
+    if route == "pdf":
+        return {"situation": SITUATION, "premier_bien": PREMIER_BIEN, "projet": PROJET}
+    scenarios = [{"situation": {**SITUATION, "revenus_mensuels": 2500 + 10 * k}, "premier_bien": PREMIER_BIEN, "projet": PROJET}
+                 for k in range(taille_batch)]
+    return {"scenarios": scenarios, "annees": 10}
+
+
+def _client(url: str, chemin: str, corps: bytes, duree: float, file_resultats):
+    """Boucle d'un client : requêtes successives sur une seule connexion persistante."""
+    adresse = urlparse(url)
+    connexion = http.client.HTTPConnection(adresse.hostname, adresse.port, timeout=30)
+    entetes = {"Content-Type": "application/json", "Content-Length": str(len(corps))}
+    latences, erreurs = [], 0
+    fin = time.perf_counter() + duree
+    while time.perf_counter() < fin:
+        debut = time.perf_counter()
+        try:
+            connexion.request("POST", chemin, corps, entetes)
+            reponse = connexion.getresponse()
+            reponse.read()
+            if reponse.status != 200:
+                erreurs += 1
+        except (OSError, http.client.HTTPException):
+            erreurs += 1
+            connexion.close()
+            connexion = http.client.HTTPConnection(adresse.hostname, adresse.port, timeout=30)
+            continue
+        latences.append(time.perf_counter() - debut)
+    connexion.close()
+    file_resultats.put((latences, erreurs))
+
+
+def _port_libre() -> int:
+    with socket.socket() as sonde:
+        sonde.bind(("127.0.0.1", 0))
+        return sonde.getsockname()[1]
+
+
+def _attendre_serveur(url: str, delai: float = 15.0):
+    adresse = urlparse(url)
+    limite = time.time() + delai
+    while time.time() < limite:
+        try:
+            connexion = http.client.HTTPConnection(adresse.hostname, adresse.port, timeout=1)
+            connexion.request("GET", "/sante")
+            if connexion.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Le serveur {url} ne répond pas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API déjà démarrée (sinon un serveur local est lancé)")
+    parser.add_argument("--route", choices=["ratios", "projection", "capacite", "pdf", "batch"], default="ratios")
+    parser.add_argument("--clients", type=int, default=8, help="Clients simultanés (un processus chacun)")
+    parser.add_argument("--duree", type=float, default=10.0, help="Durée du test (s)")
+    parser.add_argument("--processus-serveur", type=int, default=1, help="Processus du serveur lancé localement")
+    parser.add_argument("--taille-batch", type=int, default=100, help="Scénarios par requête pour --route batch")
+    args = parser.parse_args()
+
+    serveur = None
+    url = args.url
+    if url is None:
+        port = _port_libre()
+        serveur = subprocess.Popen([sys.executable, str(RACINE / "api_http.py"), "--port", str(port),
+                                    "--processus", str(args.processus_serveur)],
+                                   cwd=RACINE, stdout=subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        _attendre_serveur(url)
+        corps = json.dumps(corps_requete(args.route, args.taille_batch)).encode()
+        file_resultats = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=_client, args=(url, f"/{args.route}", corps, args.duree, file_resultats))
+                   for _ in range(args.clients)]
+        debut = time.perf_counter()
+        for client in clients:
+            client.start()
+        resultats = [file_resultats.get() for _ in clients]
+        duree = time.perf_counter() - debut
+        for client in clients:
+            client.join()
+    finally:
+        if serveur is not None:
+            serveur.terminate()
+            serveur.wait()
+
+    latences = np.concatenate([np.asarray(l, dtype=np.float64) for l, _ in resultats]) * 1000
+    erreurs = sum(e for _, e in resultats)
+    if latences.size == 0:
+        print(f"Aucune requête aboutie ({erreurs} erreurs)")
+        return
+    scenarios = args.taille_batch if args.route == "batch" else 1
+    print(f"Route /{args.route}, {args.clients} clients, {duree:.1f} s")
+    print(f"  requêtes   : {latences.size:,} ({latences.size / duree:,.0f} req/s"
+          + (f", {latences.size * scenarios / duree:,.0f} scénarios/s" if scenarios > 1 else "") + f"), erreurs : {erreurs}")
+    print(f"  latence ms : p50 {np.percentile(latences, 50):.2f}, p90 {np.percentile(latences, 90):.2f}, "
+          f"p99 {np.percentile(latences, 99):.2f}, max {latences.max():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Jeux de données représentatifs partagés par les benchmarks.
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_calcul_ratios_batch import generer_foyers  # noqa: E402
+from data_models import NouveauProjet, PorteurProjet, PremierBien, SituationActuelle  # noqa: E402
+
+TEXTE_IA = (
+    "📊 **ÉVALUATION** : Projet finançable, taux d'endettement de 31% sous le seuil bancaire de 35%.\n\n"
+    "✅ **POINTS CLÉS** : Reste à vivre confortable ; le loyer couvre 85% de la mensualité. "
+    "🔺 Cash-flow négatif les premières années, à compenser par l'épargne.\n\n"
+    "💡 **CONSEIL PRIORITAIRE** : Négociez le taux sur 25 ans et conservez six mois de charges en réserve."
+)
+
+
+def foyer_simple():
+    """Un foyer de deux personnes, sans premier bien, avec un projet locatif sur 20 ans."""
+    situation = SituationActuelle(revenus_mensuels=4200, charges_mensuelles=1100, credits_mensuels=150, personnes_foyer=2)
+    projet = NouveauProjet(prix_bien=210_000, apport=25_000, taux_nominal=3.6, duree_annees=20, loyer_attendu=900)
+    return situation, None, projet
+
+
+def sci_multi_porteurs():
+    """SCI à quatre associés, avec un premier bien en cours de remboursement."""
+    porteurs = [
+        PorteurProjet(nom="Associé A", revenus_mensuels=5200, charges_mensuelles=1400, credits_mensuels=200, pourcentage_projet=40),
+        PorteurProjet(nom="Associé B", revenus_mensuels=3800, charges_mensuelles=900, credits_mensuels=0, pourcentage_projet=30),
+        PorteurProjet(nom="Associé C", revenus_mensuels=2900, charges_mensuelles=800, credits_mensuels=120, pourcentage_projet=20),
+        PorteurProjet(nom="Associé D", revenus_mensuels=2400, charges_mensuelles=700, credits_mensuels=0, pourcentage_projet=10),
+    ]
+    situation = SituationActuelle(revenus_mensuels=0, charges_mensuelles=0, credits_mensuels=0, personnes_foyer=4, porteurs=porteurs)
+    premier_bien = PremierBien(prix_achat=320_000, mensualite_actuelle=1350, loyer_percu=1250,
+                               date_achat=date(2019, 6, 1), duree_pret_initiale=20)
+    projet = NouveauProjet(prix_bien=450_000, apport=60_000, taux_nominal=3.4, duree_annees=25, loyer_attendu=2100)
+    return situation, premier_bien, projet
+
+
+def projet_30_ans():
+    """Foyer simple avec un prêt sur 30 ans, pour les projections longues."""
+    situation, premier_bien, projet = foyer_simple()
+    return situation, premier_bien, projet.model_copy(update={"duree_annees": 30})
+
+
+def lot_foyers(n: int = 100_000):
+    """Fichier de `n` foyers aléatoires (reproductible)."""
+    return generer_foyers(n)
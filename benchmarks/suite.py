@@ -0,0 +1,371 @@
+"""
+Suite de benchmarks : calculs unitaires, lots, projections, PDF et rendu complet de app.py.
+
+Chaque cas est mesuré plusieurs fois (médiane, min, max, dispersion). Les résultats
+s'enregistrent en JSON pour servir de référence ; le mode comparaison signale les
+cas dont la médiane a augmenté de plus du seuil (code de sortie 1).
+
+Usage :
+    python benchmarks/suite.py --sortie benchmarks/reference.json
+    python benchmarks/suite.py --comparer benchmarks/reference.json --seuil 0.10
+    python benchmarks/suite.py --filtre app_ --filtre pdf
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np  # noqa: E402
+
+import fixtures  # noqa: E402
+
+
+@dataclass
+class Cas:
+    nom: str
+    description: str
+    # Retourne la fonction à mesurer (la préparation n'est pas chronométrée)
+    preparer: Callable[[], Callable[[], object]]
+    repetitions: int = 7
+    # Préparation refaite avant chaque mesure, pour les cas qui consomment leur état (AppTest)
+    par_repetition: bool = False
+
+
+CAS: Dict[str, Cas] = {}
+
+
+def cas(nom: str, description: str, repetitions: int = 7, par_repetition: bool = False):
+    def enregistrer(preparer):
+        CAS[nom] = Cas(nom, description, preparer, repetitions, par_repetition)
+        return preparer
+    return enregistrer
+
+
+# --- Calculs unitaires ---
+
+@cas("mensualite_credit", "Mensualité d'un prêt (formule scalaire)")
+def _():
+    from calculs import mensualite_credit
+    return lambda: mensualite_credit(185_000, 3.6, 20)
+
+
+@cas("calcul_ratios_foyer_simple", "Ratios d'un foyer simple avec projet")
+def _():
+    from calculs import calcul_ratios
+    situation, premier_bien, projet = fixtures.foyer_simple()
+    return lambda: calcul_ratios(situation, premier_bien, projet)
+
+
+@cas("calcul_ratios_sci", "Ratios d'une SCI à 4 porteurs avec premier bien")
+def _():
+    from calculs import calcul_ratios
+    situation, premier_bien, projet = fixtures.sci_multi_porteurs()
+    return lambda: calcul_ratios(situation, premier_bien, projet)
+
+
+@cas("capacite_emprunt", "Capacité d'emprunt d'un foyer simple")
+def _():
+    from capacite_emprunt import capacite_emprunt
+    situation, premier_bien, projet = fixtures.foyer_simple()
+    return lambda: capacite_emprunt(situation, premier_bien, projet.apport, projet.taux_nominal, projet.duree_annees, projet.loyer_attendu)
+
+
+# --- Lots ---
+
+@cas("calcul_ratios_batch_100k", "calcul_ratios_batch sur 100 000 foyers", repetitions=5)
+def _():
+    from calculs_batch import calcul_ratios_batch
+    foyers = fixtures.lot_foyers(100_000)
+    return lambda: calcul_ratios_batch(foyers)
+
+
+@cas("projection_batch_100k", "Projection de rentabilité vectorisée, 100 000 projets sur 10 ans", repetitions=5)
+def _():
+    from projection_batch import projection_rentabilite_batch
+    foyers = fixtures.lot_foyers(100_000)
+    return lambda: projection_rentabilite_batch(foyers, 10)
+
+
+@cas("tri_van_100k_25ans", "TRI et VAN de 100 000 projets sur 25 ans, revente comprise (projection déjà calculée)", repetitions=5)
+def _():
+    from actualisation import tri_et_van
+    from projection_batch import projection_rentabilite_batch
+    foyers = fixtures.lot_foyers(100_000)
+    projection = projection_rentabilite_batch(foyers, 25, indicateurs=["cash_flow_net", "valorisation_bien", "capital_restant"])
+    apport = foyers["apport"].to_numpy()
+    return lambda: tri_et_van(projection, apport)
+
+
+# --- Projections ---
+
+@cas("projection_rentabilite_30ans", "calculer_projection_rentabilite sur 30 ans (prêt de 30 ans)")
+def _():
+    from calculs import calcul_ratios
+    from dashboard_rentabilite import calculer_projection_rentabilite
+    situation, premier_bien, projet = fixtures.projet_30_ans()
+    resultats = calcul_ratios(situation, premier_bien, projet)
+    return lambda: calculer_projection_rentabilite(situation, premier_bien, projet, resultats, annees=30)
+
+
+@cas("projection_mensuelle_40ans", "calculer_projection_rentabilite sur 40 ans, résolution mensuelle (480 périodes)")
+def _():
+    from calculs import calcul_ratios
+    from dashboard_rentabilite import calculer_projection_rentabilite
+    situation, premier_bien, projet = fixtures.projet_30_ans()
+    resultats = calcul_ratios(situation, premier_bien, projet)
+    return lambda: calculer_projection_rentabilite(situation, premier_bien, projet, resultats, annees=40, mensuelle=True)
+
+
+@cas("scenario_unitaire_30ans", "Un scénario : calcul_ratios puis calculer_projection_rentabilite sur 30 ans")
+def _():
+    from calculs import calcul_ratios
+    from dashboard_rentabilite import calculer_projection_rentabilite
+    situation, premier_bien, projet = fixtures.projet_30_ans()
+
+    def executer():
+        resultats = calcul_ratios(situation, premier_bien, projet)
+        calculer_projection_rentabilite(situation, premier_bien, projet, resultats, annees=30)
+    return executer
+
+
+@cas("comparaison_20_variantes_30ans", "Ratios et projections sur 30 ans de 20 variantes en une passe (comparer_variantes)")
+def _():
+    import numpy as np
+    from dashboard_comparaison import comparer_variantes
+    situation, premier_bien, projet = fixtures.projet_30_ans()
+    variantes = {
+        "prix_bien": np.full(20, projet.prix_bien),
+        "apport": np.linspace(0, 60_000, 20),
+        "taux_nominal": np.linspace(2.5, 4.5, 20),
+        "duree_annees": np.tile([15.0, 20.0, 25.0, 30.0], 5),
+        "loyer_attendu": np.full(20, projet.loyer_attendu),
+    }
+    return lambda: comparer_variantes(situation, premier_bien, variantes, annees=30)
+
+
+@cas("portefeuille_1000_biens_30ans", "Projection mensuelle d'un portefeuille de 1 000 biens sur 30 ans", repetitions=5)
+def _():
+    from bench_portefeuille import generer_portefeuille
+    from data_models import Portefeuille
+    from portefeuille import projeter_portefeuille
+    portefeuille = Portefeuille.model_validate(generer_portefeuille(1000))
+    return lambda: projeter_portefeuille(portefeuille, 360)
+
+
+@cas("monte_carlo_10k_30ans", "Projection Monte Carlo, 10 000 chemins sur 30 ans", repetitions=5)
+def _():
+    from projection_stochastique import simuler_projection_stochastique
+    _, _, projet = fixtures.projet_30_ans()
+    return lambda: simuler_projection_stochastique(projet, annees=30, n_chemins=10_000, graine=0)
+
+
+# --- PDF ---
+
+@cas("pdf_avec_ia", "Rapport PDF complet d'une SCI avec texte d'analyse IA", repetitions=5)
+def _():
+    from calculs import calcul_ratios
+    from export_pdf import generer_pdf_simulation
+    situation, premier_bien, projet = fixtures.sci_multi_porteurs()
+    resultats = calcul_ratios(situation, premier_bien, projet)
+    return lambda: generer_pdf_simulation(resultats, situation, premier_bien, projet, fixtures.TEXTE_IA)
+
+
+# --- Interface (app.py rejouée sans navigateur par le harnais de test Streamlit) ---
+
+def _app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(str(RACINE / "app.py"), default_timeout=120)
+
+
+def _saisir_projet(app):
+    saisies = {"Prix du bien": 210_000.0, "Apport personnel": 25_000.0, "Taux nominal": 3.6, "Loyer attendu": 900.0}
+    for champ in app.number_input:
+        for debut, valeur in saisies.items():
+            if champ.label.startswith(debut):
+                champ.set_value(valeur)
+
+
+def _verifier(app):
+    if app.exception:
+        raise RuntimeError(f"app.py a levé une exception : {app.exception[0].value}")
+
+
+@cas("app_premier_rendu", "Premier rendu de app.py (nouvelle session)", repetitions=5, par_repetition=True)
+def _():
+    app = _app()
+
+    def executer():
+        app.run()
+        _verifier(app)
+    return executer
+
+
+@cas("app_calcul", "Clic sur « Calculer », caches vidés : résultats, dashboards et sensibilité", repetitions=5, par_repetition=True)
+def _():
+    import streamlit as st
+    from cache_calculs import _CACHES
+    st.cache_data.clear()
+    for cache in _CACHES.values():
+        cache.vider()
+    app = _app()
+    app.run()
+    _saisir_projet(app)
+    app.run()
+    bouton = next(b for b in app.button if b.label == "Calculer")
+
+    def executer():
+        bouton.click().run()
+        _verifier(app)
+    return executer
+
+
+@cas("app_rerun", "Réexécution de app.py avec résultats affichés (interaction quelconque)", repetitions=7, par_repetition=True)
+def _():
+    app = _app()
+    app.run()
+    _saisir_projet(app)
+    app.run()
+    next(b for b in app.button if b.label == "Calculer").click().run()
+    _verifier(app)
+
+    def executer():
+        app.run()
+        _verifier(app)
+    return executer
+
+
+# --- Mesure ---
+
+def mesurer(cas_: Cas, temps_cible: float = 0.2, facteur_repetitions: float = 1.0) -> dict:
+    """Durée par appel sur `repetitions` mesures ; les fonctions rapides sont bouclées jusqu'à ~`temps_cible` s."""
+    repetitions = max(3, round(cas_.repetitions * facteur_repetitions))
+    durees = []
+    boucles = 1
+    if cas_.par_repetition:
+        cas_.preparer()()  # échauffement : imports des modules de app.py, compilation du script
+        for _ in range(repetitions):
+            fonction = cas_.preparer()
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+    else:
+        fonction = cas_.preparer()
+        fonction()  # échauffement (imports, caches internes)
+        chrono = timeit.Timer(fonction)
+        boucles, duree = chrono.autorange()  # 1, 2, 5, 10... appels jusqu'à 0,2 s
+        boucles = max(1, round(boucles * temps_cible / duree))
+        durees = [d / boucles for d in chrono.repeat(repeat=repetitions, number=boucles)]
+    q1, q3 = np.percentile(durees, [25, 75])
+    mediane = statistics.median(durees)
+    return {
+        "description": cas_.description,
+        "mediane_s": mediane,
+        "min_s": min(durees),
+        "max_s": max(durees),
+        "dispersion": float((q3 - q1) / mediane) if mediane > 0 else 0.0,
+        "repetitions": repetitions,
+        "boucles": boucles,
+    }
+
+
+def _format_duree(secondes: float) -> str:
+    if secondes < 1e-3:
+        return f"{secondes * 1e6:8.1f} µs"
+    if secondes < 1:
+        return f"{secondes * 1e3:8.2f} ms"
+    return f"{secondes:8.2f} s "
+
+
+def executer_suite(filtres: Optional[List[str]] = None, facteur_repetitions: float = 1.0) -> dict:
+    # Avertissements du mode sans serveur (« missing ScriptRunContext », dépréciations) : AppTest
+    # réinitialise le niveau des journaux Streamlit à chaque exécution, on les coupe donc globalement
+    logging.disable(logging.WARNING)
+    selection = [c for nom, c in CAS.items() if not filtres or any(f in nom for f in filtres)]
+    resultats = {}
+    for cas_ in selection:
+        resultats[cas_.nom] = mesurer(cas_, facteur_repetitions=facteur_repetitions)
+        r = resultats[cas_.nom]
+        print(f"  {cas_.nom:32s} {_format_duree(r['mediane_s'])}  (min {_format_duree(r['min_s']).strip()}, "
+              f"±{r['dispersion']:.0%})", flush=True)
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "systeme": platform.platform(),
+        },
+        "resultats": resultats,
+    }
+
+
+def comparer(reference: dict, actuel: dict, seuil: float) -> List[str]:
+    """
+    Affiche l'écart de médiane cas par cas ; retourne les cas en régression, c'est-à-dire
+    dont la médiane et le meilleur temps ont tous deux augmenté de plus du seuil.
+    """
+    regressions = []
+    print(f"\nComparaison avec la référence du {reference['meta'].get('date', '?')} (seuil {seuil:.0%}) :")
+    for nom, mesure in actuel["resultats"].items():
+        ancienne = reference["resultats"].get(nom)
+        if ancienne is None:
+            print(f"  {nom:32s} nouveau cas")
+            continue
+        rapport = mesure["mediane_s"] / ancienne["mediane_s"]
+        if rapport > 1 + seuil and mesure["min_s"] / ancienne["min_s"] > 1 + seuil:
+            statut = "RÉGRESSION"
+            regressions.append(nom)
+        elif rapport > 1 + seuil:
+            # Médiane en hausse mais meilleur temps inchangé : probablement du bruit de mesure
+            statut = "bruit ?"
+        elif rapport < 1 / (1 + seuil):
+            statut = "amélioration"
+        else:
+            statut = "stable"
+        print(f"  {nom:32s} {_format_duree(ancienne['mediane_s'])} -> {_format_duree(mesure['mediane_s'])}  "
+              f"x{rapport:5.2f}  {statut}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sortie", help="Enregistre les résultats en JSON (nouvelle référence)")
+    parser.add_argument("--comparer", metavar="REFERENCE", help="Compare à un fichier de résultats enregistré")
+    parser.add_argument("--seuil", type=float, default=0.10, help="Hausse de médiane tolérée avant de signaler une régression")
+    parser.add_argument("--filtre", action="append", help="Ne lance que les cas dont le nom contient ce texte (répétable)")
+    parser.add_argument("--rapide", action="store_true", help="Moitié moins de répétitions")
+    parser.add_argument("--lister", action="store_true", help="Liste les cas disponibles")
+    args = parser.parse_args()
+
+    if args.lister:
+        for nom, c in CAS.items():
+            print(f"{nom:32s} {c.description}")
+        return
+
+    print("Benchmarks :")
+    actuel = executer_suite(args.filtre, 0.5 if args.rapide else 1.0)
+    if args.sortie:
+        Path(args.sortie).write_text(json.dumps(actuel, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nRésultats enregistrés dans {args.sortie}")
+    if args.comparer:
+        reference = json.loads(Path(args.comparer).read_text(encoding="utf-8"))
+        regressions = comparer(reference, actuel, args.seuil)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
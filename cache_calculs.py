@@ -0,0 +1,126 @@
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Optional, Sequence
+from pydantic import BaseModel
+from calculs import calcul_ratios
+
+# Tous les caches créés par `memoiser`, pour les statistiques globales
+_CACHES = {}
+
+
+class CacheLRU:
+    """
+    Cache LRU borné et thread-safe, partagé par toutes les sessions du processus.
+
+    Compte les succès (hits) et les échecs (misses) ; utilisable aussi hors Streamlit.
+    """
+
+    def __init__(self, taille_max: int = 1024):
+        self.taille_max = taille_max
+        self._valeurs = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+
+    def obtenir(self, cle: str, defaut=None):
+        with self._verrou:
+            if cle in self._valeurs:
+                self._valeurs.move_to_end(cle)
+                self.succes += 1
+                return self._valeurs[cle]
+            self.echecs += 1
+            return defaut
+
+    def enregistrer(self, cle: str, valeur):
+        with self._verrou:
+            self._valeurs[cle] = valeur
+            self._valeurs.move_to_end(cle)
+            while len(self._valeurs) > self.taille_max:
+                self._valeurs.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._valeurs.clear()
+            self.succes = 0
+            self.echecs = 0
+
+    def statistiques(self) -> dict:
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "taux_succes": self.succes / total if total else 0.0,
+                "taille": len(self._valeurs),
+                "taille_max": self.taille_max,
+            }
+
+
+def _normaliser(valeur):
+    """Représentation JSON stable des arguments (modèles pydantic, dictionnaires, dates...)."""
+    if isinstance(valeur, BaseModel):
+        # Sérialisation native pydantic : bien plus rapide qu'un model_dump suivi de json.dumps
+        return f"{type(valeur).__name__}:{valeur.model_dump_json()}"
+    if isinstance(valeur, dict):
+        return {str(k): _normaliser(v) for k, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_normaliser(v) for v in valeur]
+    if isinstance(valeur, (str, int, float, bool)) or valeur is None:
+        return valeur
+    return repr(valeur)
+
+
+def cle_entrees(*args, **kwargs) -> str:
+    """Empreinte SHA-256 des entrées : deux appels aux entrées identiques partagent la même clé."""
+    contenu = json.dumps({"args": _normaliser(args), "kwargs": _normaliser(kwargs)}, sort_keys=True, default=str)
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+def memoiser(taille_max: int = 1024, contexte: Optional[Callable[[], object]] = None, ignorer: Sequence[str] = ()):
+    """
+    Décorateur de mise en cache LRU par empreinte des entrées.
+
+    `contexte` fournit une valeur ajoutée à la clé (ex. la date du jour pour les
+    calculs qui en dépendent). `ignorer` liste les arguments exclus de la clé
+    parce qu'ils se déduisent entièrement des autres. Les résultats sont copiés en
+    sortie de cache pour qu'un appelant ne puisse pas modifier la valeur partagée.
+    """
+    def decorateur(fonction):
+        cache = CacheLRU(taille_max)
+        _CACHES[f"{fonction.__module__}.{fonction.__qualname__}"] = cache
+        signature = inspect.signature(fonction)
+        manquant = object()
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            extra = contexte() if contexte else None
+            if ignorer:
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                cle = cle_entrees(extra, **{nom: valeur for nom, valeur in arguments.arguments.items() if nom not in ignorer})
+            else:
+                cle = cle_entrees(extra, *args, **kwargs)
+            resultat = cache.obtenir(cle, manquant)
+            if resultat is manquant:
+                resultat = fonction(*args, **kwargs)
+                cache.enregistrer(cle, resultat)
+            return copy.deepcopy(resultat)
+
+        enveloppe.cache = cache
+        return enveloppe
+    return decorateur
+
+
+def statistiques_caches() -> dict:
+    """Statistiques de tous les caches du processus, par fonction."""
+    return {nom: cache.statistiques() for nom, cache in _CACHES.items()}
+
+
+# L'ancienneté du prêt dépend de la date du jour : elle fait partie de la clé
+calcul_ratios_en_cache = memoiser(taille_max=4096, contexte=date.today)(calcul_ratios)
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from resultats import ResultatRatios
+
+# Configuration par variables d'environnement (valeurs par défaut raisonnables)
+CHEMIN_PAR_DEFAUT = os.getenv("IA_CACHE_CHEMIN", ".cache/analyses_ia.sqlite")
+TTL_PAR_DEFAUT = float(os.getenv("IA_CACHE_TTL", 7 * 24 * 3600))  # 7 jours
+TAILLE_MAX_PAR_DEFAUT = int(os.getenv("IA_CACHE_TAILLE_MAX", 50 * 1024 * 1024))  # 50 Mo
+
+
+def cle_requete(modele: str, messages: list, parametres: dict) -> str:
+    """Empreinte SHA-256 du prompt, du modèle et des paramètres d'appel."""
+    contenu = json.dumps({"modele": modele, "messages": messages, "parametres": parametres}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+def _arrondir_relatif(valeur: float, pas_relatif: float = 0.05) -> float:
+    """Arrondit sur une échelle logarithmique : deux valeurs à moins de ~5% tombent dans la même classe."""
+    if valeur <= 0:
+        return 0.0
+    classe = round(math.log(valeur) / math.log1p(pas_relatif))
+    return round(math.exp(classe * math.log1p(pas_relatif)), 2)
+
+
+def cle_quasi_doublon(modele: str, parametres: dict, resultats: "ResultatRatios", situation, premier_bien=None, projet=None) -> str:
+    """
+    Empreinte des entrées arrondies par classes : des scénarios qui ne diffèrent
+    que marginalement (quelques euros, un dixième de point de taux) partagent la même analyse.
+    Comme tout découpage en classes, deux valeurs proches d'une frontière peuvent
+    tomber de part et d'autre.
+    """
+    entrees = {
+        "revenus_salaires": _arrondir_relatif(resultats.revenus_salaires),
+        "revenus_locatifs": _arrondir_relatif(resultats.revenus_locatifs),
+        "mensualites_autres_credits": _arrondir_relatif(resultats.mensualites_autres_credits),
+        "taux_endettement": round(resultats.taux_endettement * 100),
+        "taux_effort": round(resultats.taux_effort * 100),
+        "reste_a_vivre": round(resultats.reste_a_vivre, -2),
+        "personnes_foyer": situation.personnes_foyer,
+        "porteurs": len(resultats.details_porteurs),
+        "premier_bien": bool(premier_bien),
+    }
+    if projet:
+        entrees.update({
+            "prix_bien": _arrondir_relatif(projet.prix_bien),
+            "apport": _arrondir_relatif(projet.apport, 0.10),
+            "taux_nominal": round(projet.taux_nominal, 1),
+            "duree_annees": projet.duree_annees,
+            "loyer_attendu": _arrondir_relatif(projet.loyer_attendu),
+        })
+    return cle_requete(modele, [{"quasi_doublon": entrees}], parametres)
+
+
+class CacheAnalysesIA:
+    """
+    Cache disque (SQLite) des réponses de l'IA, adressé par contenu.
+
+    Chaque entrée expire après `ttl_secondes` ; au-delà de `taille_max_octets`,
+    les entrées les moins récemment lues sont supprimées en premier.
+    """
+
+    def __init__(self, chemin: str = CHEMIN_PAR_DEFAUT, ttl_secondes: float = TTL_PAR_DEFAUT,
+                 taille_max_octets: int = TAILLE_MAX_PAR_DEFAUT):
+        self.chemin = chemin
+        self.ttl_secondes = ttl_secondes
+        self.taille_max_octets = taille_max_octets
+        self._verrou = threading.Lock()
+        if chemin != ":memory:":
+            Path(chemin).parent.mkdir(parents=True, exist_ok=True)
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False, isolation_level=None)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                cle TEXT PRIMARY KEY,
+                reponse TEXT NOT NULL,
+                taille INTEGER NOT NULL,
+                cree_le REAL NOT NULL,
+                dernier_acces REAL NOT NULL
+            )
+        """)
+        self._connexion.execute("CREATE INDEX IF NOT EXISTS idx_analyses_acces ON analyses (dernier_acces)")
+
+    def obtenir(self, cle: str) -> Optional[str]:
+        """Réponse en cache non expirée, ou None."""
+        maintenant = time.time()
+        with self._verrou:
+            ligne = self._connexion.execute(
+                "SELECT reponse FROM analyses WHERE cle = ? AND cree_le >= ?",
+                (cle, maintenant - self.ttl_secondes),
+            ).fetchone()
+            if ligne is None:
+                return None
+            self._connexion.execute("UPDATE analyses SET dernier_acces = ? WHERE cle = ?", (maintenant, cle))
+            return ligne[0]
+
+    def enregistrer(self, cle: str, reponse: str):
+        """Enregistre une réponse puis applique l'expiration et la limite de taille."""
+        maintenant = time.time()
+        taille = len(reponse.encode())
+        with self._verrou:
+            self._connexion.execute("BEGIN")
+            try:
+                self._connexion.execute(
+                    "INSERT OR REPLACE INTO analyses (cle, reponse, taille, cree_le, dernier_acces) VALUES (?, ?, ?, ?, ?)",
+                    (cle, reponse, taille, maintenant, maintenant),
+                )
+                self._connexion.execute("DELETE FROM analyses WHERE cree_le < ?", (maintenant - self.ttl_secondes,))
+                total = self._connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM analyses").fetchone()[0]
+                if total > self.taille_max_octets:
+                    # Éviction LRU : on parcourt les entrées de la plus ancienne lecture à la plus récente
+                    a_supprimer = []
+                    for ancienne_cle, ancienne_taille in self._connexion.execute(
+                        "SELECT cle, taille FROM analyses ORDER BY dernier_acces"
+                    ):
+                        if total <= self.taille_max_octets:
+                            break
+                        a_supprimer.append((ancienne_cle,))
+                        total -= ancienne_taille
+                    self._connexion.executemany("DELETE FROM analyses WHERE cle = ?", a_supprimer)
+            except BaseException:
+                self._connexion.execute("ROLLBACK")
+                raise
+            self._connexion.execute("COMMIT")
+
+    def statistiques(self) -> dict:
+        with self._verrou:
+            nombre, taille = self._connexion.execute("SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM analyses").fetchone()
+        return {"entrees": nombre, "taille_octets": taille, "taille_max_octets": self.taille_max_octets}
+
+    def vider(self):
+        with self._verrou:
+            self._connexion.execute("DELETE FROM analyses")
+
+
+_cache_par_defaut = None
+_verrou_defaut = threading.Lock()
+
+
+def cache_par_defaut() -> CacheAnalysesIA:
+    """Instance partagée par le processus (créée au premier usage)."""
+    global _cache_par_defaut
+    with _verrou_defaut:
+        if _cache_par_defaut is None:
+            _cache_par_defaut = CacheAnalysesIA()
+        return _cache_par_defaut
@@ -1,8 +1,19 @@
 import math
 from data_models import SituationActuelle, NouveauProjet, PremierBien
+from resultats import DetailPorteur, ResultatRatios
 from typing import Optional
 from datetime import date
 
+# Seuils bancaires
+SEUIL_ENDETTEMENT = 0.35            # taux d'endettement maximum
+RESTE_A_VIVRE_PAR_PERSONNE = 800    # reste à vivre minimum par personne du foyer (€)
+
+# Hypothèses de projection de rentabilité (valeurs annuelles, sauf mention)
+INFLATION_LOYERS = 0.02       # 2% par an
+VALORISATION_BIEN = 0.02      # 2% par an
+CHARGES_PROPRIETAIRE = 0.003  # 0,3% du prix par mois
+INFLATION_CHARGES = 0.025     # 2,5% par an
+
 def mensualite_credit(capital, taux_annuel, duree_annees):
     """Calcule la mensualité d'un prêt amortissable (hors assurance)."""
     if capital <= 0:
@@ -13,7 +24,22 @@ def mensualite_credit(capital, taux_annuel, duree_annees):
         return capital / n
     return capital * i / (1 - (1 + i) ** -n)
 
-def calcul_ratios(situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None):
+def totaux_situation(situation: SituationActuelle):
+    """Revenus salaires, charges fixes et autres crédits du foyer (somme des porteurs le cas échéant)."""
+    if situation.porteurs:
+        return (
+            sum(p.revenus_mensuels for p in situation.porteurs),
+            sum(p.charges_mensuelles for p in situation.porteurs),
+            sum(p.credits_mensuels for p in situation.porteurs),
+        )
+    return situation.revenus_mensuels, situation.charges_mensuelles, situation.credits_mensuels
+
+def est_financable(resultats, personnes_foyer=1):
+    """Verdict bancaire : endettement ≤ SEUIL_ENDETTEMENT et reste à vivre suffisant (scalaire ou colonnes)."""
+    reste_min = RESTE_A_VIVRE_PAR_PERSONNE * personnes_foyer
+    return (resultats['taux_endettement'] <= SEUIL_ENDETTEMENT) & (resultats['reste_a_vivre'] >= reste_min)
+
+def calcul_ratios(situation: SituationActuelle, premier_bien: Optional[PremierBien] = None, projet: Optional[NouveauProjet] = None) -> ResultatRatios:
     """Calcule taux d'endettement, taux d'effort et reste à vivre."""
     # Revenus de base
     if situation.porteurs:
@@ -81,33 +107,33 @@ def calcul_ratios(situation: SituationActuelle, premier_bien: Optional[PremierBi
             taux_effort_porteur = mensualites_porteur / porteur.revenus_mensuels if porteur.revenus_mensuels > 0 else 0
             reste_a_vivre_porteur = revenus_porteur - mensualites_porteur - porteur.charges_mensuelles
             
-            details_porteurs.append({
-                "nom": porteur.nom,
-                "pourcentage": porteur.pourcentage_projet,
-                "revenus_salaires": porteur.revenus_mensuels,
-                "revenus_locatifs": part_loyers,
-                "revenus_totaux": revenus_porteur,
-                "mensualites_totales": mensualites_porteur,
-                "taux_endettement": taux_endettement_porteur,
-                "taux_effort": taux_effort_porteur,
-                "reste_a_vivre": reste_a_vivre_porteur,
-            })
+            details_porteurs.append(DetailPorteur(
+                nom=porteur.nom,
+                pourcentage=porteur.pourcentage_projet,
+                revenus_salaires=porteur.revenus_mensuels,
+                revenus_locatifs=part_loyers,
+                revenus_totaux=revenus_porteur,
+                mensualites_totales=mensualites_porteur,
+                taux_endettement=taux_endettement_porteur,
+                taux_effort=taux_effort_porteur,
+                reste_a_vivre=reste_a_vivre_porteur,
+            ))
 
-    return {
-        "revenus_salaires": revenus_salaires,
-        "revenus_locatifs": loyer_premier_bien + loyer_nouveau,
-        "revenus_totaux": revenus_totaux,
-        "mensualite_premier_bien": mensualite_premier_bien,
-        "mensualite_nouveau": mensualite_nouveau,
-        "mensualites_immobilier": mensualites_immobilier,
-        "mensualites_autres_credits": mensualites_autres_credits,
-        "mensualites_totales": mensualites_totales,
-        "taux_endettement": taux_endettement,
-        "taux_effort": taux_effort,
-        "reste_a_vivre": reste_a_vivre,
-        "details_porteurs": details_porteurs,
-        "anciennete_pret_mois": anciennete_pret_mois,
-        "duree_restante_mois": duree_restante_mois,
-        "anciennete_pret_annees": anciennete_pret_mois / 12 if anciennete_pret_mois > 0 else 0,
-        "duree_restante_annees": duree_restante_mois / 12 if duree_restante_mois > 0 else 0,
-    }
\ No newline at end of file
+    return ResultatRatios(
+        revenus_salaires=revenus_salaires,
+        revenus_locatifs=loyer_premier_bien + loyer_nouveau,
+        revenus_totaux=revenus_totaux,
+        mensualite_premier_bien=mensualite_premier_bien,
+        mensualite_nouveau=mensualite_nouveau,
+        mensualites_immobilier=mensualites_immobilier,
+        mensualites_autres_credits=mensualites_autres_credits,
+        mensualites_totales=mensualites_totales,
+        taux_endettement=taux_endettement,
+        taux_effort=taux_effort,
+        reste_a_vivre=reste_a_vivre,
+        details_porteurs=tuple(details_porteurs),
+        anciennete_pret_mois=anciennete_pret_mois,
+        duree_restante_mois=duree_restante_mois,
+        anciennete_pret_annees=anciennete_pret_mois / 12 if anciennete_pret_mois > 0 else 0,
+        duree_restante_annees=duree_restante_mois / 12 if duree_restante_mois > 0 else 0,
+    )
\ No newline at end of file
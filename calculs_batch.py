@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Mapping, Optional, Union
+from resultats import TableauRatios
+
+# Colonnes attendues pour un foyer (une ligne par foyer).
+# Les colonnes absentes valent 0 (ou "non renseigné" pour la date d'achat).
+COLONNES_FOYER = [
+    "revenus_mensuels",
+    "charges_mensuelles",
+    "credits_mensuels",
+    "mensualite_actuelle",
+    "loyer_percu",
+    "date_achat",
+    "duree_pret_initiale",
+    "prix_bien",
+    "apport",
+    "taux_nominal",
+    "duree_annees",
+    "loyer_attendu",
+]
+
+DonneesColonnes = Union[pd.DataFrame, Mapping[str, object]]
+
+
+def _nombre_lignes(donnees: DonneesColonnes) -> int:
+    if isinstance(donnees, pd.DataFrame):
+        return len(donnees)
+    for valeur in donnees.values():
+        if np.ndim(valeur) > 0:
+            return len(valeur)
+    return 1
+
+
+def _colonne(donnees: DonneesColonnes, nom: str, n: int) -> np.ndarray:
+    """Extrait une colonne numérique (float64), NaN et colonnes absentes valant 0."""
+    if nom not in donnees:
+        return np.zeros(n)
+    valeurs = np.asarray(donnees[nom], dtype=np.float64)
+    valeurs = np.broadcast_to(valeurs, (n,))
+    return np.nan_to_num(valeurs, nan=0.0)
+
+
+def mensualite_credit_vec(capital, taux_annuel, duree_annees) -> np.ndarray:
+    """Version vectorisée de `calculs.mensualite_credit` (hors assurance)."""
+    capital = np.asarray(capital, dtype=np.float64)
+    n = np.asarray(duree_annees, dtype=np.float64) * 12
+    i = np.asarray(taux_annuel, dtype=np.float64) / 100 / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mensualite = np.where(i == 0, capital / n, capital * i / (1 - (1 + i) ** -n))
+    return np.where(capital > 0, mensualite, 0.0)
+
+
+def _anciennete_pret_mois(donnees: DonneesColonnes, duree_initiale: np.ndarray, n: int, aujourd_hui: date):
+    """Ancienneté du prêt en mois (jours // 30) et masque des prêts dont la date et la durée sont renseignées."""
+    if "date_achat" not in donnees:
+        return np.zeros(n), np.zeros(n, dtype=bool)
+    dates = pd.to_datetime(pd.Series(np.broadcast_to(np.asarray(donnees["date_achat"], dtype=object), (n,))), errors="coerce")
+    jours = (pd.Timestamp(aujourd_hui) - dates).dt.days.to_numpy(dtype=np.float64, na_value=np.nan)
+    renseigne = ~np.isnan(jours) & (duree_initiale > 0)
+    return np.where(renseigne, np.floor_divide(np.nan_to_num(jours), 30), 0.0), renseigne
+
+
+def calcul_ratios_batch(donnees: DonneesColonnes, aujourd_hui: Optional[date] = None) -> TableauRatios:
+    """
+    Calcule les ratios de `calculs.calcul_ratios` pour N foyers en une passe vectorisée.
+
+    `donnees` est un DataFrame ou un dictionnaire de colonnes (voir COLONNES_FOYER),
+    une ligne par foyer. Les foyers à plusieurs porteurs doivent être agrégés au
+    préalable (sommes des revenus, charges et crédits). Un nouveau projet n'est pris
+    en compte que si prix_bien > 0 et duree_annees > 0, comme dans app.py.
+    Retourne un `TableauRatios` : une colonne NumPy par champ de la version unitaire
+    (hors détails par porteur), toutes rangées dans un même bloc contigu.
+    """
+    n = _nombre_lignes(donnees)
+    aujourd_hui = aujourd_hui or date.today()
+
+    revenus_salaires = _colonne(donnees, "revenus_mensuels", n)
+    charges_fixes = _colonne(donnees, "charges_mensuelles", n)
+    mensualites_autres_credits = _colonne(donnees, "credits_mensuels", n)
+
+    # Premier bien existant
+    mensualite_premier_bien = _colonne(donnees, "mensualite_actuelle", n)
+    loyer_premier_bien = _colonne(donnees, "loyer_percu", n)
+    duree_initiale = _colonne(donnees, "duree_pret_initiale", n)
+    anciennete_pret_mois, pret_renseigne = _anciennete_pret_mois(donnees, duree_initiale, n, aujourd_hui)
+    duree_restante_mois = np.where(pret_renseigne, np.maximum(0, duree_initiale * 12 - anciennete_pret_mois), 0.0)
+
+    # Nouveau projet
+    prix_bien = _colonne(donnees, "prix_bien", n)
+    duree_annees = _colonne(donnees, "duree_annees", n)
+    projet_present = (prix_bien > 0) & (duree_annees > 0)
+    capital = prix_bien - _colonne(donnees, "apport", n)
+    mensualite_nouveau = np.where(
+        projet_present,
+        mensualite_credit_vec(capital, _colonne(donnees, "taux_nominal", n), np.where(projet_present, duree_annees, 1)),
+        0.0,
+    )
+    loyer_nouveau = np.where(projet_present, _colonne(donnees, "loyer_attendu", n), 0.0)
+
+    # Totaux
+    revenus_locatifs = loyer_premier_bien + loyer_nouveau
+    revenus_totaux = revenus_salaires + revenus_locatifs
+    mensualites_immobilier = mensualite_premier_bien + mensualite_nouveau
+    mensualites_totales = mensualites_immobilier + mensualites_autres_credits
+
+    resultats = TableauRatios.vide(n)
+    resultats["revenus_salaires"] = revenus_salaires
+    resultats["revenus_locatifs"] = revenus_locatifs
+    resultats["revenus_totaux"] = revenus_totaux
+    resultats["mensualite_premier_bien"] = mensualite_premier_bien
+    resultats["mensualite_nouveau"] = mensualite_nouveau
+    resultats["mensualites_immobilier"] = mensualites_immobilier
+    resultats["mensualites_autres_credits"] = mensualites_autres_credits
+    resultats["mensualites_totales"] = mensualites_totales
+
+    # Calculs des taux, écrits directement dans le bloc
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(mensualites_totales, revenus_totaux, out=resultats["taux_endettement"])
+        np.divide(mensualites_totales, revenus_salaires, out=resultats["taux_effort"])
+    resultats["taux_endettement"][revenus_totaux <= 0] = 0.0
+    resultats["taux_effort"][revenus_salaires <= 0] = 0.0
+    np.subtract(revenus_totaux - mensualites_totales, charges_fixes, out=resultats["reste_a_vivre"])
+
+    resultats["anciennete_pret_mois"] = anciennete_pret_mois
+    resultats["duree_restante_mois"] = duree_restante_mois
+    np.divide(np.maximum(anciennete_pret_mois, 0), 12, out=resultats["anciennete_pret_annees"])
+    np.divide(duree_restante_mois, 12, out=resultats["duree_restante_annees"])
+    return resultats
@@ -0,0 +1,135 @@
+from typing import TYPE_CHECKING, Optional, Sequence
+from data_models import SituationActuelle, PremierBien
+from calculs import SEUIL_ENDETTEMENT, RESTE_A_VIVRE_PAR_PERSONNE, totaux_situation
+
+# NumPy n'est importé que par les versions vectorisées, pandas (et calculs_batch qui en dépend)
+# que par la grille en DataFrame et la version par lots : le calcul unitaire affiché au premier
+# rendu de app.py n'a besoin ni de l'un ni de l'autre
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from calculs_batch import DonneesColonnes
+
+
+def capital_empruntable(mensualite, taux_annuel, duree_annees) -> "np.ndarray":
+    """Inverse de `mensualite_credit` : capital finançable pour une mensualité donnée (vectorisé)."""
+    import numpy as np
+    mensualite = np.asarray(mensualite, dtype=np.float64)
+    n = np.asarray(duree_annees, dtype=np.float64) * 12
+    i = np.asarray(taux_annuel, dtype=np.float64) / 100 / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        capital = np.where(i == 0, mensualite * n, mensualite * (1 - (1 + i) ** -n) / i)
+    return np.where((mensualite > 0) & (n > 0), capital, 0.0)
+
+
+def _mensualites_max(revenus_salaires, charges_fixes, autres_credits, mensualite_premier, loyers, personnes):
+    """Mensualités maximales compatibles avec le taux d'endettement et le reste à vivre."""
+    revenus_totaux = revenus_salaires + loyers
+    par_endettement = SEUIL_ENDETTEMENT * revenus_totaux - autres_credits - mensualite_premier
+    par_reste_a_vivre = (revenus_totaux - autres_credits - mensualite_premier - charges_fixes
+                         - RESTE_A_VIVRE_PAR_PERSONNE * personnes)
+    return par_endettement, par_reste_a_vivre
+
+
+def _capital_empruntable_unitaire(mensualite: float, taux_annuel: float, duree_annees: float) -> float:
+    """`capital_empruntable` pour un seul prêt, en Python pur (même formule)."""
+    n = duree_annees * 12
+    i = taux_annuel / 100 / 12
+    if mensualite <= 0 or n <= 0:
+        return 0.0
+    return mensualite * n if i == 0 else mensualite * (1 - (1 + i) ** -n) / i
+
+
+def _resultat(par_endettement, par_reste_a_vivre, apport, taux_annuel, duree_annees) -> dict:
+    import numpy as np
+    mensualite_max = np.maximum(np.minimum(par_endettement, par_reste_a_vivre), 0.0)
+    capital_max = capital_empruntable(mensualite_max, taux_annuel, duree_annees)
+    return {
+        "mensualite_max": mensualite_max,
+        "capital_max": capital_max,
+        "prix_max": capital_max + apport,
+        "contrainte_endettement": par_endettement <= par_reste_a_vivre,
+    }
+
+
+def capacite_emprunt(situation: SituationActuelle, premier_bien: Optional[PremierBien] = None,
+                     apport: float = 0, taux_nominal=3.5, duree_annees=20, loyer_attendu: float = 0) -> dict:
+    """
+    Capacité d'emprunt maximale d'un foyer, sans essais successifs.
+
+    Inverse les contraintes de `calcul_ratios` : taux d'endettement ≤ SEUIL_ENDETTEMENT
+    et reste à vivre ≥ RESTE_A_VIVRE_PAR_PERSONNE × personnes du foyer. Le loyer attendu
+    du nouveau bien est compté dans les revenus, comme dans `calcul_ratios`.
+    `taux_nominal` et `duree_annees` acceptent des tableaux (diffusion NumPy) pour
+    évaluer une grille en un seul appel.
+    Retourne mensualite_max, capital_max, prix_max et contrainte_endettement
+    (True si le taux d'endettement est la contrainte limitante).
+    """
+    revenus_salaires, charges_fixes, autres_credits = totaux_situation(situation)
+    mensualite_premier = premier_bien.mensualite_actuelle if premier_bien else 0
+    loyers = (premier_bien.loyer_percu if premier_bien else 0) + loyer_attendu
+
+    par_endettement, par_reste_a_vivre = _mensualites_max(
+        revenus_salaires, charges_fixes, autres_credits, mensualite_premier, loyers, situation.personnes_foyer
+    )
+    if isinstance(taux_nominal, (int, float)) and isinstance(duree_annees, (int, float)):
+        # Un seul prêt : calcul scalaire, sans importer NumPy
+        mensualite_max = max(min(par_endettement, par_reste_a_vivre), 0.0)
+        capital_max = _capital_empruntable_unitaire(mensualite_max, taux_nominal, duree_annees)
+        return {
+            "mensualite_max": float(mensualite_max),
+            "capital_max": float(capital_max),
+            "prix_max": float(capital_max + apport),
+            "contrainte_endettement": bool(par_endettement <= par_reste_a_vivre),
+        }
+    import numpy as np
+    resultat = _resultat(np.float64(par_endettement), np.float64(par_reste_a_vivre), apport, taux_nominal, duree_annees)
+    if np.ndim(resultat["capital_max"]) == 0:
+        return {cle: valeur.item() for cle, valeur in resultat.items()}
+    return resultat
+
+
+def prix_max_grille(situation: SituationActuelle, premier_bien: Optional[PremierBien], apport: float,
+                    taux: Sequence[float], durees: Sequence[int], loyer_attendu: float = 0) -> "np.ndarray":
+    """Prix maximum finançable sur une grille taux × durées, tableau de forme (len(taux), len(durees))."""
+    import numpy as np
+    taux = np.asarray(taux, dtype=np.float64)
+    durees = np.asarray(durees)
+    resultat = capacite_emprunt(situation, premier_bien, apport, taux[:, None], durees[None, :], loyer_attendu)
+    return np.broadcast_to(resultat["prix_max"], (len(taux), len(durees)))
+
+
+def grille_capacite_emprunt(situation: SituationActuelle, premier_bien: Optional[PremierBien], apport: float,
+                            taux: Sequence[float], durees: Sequence[int], loyer_attendu: float = 0) -> "pd.DataFrame":
+    """`prix_max_grille` en DataFrame (une ligne par taux, une colonne par durée)."""
+    import numpy as np
+    import pandas as pd
+    prix_max = prix_max_grille(situation, premier_bien, apport, taux, durees, loyer_attendu)
+    return pd.DataFrame(prix_max, index=pd.Index(np.asarray(taux, dtype=np.float64), name="taux_nominal"),
+                        columns=pd.Index(np.asarray(durees), name="duree_annees"))
+
+
+def capacite_emprunt_batch(donnees: "DonneesColonnes", taux_nominal=None, duree_annees=None) -> dict:
+    """
+    Capacité d'emprunt de N foyers en une passe (colonnes de `calculs_batch.COLONNES_FOYER`
+    plus `personnes_foyer`, 1 par défaut).
+
+    Sans `taux_nominal` / `duree_annees`, les colonnes du même nom sont utilisées ;
+    sinon les valeurs données s'appliquent à tous les foyers. Permet de classer
+    un fichier de prospects par capacité (`prix_max`).
+    """
+    import numpy as np
+    from calculs_batch import _colonne, _nombre_lignes
+    n = _nombre_lignes(donnees)
+    personnes = _colonne(donnees, "personnes_foyer", n) if "personnes_foyer" in donnees else np.ones(n)
+    par_endettement, par_reste_a_vivre = _mensualites_max(
+        _colonne(donnees, "revenus_mensuels", n),
+        _colonne(donnees, "charges_mensuelles", n),
+        _colonne(donnees, "credits_mensuels", n),
+        _colonne(donnees, "mensualite_actuelle", n),
+        _colonne(donnees, "loyer_percu", n) + _colonne(donnees, "loyer_attendu", n),
+        personnes,
+    )
+    taux = _colonne(donnees, "taux_nominal", n) if taux_nominal is None else taux_nominal
+    duree = _colonne(donnees, "duree_annees", n) if duree_annees is None else duree_annees
+    return _resultat(par_endettement, par_reste_a_vivre, _colonne(donnees, "apport", n), taux, duree)
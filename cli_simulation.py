@@ -0,0 +1,243 @@
+"""
+Simulation en lot, sans interface : ratios bancaires et projection de rentabilité
+pour chaque ligne d'un fichier CSV ou Parquet (une ligne par foyer / projet), avec le
+TRI et la VAN du projet à l'horizon (revente comprise, voir `actualisation`).
+
+Le fichier est lu et écrit par blocs : la mémoire reste constante quel que soit
+le nombre de lignes. Colonnes attendues : voir `calculs_batch.COLONNES_FOYER`
+(les colonnes absentes valent 0). Exemples :
+
+    python cli_simulation.py prospects.csv resultats.csv
+    python cli_simulation.py prospects.parquet resultats.parquet --annees 20 --taille-bloc 200000
+    python cli_simulation.py prospects.csv resultats.csv --valider
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from actualisation import tri_et_van
+from calculs import est_financable
+from calculs_batch import calcul_ratios_batch, _colonne
+from profilage import MODES, profiler
+from projection_batch import projection_rentabilite_batch
+from validation_lot import REGLES_FOYER, valider_colonnes
+
+# Indicateurs de projection écrits en sortie (valeur à l'horizon, ou par année avec --par-annee)
+INDICATEURS_SORTIE = ["cash_flow_net", "cash_flow_cumule", "capital_restant", "patrimoine_net", "roi_total"]
+
+
+
+def _format(chemin: str, format_force: Optional[str]) -> str:
+    if format_force:
+        return format_force
+    suffixe = Path(chemin).suffix.lower()
+    if suffixe in (".parquet", ".pq"):
+        return "parquet"
+    if suffixe in (".csv", ".txt", ".gz"):
+        return "csv"
+    raise ValueError(f"Format non reconnu pour {chemin} : précisez --format-entree / --format-sortie (csv ou parquet)")
+
+
+def _pyarrow(requis: bool = True):
+    """Module pyarrow (dépendance optionnelle), ou None s'il est absent et non requis."""
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError as erreur:
+        if not requis:
+            return None
+        raise SystemExit("Le format Parquet nécessite pyarrow : pip install pyarrow") from erreur
+    return pyarrow
+
+
+def entete_csv(chemin: str) -> List[str]:
+    """Noms des colonnes d'un CSV, lus comme le fera `pd.read_csv` (guillemets compris)."""
+    return list(pd.read_csv(chemin, nrows=0).columns)
+
+
+def colonnes_texte(colonnes: Sequence[str]) -> List[str]:
+    """
+    Colonnes d'un CSV d'entrée lues et écrites en texte : toutes sauf les champs numériques
+    de `validation_lot.REGLES_FOYER` (date d'achat, identifiants, noms, commentaires...).
+    Déclarées d'avance, elles gardent le même type dans tous les blocs, même vides dans
+    tout le premier. Un Parquet porte ses propres types, identiques d'un bloc à l'autre.
+    """
+    return [colonne for colonne in colonnes if colonne not in REGLES_FOYER]
+
+
+def lire_blocs(chemin: str, format_entree: str, taille_bloc: int, texte: Sequence[str] = ()) -> Iterator[pd.DataFrame]:
+    """Itère sur le fichier d'entrée par blocs de `taille_bloc` lignes (colonnes `texte` lues en chaînes)."""
+    if format_entree == "parquet":
+        pyarrow = _pyarrow()
+        fichier = pyarrow.parquet.ParquetFile(chemin)
+        for lot in fichier.iter_batches(batch_size=taille_bloc):
+            yield lot.to_pandas()
+    else:
+        yield from pd.read_csv(chemin, chunksize=taille_bloc, dtype={colonne: str for colonne in texte})
+
+
+def nombre_lignes(chemin: str, format_entree: str) -> Optional[int]:
+    """Nombre total de lignes quand il est connu sans lire le fichier (métadonnées Parquet)."""
+    if format_entree == "parquet":
+        return _pyarrow().parquet.ParquetFile(chemin).metadata.num_rows
+    return None
+
+
+def simuler_bloc(bloc: pd.DataFrame, annees: int = 10, par_annee: bool = False) -> pd.DataFrame:
+    """Colonnes d'entrée suivies des ratios et des indicateurs de projection pour un bloc de lignes."""
+    ratios = calcul_ratios_batch(bloc)
+    projection = projection_rentabilite_batch(bloc, annees, indicateurs=INDICATEURS_SORTIE + ["valorisation_bien"])
+
+    colonnes = dict(ratios)
+    colonnes["cash_flow_net_an1"] = projection["cash_flow_net"][:, 0]
+    for cle in INDICATEURS_SORTIE:
+        if par_annee:
+            for k in range(annees):
+                colonnes[f"{cle}_an{k + 1}"] = projection[cle][:, k]
+        else:
+            colonnes[f"{cle}_an{annees}"] = projection[cle][:, -1]
+    rendement = tri_et_van(projection, _colonne(bloc, "apport", len(bloc)))
+    colonnes[f"tri_an{annees}"] = rendement["tri"]
+    colonnes[f"van_an{annees}"] = rendement["van"]
+    # Même verdict que l'application (personnes_foyer vaut 1 si la colonne est absente)
+    personnes = _colonne(bloc, "personnes_foyer", len(bloc)) if "personnes_foyer" in bloc else np.ones(len(bloc))
+    colonnes["financable"] = est_financable(ratios, personnes)
+
+    resultats = pd.DataFrame(colonnes, index=bloc.index)
+    return pd.concat([bloc, resultats.drop(columns=bloc.columns.intersection(resultats.columns))], axis=1)
+
+
+class _Ecrivain:
+    """
+    Écriture incrémentale du fichier de sortie, bloc par bloc.
+
+    Avec pyarrow, le CSV est lui aussi écrit par le moteur Arrow (le formatage
+    des flottants par pandas est plusieurs fois plus lent que le calcul lui-même).
+    Le schéma du fichier est fixé au premier bloc (voir `_schema_sortie`) et chaque
+    bloc y est converti : colonnes `texte` en chaînes, entiers en double.
+    """
+
+    def __init__(self, chemin: str, format_sortie: str, texte: Sequence[str] = ()):
+        self.chemin = chemin
+        self.format_sortie = format_sortie
+        self.texte = frozenset(texte)
+        self._pyarrow = _pyarrow(requis=format_sortie == "parquet")
+        self._ecrivain = None
+        self._schema = None
+        self._premier = True
+
+    def ecrire(self, bloc: pd.DataFrame):
+        if self._pyarrow is None:
+            bloc.to_csv(self.chemin, mode="w" if self._premier else "a", header=self._premier, index=False)
+        else:
+            table = self._pyarrow.Table.from_pandas(bloc, preserve_index=False)
+            if self._schema is None:
+                self._schema = self._schema_sortie(table.schema)
+            if table.schema != self._schema:
+                table = table.cast(self._schema)
+            if self._ecrivain is None:
+                if self.format_sortie == "parquet":
+                    self._ecrivain = self._pyarrow.parquet.ParquetWriter(self.chemin, self._schema)
+                else:
+                    self._ecrivain = self._pyarrow.csv.CSVWriter(self.chemin, self._schema)
+            self._ecrivain.write_table(table)
+        self._premier = False
+
+    def _schema_sortie(self, schema):
+        """
+        Schéma du fichier, déduit du premier bloc mais sans ses accidents : colonnes `texte`,
+        vides (null) ou textuelles en chaînes, colonnes entières en double (un bloc suivant
+        peut y contenir des décimales ou des valeurs manquantes). Les métadonnées pandas du
+        premier bloc sont retirées : elles décriraient ses types d'origine.
+        """
+        pyarrow, types = self._pyarrow, self._pyarrow.types
+        for indice, champ in enumerate(schema):
+            if champ.name in self.texte or types.is_null(champ.type) or types.is_large_string(champ.type):
+                schema = schema.set(indice, champ.with_type(pyarrow.string()))
+            elif types.is_integer(champ.type):
+                schema = schema.set(indice, champ.with_type(pyarrow.float64()))
+        return schema.remove_metadata()
+
+    def fermer(self):
+        if self._ecrivain is not None:
+            self._ecrivain.close()
+
+
+def _afficher_progression(lignes: int, total: Optional[int], debut: float, flux=sys.stderr, fin: bool = False):
+    duree = time.perf_counter() - debut
+    debit = lignes / duree if duree > 0 else 0.0
+    avancement = f"{lignes:,}/{total:,} lignes ({lignes / total:.0%})" if total else f"{lignes:,} lignes"
+    flux.write(f"\r{avancement} - {debit:,.0f} lignes/s - {duree:.1f} s")
+    if fin:
+        flux.write("\n")
+    flux.flush()
+
+
+def simuler_fichier(entree: str, sortie: str, annees: int = 10, taille_bloc: int = 100_000, par_annee: bool = False,
+                    format_entree: Optional[str] = None, format_sortie: Optional[str] = None,
+                    progression: bool = True, valider: bool = False) -> dict:
+    """
+    Simule toutes les lignes de `entree` et écrit les résultats dans `sortie`, bloc par bloc.
+    Avec `valider`, chaque bloc est d'abord validé en colonnes (`validation_lot`) : une
+    `ErreurValidationLot` indique les lignes fautives (0 = première ligne de données).
+    Retourne le nombre de lignes, la durée et le débit.
+    """
+    format_entree = _format(entree, format_entree)
+    format_sortie = _format(sortie, format_sortie)
+    total = nombre_lignes(entree, format_entree)
+    texte = colonnes_texte(entete_csv(entree)) if format_entree == "csv" else []
+    ecrivain = _Ecrivain(sortie, format_sortie, texte)
+    lignes = 0
+    debut = time.perf_counter()
+    try:
+        for bloc in lire_blocs(entree, format_entree, taille_bloc, texte):
+            if valider:
+                valider_colonnes(bloc.set_axis(pd.RangeIndex(lignes, lignes + len(bloc))))
+            ecrivain.ecrire(simuler_bloc(bloc, annees, par_annee))
+            lignes += len(bloc)
+            if progression:
+                _afficher_progression(lignes, total, debut)
+    finally:
+        ecrivain.fermer()
+    duree = time.perf_counter() - debut
+    if progression:
+        _afficher_progression(lignes, total, debut, fin=True)
+    return {"lignes": lignes, "duree_s": duree, "lignes_par_s": lignes / duree if duree > 0 else 0.0}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entree", help="Fichier CSV ou Parquet des foyers et projets")
+    parser.add_argument("sortie", help="Fichier de résultats (CSV ou Parquet)")
+    parser.add_argument("--annees", type=int, default=10, help="Horizon de la projection de rentabilité (années)")
+    parser.add_argument("--taille-bloc", type=int, default=100_000, help="Lignes lues et écrites par bloc")
+    parser.add_argument("--par-annee", action="store_true", help="Écrire les indicateurs de chaque année (sinon l'horizon seul)")
+    parser.add_argument("--format-entree", choices=["csv", "parquet"])
+    parser.add_argument("--format-sortie", choices=["csv", "parquet"])
+    parser.add_argument("--valider", action="store_true", help="Valider les colonnes (types, bornes) avant le calcul")
+    parser.add_argument("--silencieux", action="store_true", help="Sans indicateur de progression")
+    parser.add_argument("--profil", choices=MODES, help="Profile l'exécution (défaut : variable PROFILAGE), voir profilage.py")
+    args = parser.parse_args(arguments)
+
+    if args.annees < 1 or args.taille_bloc < 1:
+        parser.error("--annees et --taille-bloc doivent être strictement positifs")
+    try:
+        with profiler("cli_simulation", args.profil) as profil:
+            bilan = simuler_fichier(args.entree, args.sortie, args.annees, args.taille_bloc, args.par_annee,
+                                    args.format_entree, args.format_sortie, progression=not args.silencieux,
+                                    valider=args.valider)
+    except (FileNotFoundError, ValueError) as erreur:
+        parser.exit(1, f"Erreur : {erreur}\n")
+    print(f"{bilan['lignes']:,} lignes simulées en {bilan['duree_s']:.2f} s ({bilan['lignes_par_s']:,.0f} lignes/s) -> {args.sortie}")
+    if profil is not None:
+        print(f"Profil écrit dans {profil.chemin}")
+
+
+if __name__ == "__main__":
+    main()
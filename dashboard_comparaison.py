@@ -0,0 +1,156 @@
+import streamlit as st
+import plotly.graph_objects as go
+import pandas as pd
+import numpy as np
+from typing import Mapping, Optional, Tuple
+from data_models import SituationActuelle, NouveauProjet, PremierBien
+from dashboard_what_if import PARAMETRES, base_what_if, ratios_what_if
+from projection_batch import projection_rentabilite_batch
+from cache_calculs import cle_entrees
+from instrumentation import chrono
+
+MAX_VARIANTES = 20
+HORIZONS = (10, 15, 20, 25, 30)
+
+# Indicateurs de projection proposés pour le graphique superposé : (libellé, unité)
+INDICATEURS_GRAPHIQUE = {
+    "patrimoine_net": ("Patrimoine net", "€"),
+    "cash_flow_cumule": ("Cash-flow cumulé", "€"),
+    "roi_total": ("ROI total", "%"),
+    "capital_restant": ("Capital restant dû", "€"),
+    "cash_flow_net": ("Cash-flow annuel", "€"),
+}
+
+
+def comparer_variantes(situation: SituationActuelle, premier_bien: Optional[PremierBien],
+                       variantes: Mapping[str, object], annees: int = 10) -> Tuple[dict, dict]:
+    """
+    Ratios et projections de N variantes du projet en une passe vectorisée.
+
+    `variantes` donne une colonne par paramètre de PARAMETRES (une ligne par variante).
+    Retourne les ratios de `ratios_what_if` (tableaux de N valeurs) et la projection de
+    `projection_rentabilite_batch` (tableaux (N, annees)) : le coût ne dépend presque
+    pas du nombre de variantes.
+    """
+    colonnes = {nom: np.asarray(variantes[nom], dtype=np.float64) for nom in PARAMETRES}
+    ratios = ratios_what_if(base_what_if(situation, premier_bien), **colonnes)
+    projection = projection_rentabilite_batch(colonnes, annees)
+    return ratios, projection
+
+
+def variantes_par_defaut(projet: NouveauProjet) -> pd.DataFrame:
+    """Projet calculé et trois variantes usuelles (apport, durée, taux) comme point de départ."""
+    base = {nom: float(getattr(projet, nom)) for nom in PARAMETRES}
+    autre_duree = 25.0 if projet.duree_annees != 25 else 20.0
+    variantes = [
+        ("Projet calculé", base),
+        ("Apport +10 % du prix", {**base, "apport": min(base["apport"] + round(0.1 * base["prix_bien"], -3), base["prix_bien"])}),
+        (f"Durée {autre_duree:.0f} ans", {**base, "duree_annees": autre_duree}),
+        ("Taux -0,5 pt", {**base, "taux_nominal": max(base["taux_nominal"] - 0.5, 0.0)}),
+    ]
+    return pd.DataFrame([{"variante": nom, **valeurs} for nom, valeurs in variantes])
+
+
+def figure_comparaison(noms, projection: dict, indicateur: str) -> go.Figure:
+    """Courbes superposées d'un indicateur de projection, une par variante."""
+    libelle, unite = INDICATEURS_GRAPHIQUE[indicateur]
+    valeurs = projection[indicateur]
+    annees = np.arange(1, valeurs.shape[1] + 1)
+    figure = go.Figure()
+    for nom, ligne in zip(noms, valeurs):
+        figure.add_trace(go.Scatter(x=annees, y=ligne, mode="lines", name=nom))
+    figure.update_layout(
+        title=f"{libelle} par variante",
+        xaxis_title="Année",
+        yaxis_title=f"{libelle} ({unite})",
+        height=450,
+        hovermode="x unified",
+    )
+    return figure
+
+
+def tableau_comparaison(noms, ratios: dict, projection: dict) -> pd.DataFrame:
+    """Une ligne par variante : ratios bancaires, verdict et indicateurs en fin d'horizon."""
+    return pd.DataFrame({
+        "Mensualité": ratios["mensualite_nouveau"],
+        "Endettement (%)": ratios["taux_endettement"] * 100,
+        "Effort (%)": ratios["taux_effort"] * 100,
+        "Reste à vivre": ratios["reste_a_vivre"],
+        "Verdict": np.where(ratios["financable"], "✅ Finançable", "⚠️ Risque"),
+        "Cash-flow an 1": projection["cash_flow_net"][:, 0],
+        "Cash-flow cumulé": projection["cash_flow_cumule"][:, -1],
+        "Patrimoine net": projection["patrimoine_net"][:, -1],
+        "ROI total (%)": projection["roi_total"][:, -1],
+    }, index=pd.Index(noms, name="Variante"))
+
+
+def afficher_comparaison(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet]):
+    """
+    Comparaison côte à côte de variantes du projet (jusqu'à MAX_VARIANTES).
+
+    Les variantes se saisissent dans un tableau éditable ; ratios et projections sont
+    calculés ensemble par `comparer_variantes`, puis affichés en un graphique superposé
+    et un tableau. À appeler dans un fragment.
+    """
+    st.header("🔀 Comparaison de variantes")
+    if not projet:
+        st.warning("⚠️ Aucun projet défini. Veuillez d'abord renseigner un projet immobilier.")
+        return
+    if not st.toggle("Comparer plusieurs variantes du projet", key="toggle_comparaison"):
+        return
+
+    # Tableau éditable propre au projet calculé : un nouveau calcul repart de ses variantes par défaut
+    saisie = st.data_editor(
+        variantes_par_defaut(projet),
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key=f"variantes_{cle_entrees(projet)[:16]}",
+        column_config={
+            "variante": st.column_config.TextColumn("Variante", required=True),
+            "prix_bien": st.column_config.NumberColumn("Prix du bien (€)", min_value=1000, step=1000, format="%d €", required=True),
+            "apport": st.column_config.NumberColumn("Apport (€)", min_value=0, step=1000, format="%d €", required=True),
+            "taux_nominal": st.column_config.NumberColumn("Taux (%)", min_value=0.0, max_value=15.0, step=0.05, format="%.2f %%", required=True),
+            "duree_annees": st.column_config.NumberColumn("Durée (ans)", min_value=1, max_value=30, step=1, format="%d ans", required=True),
+            "loyer_attendu": st.column_config.NumberColumn("Loyer (€/mois)", min_value=0, step=10, format="%d €", required=True),
+        },
+    )
+    variantes = saisie.dropna(subset=list(PARAMETRES))
+    if len(variantes) > MAX_VARIANTES:
+        st.warning(f"⚠️ Seules les {MAX_VARIANTES} premières variantes sont comparées.")
+        variantes = variantes.iloc[:MAX_VARIANTES]
+    if variantes.empty:
+        st.info("Ajoutez au moins une variante complète pour lancer la comparaison.")
+        return
+    noms = [nom if isinstance(nom, str) and nom else f"Variante {i + 1}" for i, nom in enumerate(variantes["variante"])]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        annees = st.select_slider("Horizon de projection", options=HORIZONS, value=HORIZONS[0],
+                                  format_func=lambda a: f"{a} ans", key="comparaison_horizon")
+    with col2:
+        indicateur = st.selectbox("Indicateur du graphique", list(INDICATEURS_GRAPHIQUE),
+                                  format_func=lambda cle: INDICATEURS_GRAPHIQUE[cle][0], key="comparaison_indicateur")
+
+    with chrono("comparaison_variantes"):
+        ratios, projection = comparer_variantes(situation, premier_bien, variantes, annees)
+
+    figure = figure_comparaison(noms, projection, indicateur)
+    with chrono("plotly_chart"):
+        st.plotly_chart(figure, use_container_width=True)
+
+    st.subheader(f"📋 Comparaison à {annees} ans")
+    st.dataframe(
+        tableau_comparaison(noms, ratios, projection),
+        use_container_width=True,
+        column_config={
+            "Mensualité": st.column_config.NumberColumn(format="%.0f €"),
+            "Endettement (%)": st.column_config.NumberColumn(format="%.1f %%"),
+            "Effort (%)": st.column_config.NumberColumn(format="%.1f %%"),
+            "Reste à vivre": st.column_config.NumberColumn(format="%.0f €"),
+            "Cash-flow an 1": st.column_config.NumberColumn(format="%.0f €"),
+            "Cash-flow cumulé": st.column_config.NumberColumn(format="%.0f €"),
+            "Patrimoine net": st.column_config.NumberColumn(format="%.0f €"),
+            "ROI total (%)": st.column_config.NumberColumn(format="%.1f %%"),
+        },
+    )
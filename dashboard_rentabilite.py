@@ -5,85 +5,110 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+from actualisation import TAUX_ACTUALISATION, tri_et_van
 from data_models import SituationActuelle, NouveauProjet, PremierBien
+from projection_batch import projection_rentabilite_batch
+from resultats import ResultatRatios
+from projection_stochastique import simuler_projection_stochastique
+from cache_calculs import memoiser
+from instrumentation import chrono
 
-def calculer_projection_rentabilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet], resultats: dict, annees: int = 10):
+if TYPE_CHECKING:
+    from graphe_calcul import GrapheCalcul
+
+HORIZON_MAX = 40          # années
+POINTS_MAX_FIGURE = 120   # points par courbe au-delà desquels les figures sont décimées
+
+def calculer_projection_rentabilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet], resultats: ResultatRatios,
+                                    annees: int = 10, mensuelle: bool = False):
     """
-    Calcule les projections de rentabilité sur plusieurs années.
+    Calcule les projections de rentabilité sur plusieurs années, par année ou par mois.
+
+    Une colonne NumPy par indicateur (moteur de `projection_batch` sur une ligne),
+    sans dictionnaire intermédiaire par période. En mensuel, la colonne `mois` s'ajoute
+    et `annee` est fractionnaire (mois / 12), pour tracer sur le même axe.
     """
     if not projet:
         return None
-    
-    # Données de base
-    capital_emprunte = projet.prix_bien - projet.apport
-    mensualite = resultats.get('mensualite_nouveau', 0)
-    loyer_mensuel = projet.loyer_attendu
-    
-    # Paramètres d'évolution (hypothèses)
-    inflation_loyers = 0.02  # 2% par an
-    inflation_charges = 0.025  # 2,5% par an
-    charges_mensuelles_initiales = projet.prix_bien * 0.003  # 0,3% du prix par mois (charges propriétaire)
-    
-    # Calcul année par année
-    donnees_projection = []
-    
-    for annee in range(1, annees + 1):
-        # Évolution des loyers
-        loyer_annuel = loyer_mensuel * 12 * (1 + inflation_loyers) ** (annee - 1)
-        
-        # Évolution des charges
-        charges_annuelles = charges_mensuelles_initiales * 12 * (1 + inflation_charges) ** (annee - 1)
-        
-        # Amortissement du capital (approximation linéaire pour simplifier)
-        capital_rembourse = (mensualite * 12 * annee) - (capital_emprunte * (projet.taux_nominal / 100) * annee)
-        capital_restant = max(0, capital_emprunte - capital_rembourse)
-        
-        # Cash-flow net annuel
-        cash_flow_net = loyer_annuel - (mensualite * 12) - charges_annuelles
-        
-        # Cash-flow cumulé
-        if annee == 1:
-            cash_flow_cumule = cash_flow_net - projet.apport  # Inclure l'apport initial
-        else:
-            cash_flow_cumule = donnees_projection[-1]['cash_flow_cumule'] + cash_flow_net
-        
-        # Rendement locatif brut
-        rendement_brut = (loyer_annuel / projet.prix_bien) * 100 if projet.prix_bien > 0 else 0
-        
-        # Rendement net (après charges et intérêts)
-        rendement_net = (cash_flow_net / projet.apport) * 100 if projet.apport > 0 else 0
-        
-        # Plus-value théorique (hypothèse +2% par an)
-        valorisation_bien = projet.prix_bien * (1.02 ** annee)
-        plus_value_latente = valorisation_bien - projet.prix_bien
-        
-        # Patrimoine net (valeur bien - capital restant)
-        patrimoine_net = valorisation_bien - capital_restant
-        
-        donnees_projection.append({
-            'annee': annee,
-            'loyer_annuel': loyer_annuel,
-            'charges_annuelles': charges_annuelles,
-            'cash_flow_net': cash_flow_net,
-            'cash_flow_cumule': cash_flow_cumule,
-            'capital_rembourse': capital_emprunte - capital_restant,
-            'capital_restant': capital_restant,
-            'rendement_brut': rendement_brut,
-            'rendement_net': rendement_net,
-            'valorisation_bien': valorisation_bien,
-            'plus_value_latente': plus_value_latente,
-            'patrimoine_net': patrimoine_net,
-            'roi_total': ((cash_flow_cumule + plus_value_latente) / projet.apport) * 100 if projet.apport > 0 else 0
-        })
-    
-    return pd.DataFrame(donnees_projection)
+    indicateurs = {cle: valeurs[0] for cle, valeurs in projection_rentabilite_batch(projet.model_dump(), annees, mensuelle=mensuelle).items()}
+    if mensuelle:
+        mois = np.arange(1, annees * 12 + 1)
+        return pd.DataFrame({"mois": mois, "annee": mois / 12, **indicateurs})
+    return pd.DataFrame({"annee": np.arange(1, annees + 1), **indicateurs})
+
+# Version mise en cache (LRU partagé entre sessions) utilisée par le dashboard ;
+# `resultats` découle des trois modèles d'entrée et n'entre donc pas dans la clé
+calculer_projection_rentabilite_en_cache = memoiser(taille_max=1024, ignorer=("resultats",))(calculer_projection_rentabilite)
+
+@st.cache_data(show_spinner="Simulation Monte Carlo en cours...", max_entries=32)
+def _bandes_monte_carlo(projet_json: str, annees: int, n_chemins: int):
+    """Bandes P5/P50/P95 mises en cache par projet, horizon et nombre de scénarios (graine fixe)."""
+    projet = NouveauProjet.model_validate_json(projet_json)
+    return simuler_projection_stochastique(projet, annees=annees, n_chemins=n_chemins, graine=42)
+
+def decimer(df: pd.DataFrame, points_max: int = POINTS_MAX_FIGURE) -> pd.DataFrame:
+    """Lignes régulièrement espacées (la dernière comprise) pour l'affichage ; les calculs gardent toutes les lignes."""
+    if len(df) <= points_max:
+        return df
+    pas = -(-len(df) // points_max)
+    return df.iloc[np.unique(np.r_[np.arange(0, len(df), pas), len(df) - 1])]
 
-def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet], resultats: dict):
+def figure_patrimoine(df_projection: pd.DataFrame) -> go.Figure:
+    """Valeur du bien, capital restant dû et patrimoine net, décimés au-delà de POINTS_MAX_FIGURE périodes."""
+    df_projection = decimer(df_projection)
+    mode = 'lines+markers' if len(df_projection) <= 40 else 'lines'
+    fig_patrimoine = go.Figure()
+
+    fig_patrimoine.add_trace(
+        go.Scatter(
+            x=df_projection['annee'],
+            y=df_projection['valorisation_bien'],
+            mode=mode,
+            name='Valeur du bien',
+            line=dict(color='green', width=3),
+            fill='tonexty'
+        )
+    )
+
+    fig_patrimoine.add_trace(
+        go.Scatter(
+            x=df_projection['annee'],
+            y=df_projection['capital_restant'],
+            mode=mode,
+            name='Capital restant dû',
+            line=dict(color='red', width=2),
+            fill='tozeroy'
+        )
+    )
+
+    fig_patrimoine.add_trace(
+        go.Scatter(
+            x=df_projection['annee'],
+            y=df_projection['patrimoine_net'],
+            mode=mode,
+            name='Patrimoine net',
+            line=dict(color='gold', width=3)
+        )
+    )
+
+    fig_patrimoine.update_layout(
+        title="Construction du Patrimoine Immobilier",
+        xaxis_title="Année",
+        yaxis_title="Valeur (€)",
+        height=500
+    )
+    return fig_patrimoine
+
+def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet], resultats: ResultatRatios,
+                                   graphe: Optional["GrapheCalcul"] = None):
     """
     Affiche le dashboard de rentabilité avec graphiques interactifs.
+
+    Avec `graphe` (voir graphe_calcul), la projection et la figure sont reprises du
+    graphe de la session et ne sont recalculées que si le projet a changé.
     """
-    st.header("📈 Dashboard de Rentabilité - Projection 10 ans")
+    st.header("📈 Dashboard de Rentabilité")
     
     if not projet:
         st.warning("⚠️ Aucun projet défini. Veuillez d'abord renseigner un projet immobilier.")
@@ -93,49 +118,81 @@ def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: O
         st.warning("⚠️ Ce dashboard est conçu pour les investissements locatifs. Veuillez renseigner un loyer attendu.")
         return
     
+    # Horizon (par défaut la durée du prêt) et résolution de la projection
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        annees = st.slider("Horizon de projection (années)", 1, HORIZON_MAX, value=min(max(projet.duree_annees, 1), HORIZON_MAX),
+                           key="horizon_projection")
+    with col2:
+        mensuelle = st.radio("Résolution", ("Annuelle", "Mensuelle"), horizontal=True, key="resolution_projection") == "Mensuelle"
+    
     # Calcul des projections
-    df_projection = calculer_projection_rentabilite(situation, premier_bien, projet, resultats)
+    if graphe is not None:
+        graphe.definir("options_projection", (annees, mensuelle))
+        df_projection = graphe.obtenir("projection")
+    else:
+        with chrono("projection_rentabilite"):
+            df_projection = calculer_projection_rentabilite_en_cache(situation, premier_bien, projet, resultats, annees, mensuelle)
     
     if df_projection is None:
         st.error("❌ Erreur lors du calcul des projections.")
         return
     
-    # Métriques clés sur 10 ans
-    st.subheader("🎯 Indicateurs clés à 10 ans")
+    # Métriques clés à l'horizon choisi
+    st.subheader(f"🎯 Indicateurs clés à {annees} ans")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        cash_flow_10ans = df_projection.iloc[-1]['cash_flow_cumule']
+        cash_flow_final = df_projection.iloc[-1]['cash_flow_cumule']
         st.metric(
             "Cash-flow cumulé", 
-            f"{cash_flow_10ans:,.0f} €",
-            help="Total des flux de trésorerie générés sur 10 ans (net de l'apport initial)"
+            f"{cash_flow_final:,.0f} €",
+            help=f"Total des flux de trésorerie générés sur {annees} ans (net de l'apport initial)"
         )
     
     with col2:
-        patrimoine_10ans = df_projection.iloc[-1]['patrimoine_net']
+        patrimoine_final = df_projection.iloc[-1]['patrimoine_net']
         st.metric(
             "Patrimoine net", 
-            f"{patrimoine_10ans:,.0f} €",
+            f"{patrimoine_final:,.0f} €",
             help="Valeur du bien moins le capital restant dû"
         )
     
     with col3:
-        roi_total_10ans = df_projection.iloc[-1]['roi_total']
+        roi_total_final = df_projection.iloc[-1]['roi_total']
         st.metric(
             "ROI total", 
-            f"{roi_total_10ans:.1f}%",
+            f"{roi_total_final:.1f}%",
             help="Retour sur investissement total (cash-flow + plus-value) / apport initial"
         )
     
     with col4:
-        capital_rembourse_10ans = df_projection.iloc[-1]['capital_rembourse']
-        pct_rembourse = (capital_rembourse_10ans / (projet.prix_bien - projet.apport)) * 100
+        capital_rembourse_final = df_projection.iloc[-1]['capital_rembourse']
+        capital_emprunte = projet.prix_bien - projet.apport
+        pct_rembourse = (capital_rembourse_final / capital_emprunte) * 100 if capital_emprunte > 0 else 100
         st.metric(
             "Capital remboursé", 
             f"{pct_rembourse:.1f}%",
-            help="Pourcentage du prêt remboursé après 10 ans"
+            help=f"Pourcentage du prêt remboursé après {annees} ans"
+        )
+    
+    # TRI et VAN : apport, cash-flows de chaque période, revente nette du capital restant dû à l'horizon
+    rendement = tri_et_van({cle: df_projection[cle].to_numpy() for cle in ("cash_flow_net", "valorisation_bien", "capital_restant")},
+                           projet.apport, periodes_par_an=12 if mensuelle else 1)
+    tri_projet, van_projet = rendement["tri"][0], rendement["van"][0]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            "TRI",
+            "—" if np.isnan(tri_projet) else f"{tri_projet:.2%}",
+            help=f"Taux de rendement interne sur {annees} ans, revente du bien comprise (taux annuel qui annule la VAN)"
+        )
+    with col2:
+        st.metric(
+            f"VAN ({TAUX_ACTUALISATION:.0%})",
+            f"{van_projet:,.0f} €",
+            help=f"Valeur actuelle nette sur {annees} ans, revente comprise, actualisée à {TAUX_ACTUALISATION:.0%} par an"
         )
     
     st.divider()
@@ -143,58 +200,80 @@ def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: O
     # Graphique de construction du patrimoine
     st.subheader("🏠 Construction du Patrimoine")
     
-    fig_patrimoine = go.Figure()
+    if graphe is not None:
+        fig_patrimoine = graphe.obtenir("figure_patrimoine")
+    else:
+        with chrono("figure_patrimoine"):
+            fig_patrimoine = figure_patrimoine(df_projection)
     
-    fig_patrimoine.add_trace(
-        go.Scatter(
-            x=df_projection['annee'],
-            y=df_projection['valorisation_bien'],
-            mode='lines+markers',
-            name='Valeur du bien',
-            line=dict(color='green', width=3),
-            fill='tonexty'
-        )
-    )
+    with chrono("plotly_chart"):
+        st.plotly_chart(fig_patrimoine, use_container_width=True)
     
-    fig_patrimoine.add_trace(
-        go.Scatter(
-            x=df_projection['annee'],
-            y=df_projection['capital_restant'],
-            mode='lines+markers',
-            name='Capital restant dû',
-            line=dict(color='red', width=2),
-            fill='tozeroy'
-        )
-    )
+    # Projection stochastique (Monte Carlo), calculée uniquement à la demande
+    st.subheader("🎲 Projection Stochastique (Monte Carlo)")
     
-    fig_patrimoine.add_trace(
-        go.Scatter(
-            x=df_projection['annee'],
-            y=df_projection['patrimoine_net'],
-            mode='lines+markers',
-            name='Patrimoine net',
-            line=dict(color='gold', width=3)
+    if st.toggle("Simuler l'incertitude (loyers, valorisation, vacance, charges)", key="toggle_monte_carlo"):
+        n_chemins = st.select_slider(
+            "Nombre de scénarios simulés",
+            options=[10_000, 25_000, 50_000, 100_000],
+            value=10_000,
+            help="Plus de scénarios donne des bandes plus stables, pour un calcul un peu plus long."
         )
-    )
-    
-    fig_patrimoine.update_layout(
-        title="Construction du Patrimoine Immobilier",
-        xaxis_title="Année",
-        yaxis_title="Valeur (€)",
-        height=500
-    )
-    
-    st.plotly_chart(fig_patrimoine, use_container_width=True)
-    
-    # 4. Tableau de synthèse par année
+        with chrono("projection_monte_carlo"):
+            bandes = _bandes_monte_carlo(projet.model_dump_json(), annees, n_chemins)
+        
+        with chrono("figure_monte_carlo"):
+            fig_monte_carlo = go.Figure()
+            bande_patrimoine = bandes['patrimoine_net']
+            fig_monte_carlo.add_trace(go.Scatter(
+                x=bande_patrimoine['annee'], y=bande_patrimoine['p95'],
+                mode='lines', line=dict(width=0), name='P95', showlegend=False
+            ))
+            fig_monte_carlo.add_trace(go.Scatter(
+                x=bande_patrimoine['annee'], y=bande_patrimoine['p5'],
+                mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(255, 215, 0, 0.25)',
+                name='Patrimoine net (P5 - P95)'
+            ))
+            fig_monte_carlo.add_trace(go.Scatter(
+                x=bande_patrimoine['annee'], y=bande_patrimoine['p50'],
+                mode='lines+markers', line=dict(color='gold', width=3), name='Patrimoine net (médiane)'
+            ))
+            df_trace = decimer(df_projection)
+            fig_monte_carlo.add_trace(go.Scatter(
+                x=df_trace['annee'], y=df_trace['patrimoine_net'],
+                mode='lines', line=dict(color='black', dash='dot'), name='Projection déterministe'
+            ))
+            fig_monte_carlo.update_layout(
+                title=f"Patrimoine net sur {n_chemins:,} scénarios",
+                xaxis_title="Année",
+                yaxis_title="Valeur (€)",
+                height=450
+            )
+        with chrono("plotly_chart"):
+            st.plotly_chart(fig_monte_carlo, use_container_width=True)
+        
+        col1, col2, col3 = st.columns(3)
+        for col, (nom, libelle, unite) in zip(
+            (col1, col2, col3),
+            [('patrimoine_net', 'Patrimoine net', '€'), ('cash_flow_cumule', 'Cash-flow cumulé', '€'), ('roi_total', 'ROI total', '%')]
+        ):
+            fin = bandes[nom].iloc[-1]
+            with col:
+                st.metric(f"{libelle} (médiane)", f"{fin['p50']:,.0f} {unite}")
+                st.caption(f"90% des scénarios entre {fin['p5']:,.0f} et {fin['p95']:,.0f} {unite}")
+    
+    # 4. Tableau de synthèse par période
     st.subheader("📋 Tableau de Synthèse Détaillé")
     
     # Préparer le tableau pour l'affichage
     df_display = df_projection.copy()
+    if mensuelle:
+        df_display['annee'] = (df_display['mois'] - 1) // 12 + 1
     df_display = df_display.round(0).astype(int)
     
     # Formater les colonnes pour l'affichage
     columns_to_show = {
+        **({'mois': 'Mois'} if mensuelle else {}),
         'annee': 'Année',
         'loyer_annuel': 'Loyers (€)',
         'cash_flow_net': 'Cash-flow net (€)',
@@ -238,7 +317,9 @@ def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: O
         - 🏠 **Valorisation du bien** : +2% par an  
         - 💸 **Charges propriétaire** : 0,3% de la valeur du bien par mois
         - 📊 **Inflation des charges** : +2,5% par an
-        - 💰 **Amortissement** : Calculé de manière simplifiée
+        - 💰 **Amortissement** : Tableau d'amortissement exact (mensualités constantes, hors assurance)
+        - 🎲 **Monte Carlo** : loyers ±1,5%, valorisation ±5%, charges ±1% (écarts-types annuels), vacance moyenne de 4% de l'année
+        - 📉 **TRI / VAN** : apport à l'origine, revente à l'horizon au prix valorisé moins le capital restant dû (sans frais), actualisation à 3% par an
         
         ⚠️ **Attention** : Ces projections sont indicatives et basées sur des hypothèses moyennes. 
         Les performances réelles peuvent varier selon les conditions de marché, la localisation, 
@@ -248,20 +329,21 @@ def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: O
     # Analyse rapide
     st.subheader("🎯 Analyse Rapide")
     
-    # Point de rentabilité
-    break_even_year = None
-    for idx, row in df_projection.iterrows():
-        if row['cash_flow_cumule'] > 0:
-            break_even_year = row['annee']
-            break
+    # Point de rentabilité : première période au cash-flow cumulé positif
+    positif = df_projection['cash_flow_cumule'].to_numpy() > 0
+    break_even = int(positif.argmax()) if positif.any() else None
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if break_even_year:
-            st.success(f"✅ **Rentabilité atteinte** : Année {break_even_year}")
+        if break_even is not None:
+            if mensuelle:
+                mois = int(df_projection['mois'].iat[break_even])
+                st.success(f"✅ **Rentabilité atteinte** : Mois {mois} (année {(mois - 1) // 12 + 1})")
+            else:
+                st.success(f"✅ **Rentabilité atteinte** : Année {int(df_projection['annee'].iat[break_even])}")
         else:
-            st.warning("⚠️ **Rentabilité non atteinte** sur 10 ans")
+            st.warning(f"⚠️ **Rentabilité non atteinte** sur {annees} ans")
         
         rendement_moyen = df_projection['rendement_net'].mean()
         if rendement_moyen > 5:
@@ -274,10 +356,10 @@ def afficher_dashboard_rentabilite(situation: SituationActuelle, premier_bien: O
     with col2:
         roi_final = df_projection.iloc[-1]['roi_total']
         if roi_final > 100:
-            st.success(f"🚀 **ROI excellent** : {roi_final:.1f}% sur 10 ans")
+            st.success(f"🚀 **ROI excellent** : {roi_final:.1f}% sur {annees} ans")
         elif roi_final > 50:
-            st.success(f"✅ **ROI satisfaisant** : {roi_final:.1f}% sur 10 ans")
+            st.success(f"✅ **ROI satisfaisant** : {roi_final:.1f}% sur {annees} ans")
         elif roi_final > 0:
-            st.info(f"ℹ️ **ROI positif** : {roi_final:.1f}% sur 10 ans")
+            st.info(f"ℹ️ **ROI positif** : {roi_final:.1f}% sur {annees} ans")
         else:
-            st.error(f"❌ **ROI négatif** : {roi_final:.1f}% sur 10 ans")
+            st.error(f"❌ **ROI négatif** : {roi_final:.1f}% sur {annees} ans")
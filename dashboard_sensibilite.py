@@ -0,0 +1,139 @@
+import streamlit as st
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
+from typing import TYPE_CHECKING, Optional, Sequence
+from data_models import SituationActuelle, NouveauProjet, PremierBien
+from calculs import SEUIL_ENDETTEMENT, RESTE_A_VIVRE_PAR_PERSONNE, totaux_situation
+from calculs_batch import mensualite_credit_vec
+from instrumentation import chrono
+
+if TYPE_CHECKING:
+    from graphe_calcul import GrapheCalcul
+
+def calculer_grille_sensibilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], prix_bien: float,
+                                loyer_attendu: float, taux: Sequence[float], durees: Sequence[int], apports: Sequence[float]) -> dict:
+    """
+    Évalue mensualité, taux d'endettement et reste à vivre sur la grille taux × durées × apports.
+
+    Calcul entièrement par diffusion NumPy (aucune boucle) : les tableaux retournés
+    sont de forme (len(taux), len(durees), len(apports)).
+    """
+    revenus_salaires, charges_fixes, autres_credits = totaux_situation(situation)
+    mensualite_premier = premier_bien.mensualite_actuelle if premier_bien else 0
+    loyer_premier = premier_bien.loyer_percu if premier_bien else 0
+
+    taux = np.asarray(taux, dtype=np.float64)[:, None, None]
+    durees = np.asarray(durees, dtype=np.float64)[None, :, None]
+    apports = np.asarray(apports, dtype=np.float64)[None, None, :]
+
+    mensualite = mensualite_credit_vec(prix_bien - apports, taux, durees)
+    revenus_totaux = revenus_salaires + loyer_premier + loyer_attendu
+    mensualites_totales = mensualite + mensualite_premier + autres_credits
+
+    taux_endettement = mensualites_totales / revenus_totaux if revenus_totaux > 0 else np.zeros_like(mensualite)
+    reste_a_vivre = revenus_totaux - mensualites_totales - charges_fixes
+    return {
+        "mensualite": mensualite,
+        "taux_endettement": taux_endettement,
+        "reste_a_vivre": reste_a_vivre,
+    }
+
+@st.cache_data(max_entries=16)
+def _grille_en_cache(situation_json: str, premier_bien_json: Optional[str], prix_bien: float, loyer_attendu: float,
+                     taux: tuple, durees: tuple, apports: tuple) -> dict:
+    """Grille mise en cache par valeur des axes : déplacer le curseur d'apport ne la recalcule pas."""
+    situation = SituationActuelle.model_validate_json(situation_json)
+    premier_bien = PremierBien.model_validate_json(premier_bien_json) if premier_bien_json else None
+    return calculer_grille_sensibilite(situation, premier_bien, prix_bien, loyer_attendu, taux, durees, apports)
+
+@st.cache_data(max_entries=64)
+def _figure_en_cache(situation_json: str, premier_bien_json: Optional[str], prix_bien: float, loyer_attendu: float,
+                     taux: tuple, durees: tuple, apports: tuple, index_apport: int, reste_min: float) -> go.Figure:
+    """Heatmaps taux × durée pour un apport donné, avec la frontière des 35% d'endettement."""
+    grille = _grille_en_cache(situation_json, premier_bien_json, prix_bien, loyer_attendu, taux, durees, apports)
+    endettement = grille['taux_endettement'][:, :, index_apport] * 100
+    reste_a_vivre = grille['reste_a_vivre'][:, :, index_apport]
+
+    fig = make_subplots(rows=1, cols=2, subplot_titles=("Taux d'endettement (%)", "Reste à vivre (€)"), horizontal_spacing=0.12)
+    fig.add_trace(go.Heatmap(
+        x=list(durees), y=list(taux), z=endettement, colorscale='RdYlGn_r', zmid=SEUIL_ENDETTEMENT * 100,
+        colorbar=dict(x=0.44, title="%"),
+        hovertemplate="Durée %{x} ans<br>Taux %{y:.2f}%<br>Endettement %{z:.1f}%<extra></extra>"
+    ), row=1, col=1)
+    fig.add_trace(go.Contour(
+        x=list(durees), y=list(taux), z=endettement, showscale=False, contours=dict(
+            start=SEUIL_ENDETTEMENT * 100, end=SEUIL_ENDETTEMENT * 100, size=1, coloring='lines', showlabels=True
+        ), line=dict(color='black', width=3), name="Seuil 35%", hoverinfo='skip'
+    ), row=1, col=1)
+    fig.add_trace(go.Heatmap(
+        x=list(durees), y=list(taux), z=reste_a_vivre, colorscale='RdYlGn', zmid=reste_min,
+        colorbar=dict(x=1.0, title="€"),
+        hovertemplate="Durée %{x} ans<br>Taux %{y:.2f}%<br>Reste à vivre %{z:,.0f} €<extra></extra>"
+    ), row=1, col=2)
+    fig.add_trace(go.Contour(
+        x=list(durees), y=list(taux), z=reste_a_vivre, showscale=False, contours=dict(
+            start=reste_min, end=reste_min, size=1, coloring='lines', showlabels=True
+        ), line=dict(color='black', width=3), name="Reste à vivre minimum", hoverinfo='skip'
+    ), row=1, col=2)
+    fig.update_xaxes(title_text="Durée (années)")
+    fig.update_yaxes(title_text="Taux nominal (%)", col=1)
+    fig.update_layout(height=480, title=f"Apport : {apports[index_apport]:,.0f} €")
+    return fig
+
+def figure_sensibilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: NouveauProjet,
+                       taux: tuple, durees: tuple, apports: tuple, index_apport: int) -> go.Figure:
+    """Heatmaps du projet pour les axes donnés (grille et figure mises en cache par valeur)."""
+    reste_min = float(RESTE_A_VIVRE_PAR_PERSONNE * situation.personnes_foyer)
+    return _figure_en_cache(
+        situation.model_dump_json(), premier_bien.model_dump_json() if premier_bien else None,
+        projet.prix_bien, projet.loyer_attendu, taux, durees, apports, index_apport, reste_min
+    )
+
+def afficher_dashboard_sensibilite(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet],
+                                   graphe: Optional["GrapheCalcul"] = None):
+    """
+    Affiche les heatmaps de sensibilité (taux × durée × apport) autour du projet saisi.
+
+    Avec `graphe`, la figure n'est reconstruite que si le projet ou les axes ont changé.
+    """
+    st.header("🔥 Sensibilité Taux × Durée × Apport")
+
+    if not projet:
+        st.warning("⚠️ Aucun projet défini. Veuillez d'abord renseigner un projet immobilier.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        taux_min, taux_max = st.slider("Plage de taux (%)", 0.0, 8.0, (1.5, 6.0), step=0.1, key="sens_taux")
+    with col2:
+        duree_min, duree_max = st.slider("Plage de durées (années)", 5, 30, (5, 30), key="sens_durees")
+    with col3:
+        apport_max = st.slider(
+            "Apport maximum (€)", 0, int(max(projet.prix_bien, 1000)), int(min(projet.prix_bien, max(projet.apport * 2, 50_000))),
+            step=1000, key="sens_apport_max"
+        )
+
+    # Axes : 50 taux × durées annuelles × 40 apports
+    taux = tuple(np.round(np.linspace(taux_min, taux_max, 50), 3))
+    durees = tuple(range(duree_min, duree_max + 1))
+    apports = tuple(np.round(np.linspace(0, apport_max, 40), 0))
+
+    index_apport = st.select_slider(
+        "Apport affiché",
+        options=list(range(len(apports))),
+        value=int(np.abs(np.asarray(apports) - projet.apport).argmin()),
+        format_func=lambda idx: f"{apports[idx]:,.0f} €",
+        key="sens_apport"
+    )
+
+    axes = (taux, durees, apports, index_apport)
+    if graphe is not None:
+        graphe.definir("axes_sensibilite", axes)
+        figure = graphe.obtenir("figure_sensibilite")
+    else:
+        with chrono("figure_sensibilite"):
+            figure = figure_sensibilite(situation, premier_bien, projet, *axes)
+    with chrono("plotly_chart"):
+        st.plotly_chart(figure, use_container_width=True)
+    st.caption("Trait noir : frontière des 35% d'endettement (à gauche) et du reste à vivre minimum (à droite).")
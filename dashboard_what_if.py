@@ -0,0 +1,151 @@
+import functools
+import streamlit as st
+import numpy as np
+from typing import NamedTuple, Optional, Tuple
+from data_models import SituationActuelle, NouveauProjet, PremierBien
+from calculs import SEUIL_ENDETTEMENT, RESTE_A_VIVRE_PAR_PERSONNE, totaux_situation
+from calculs_batch import mensualite_credit_vec
+from cache_calculs import cle_entrees
+
+PARAMETRES = ("prix_bien", "apport", "taux_nominal", "duree_annees", "loyer_attendu")
+
+
+class BaseWhatIf(NamedTuple):
+    """Part de `calcul_ratios` indépendante du projet, calculée une fois par situation."""
+    revenus_salaires: float
+    charges_fixes: float
+    autres_credits: float
+    mensualite_premier: float
+    loyer_premier: float
+    reste_min: float
+
+
+def base_what_if(situation: SituationActuelle, premier_bien: Optional[PremierBien]) -> BaseWhatIf:
+    revenus_salaires, charges_fixes, autres_credits = totaux_situation(situation)
+    return BaseWhatIf(
+        float(revenus_salaires), float(charges_fixes), float(autres_credits),
+        float(premier_bien.mensualite_actuelle) if premier_bien else 0.0,
+        float(premier_bien.loyer_percu) if premier_bien else 0.0,
+        float(RESTE_A_VIVRE_PAR_PERSONNE * situation.personnes_foyer),
+    )
+
+
+def ratios_what_if(base: BaseWhatIf, prix_bien, apport, taux_nominal, duree_annees, loyer_attendu) -> dict:
+    """
+    Ratios de `calcul_ratios` pour un projet (prix_bien > 0), sans reconstruire les modèles.
+
+    Les paramètres sont des scalaires ou des tableaux NumPy (diffusion) : une valeur de
+    curseur coûte quelques microsecondes, un axe entier de curseur un seul appel.
+    """
+    mensualite = mensualite_credit_vec(np.subtract(prix_bien, apport), taux_nominal, duree_annees)
+    revenus_totaux = base.revenus_salaires + base.loyer_premier + np.asarray(loyer_attendu, dtype=np.float64)
+    mensualites_totales = mensualite + base.mensualite_premier + base.autres_credits
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taux_endettement = np.where(revenus_totaux > 0, mensualites_totales / revenus_totaux, 0.0)
+    taux_effort = mensualites_totales / base.revenus_salaires if base.revenus_salaires > 0 else np.zeros_like(mensualites_totales)
+    reste_a_vivre = revenus_totaux - mensualites_totales - base.charges_fixes
+    return {
+        "mensualite_nouveau": mensualite,
+        "revenus_totaux": revenus_totaux,
+        "mensualites_totales": mensualites_totales,
+        "taux_endettement": taux_endettement,
+        "taux_effort": taux_effort,
+        "reste_a_vivre": reste_a_vivre,
+        "financable": (taux_endettement <= SEUIL_ENDETTEMENT) & (reste_a_vivre >= base.reste_min),
+    }
+
+
+@functools.lru_cache(maxsize=4096)
+def seuil_axe(base: BaseWhatIf, valeurs: Tuple[Optional[float], ...], axe: str, debut: float, fin: float, pas: float) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Plus petite et plus grande valeur finançable de l'axe `axe` (les autres paramètres fixés),
+    évaluées sur toutes les positions du curseur en un appel vectorisé.
+
+    Mis en cache par valeurs exactes (la position de l'axe lui-même est hors de la clé, à None) :
+    déplacer un curseur ne recalcule pas sa propre limite, et revenir sur une position déjà
+    vue ne coûte qu'une recherche.
+    """
+    options = np.arange(debut, fin + pas / 2, pas)
+    parametres = dict(zip(PARAMETRES, valeurs))
+    parametres[axe] = options
+    financable = ratios_what_if(base, **parametres)["financable"]
+    if not financable.any():
+        return None, None
+    positions = np.flatnonzero(financable)
+    return float(options[positions[0]]), float(options[positions[-1]])
+
+
+# (libellé, format, début, fin, pas, seuil affiché : "max" ou "min")
+def _axes(projet: NouveauProjet) -> dict:
+    prix_max = float(max(2 * projet.prix_bien, 100_000))
+    return {
+        "prix_bien": ("Prix du bien (€)", "%d €", 10_000.0, prix_max, 1000.0, "max"),
+        "apport": ("Apport (€)", "%d €", 0.0, prix_max, 1000.0, "min"),
+        "taux_nominal": ("Taux nominal (%)", "%.2f %%", 0.0, float(max(8.0, projet.taux_nominal)), 0.05, "max"),
+        "duree_annees": ("Durée (années)", "%d ans", 5.0, 30.0, 1.0, "min"),
+        "loyer_attendu": ("Loyer attendu (€)", "%d €", 0.0, float(max(3 * projet.loyer_attendu, 2000.0)), 10.0, "min"),
+    }
+
+
+def afficher_what_if(situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet]):
+    """
+    Mode « et si ? » : curseurs sur les paramètres du projet, ratios et verdict mis à jour en direct.
+
+    À appeler dans un fragment : un mouvement de curseur ne réexécute que cette section.
+    Le curseur Streamlit n'envoie sa valeur qu'à la fin du glissement (anti-rebond côté
+    navigateur) ; les positions déjà vues sont servies par le cache de `seuil_axe`.
+    """
+    st.header("🎚️ Et si ? Ajustement en direct")
+    if not projet:
+        st.warning("⚠️ Aucun projet défini. Veuillez d'abord renseigner un projet immobilier.")
+        return
+    if not st.toggle("Ajuster le projet avec des curseurs", key="toggle_what_if"):
+        return
+
+    axes = _axes(projet)
+    # Curseurs repositionnés sur le projet à chaque nouveau calcul (ou sur demande)
+    empreinte = cle_entrees(projet)
+    reinitialiser = st.button("↺ Revenir au projet calculé", key="what_if_reinitialiser")
+    if reinitialiser or st.session_state.get("what_if_projet") != empreinte:
+        for nom in PARAMETRES:
+            _, _, debut, fin, _, _ = axes[nom]
+            st.session_state[f"what_if_{nom}"] = min(max(float(getattr(projet, nom)), debut), fin)
+        st.session_state["what_if_projet"] = empreinte
+
+    valeurs = {}
+    colonnes = st.columns(len(PARAMETRES))
+    for colonne, nom in zip(colonnes, PARAMETRES):
+        libelle, format_, debut, fin, pas, _ = axes[nom]
+        with colonne:
+            valeurs[nom] = st.slider(libelle, debut, fin, step=pas, format=format_, key=f"what_if_{nom}")
+
+    base = base_what_if(situation, premier_bien)
+    ratios = {cle: float(valeur) for cle, valeur in ratios_what_if(base, **valeurs).items()}
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Mensualité", f"{ratios['mensualite_nouveau']:,.0f} €")
+    with col2:
+        st.metric("Taux d'endettement", f"{ratios['taux_endettement'] * 100:.1f} %")
+    with col3:
+        st.metric("Taux d'effort", f"{ratios['taux_effort'] * 100:.1f} %")
+    with col4:
+        st.metric("Reste à vivre", f"{ratios['reste_a_vivre']:,.0f} €")
+
+    if ratios["financable"]:
+        st.success("🎉 **Finançable** avec ces paramètres (endettement ≤ 35% et reste à vivre suffisant).")
+    else:
+        st.error("⚠️ **Risque de refus** avec ces paramètres.")
+
+    # Marge de chaque curseur, les autres restant à leur position
+    limites = []
+    for nom in PARAMETRES:
+        libelle, format_, debut, fin, pas, sens = axes[nom]
+        autres = tuple(None if autre == nom else float(valeurs[autre]) for autre in PARAMETRES)
+        minimum, maximum = seuil_axe(base, autres, nom, debut, fin, pas)
+        seuil = maximum if sens == "max" else minimum
+        if seuil is None:
+            limites.append(f"{libelle} : aucune valeur finançable")
+        else:
+            limites.append(f"{libelle} : {'au plus' if sens == 'max' else 'au moins'} {format_ % seuil}")
+    st.caption("Limites de financement, les autres curseurs restant fixés : " + " · ".join(limites))
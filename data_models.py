@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date
 
@@ -24,8 +24,25 @@ class SituationActuelle(BaseModel):
     porteurs: list[PorteurProjet] = []  # porteurs du projet
 
 class NouveauProjet(BaseModel):
-    prix_bien: float
-    apport: float
+    prix_bien: float = Field(ge=0)
+    apport: float = Field(ge=0)
     taux_nominal: float  # en %
-    duree_annees: int
-    loyer_attendu: float = 0  # 0 si résidence principale
\ No newline at end of file
+    duree_annees: int = Field(ge=1)  # pas de projet : `projet` absent, pas une durée nulle
+    loyer_attendu: float = 0  # 0 si résidence principale
+
+class PretImmobilier(BaseModel):
+    capital_emprunte: float = Field(ge=0)
+    taux_nominal: float  # en %
+    duree_annees: int = Field(ge=1)
+    date_debut: Optional[date] = None  # première échéance ; None : le prêt démarre avec la projection
+
+class BienPortefeuille(BaseModel):
+    nom: str
+    valeur_actuelle: float  # valeur estimée du bien aujourd'hui
+    loyer_mensuel: float = 0  # 0 si résidence principale ou bien vacant
+    charges_mensuelles: Optional[float] = None  # None : forfait propriétaire (0,3% de la valeur par mois)
+    prets: list[PretImmobilier] = []
+
+class Portefeuille(BaseModel):
+    situation: SituationActuelle
+    biens: list[BienPortefeuille] = []
@@ -5,8 +5,15 @@ from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
+import math
 from datetime import datetime
+from actualisation import TAUX_ACTUALISATION, tri_et_van
+from amortissement import amortissement_annuel
+from calculs import est_financable
+from instrumentation import chronometre
+from projection_batch import projection_rentabilite_batch
 
+@chronometre("pdf_generation")
 def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None, analyse_ia=None):
     """Génère un PDF avec les résultats de la simulation."""
 
@@ -46,36 +53,31 @@ def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None,
     elements.append(Paragraph("💰 Situation Financière", heading_style))
 
     data_situation = [
-        ['Revenus salaires mensuels', f"{resultats['revenus_salaires']:.0f} €"],
-        ['Revenus locatifs mensuels', f"{resultats['revenus_locatifs']:.0f} €"],
-        ['Revenus totaux mensuels', f"{resultats['revenus_totaux']:.0f} €"],
-        ['Mensualités autres crédits', f"{resultats['mensualites_autres_credits']:.0f} €"],
+        ['Revenus salaires mensuels', f"{resultats.revenus_salaires:.0f} €"],
+        ['Revenus locatifs mensuels', f"{resultats.revenus_locatifs:.0f} €"],
+        ['Revenus totaux mensuels', f"{resultats.revenus_totaux:.0f} €"],
+        ['Mensualités autres crédits', f"{resultats.mensualites_autres_credits:.0f} €"],
     ]
 
     if premier_bien:
-        # Calculer la mensualité du premier bien si elle n'existe pas dans les résultats
-        mensualite_premier = resultats.get('mensualite_premier_bien', premier_bien.mensualite_actuelle)
+        mensualite_premier = resultats.mensualite_premier_bien
         data_situation.append(['Mensualité premier bien', f"{mensualite_premier:.0f} €"])
         
         # Ajouter la date du premier achat
         if hasattr(premier_bien, 'date_achat') and premier_bien.date_achat:
             data_situation.append(['Date du premier achat', premier_bien.date_achat.strftime('%d/%m/%Y')])
         
-        # Ajouter l'ancienneté du prêt si disponible dans les résultats
-        if 'anciennete_pret_annees' in resultats and resultats['anciennete_pret_annees'] is not None:
-            data_situation.append(['Ancienneté du prêt', f"{resultats['anciennete_pret_annees']:.1f} ans"])
-        
-        # Ajouter la durée restante si disponible
-        if 'duree_restante_annees' in resultats and resultats['duree_restante_annees'] is not None:
-            data_situation.append(['Durée restante', f"{resultats['duree_restante_annees']:.1f} ans"])
+        # Ancienneté et durée restante du prêt
+        data_situation.append(['Ancienneté du prêt', f"{resultats.anciennete_pret_annees:.1f} ans"])
+        data_situation.append(['Durée restante', f"{resultats.duree_restante_annees:.1f} ans"])
 
 
     if projet:
-        mensualite_nouveau = resultats.get('mensualite_nouveau', 0)
+        mensualite_nouveau = resultats.mensualite_nouveau
         if mensualite_nouveau > 0:
             data_situation.append(['Mensualité nouveau projet', f"{mensualite_nouveau:.0f} €"])
 
-    data_situation.append(['Total mensualités', f"{resultats['mensualites_totales']:.0f} €"])
+    data_situation.append(['Total mensualités', f"{resultats.mensualites_totales:.0f} €"])
 
     table_situation = Table(data_situation, colWidths=[8*cm, 4*cm])
     table_situation.setStyle(TableStyle([
@@ -95,9 +97,9 @@ def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None,
     # Indicateurs clés
     elements.append(Paragraph("📊 Indicateurs Clés", heading_style))
 
-    taux_endettement_pct = resultats['taux_endettement'] * 100
-    taux_effort_pct = resultats['taux_effort'] * 100
-    reste_a_vivre = resultats['reste_a_vivre']
+    taux_endettement_pct = resultats.taux_endettement * 100
+    taux_effort_pct = resultats.taux_effort * 100
+    reste_a_vivre = resultats.reste_a_vivre
     reste_min = 800 * situation.personnes_foyer
 
     # Déterminer les statuts
@@ -139,11 +141,19 @@ def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None,
             ['Capital emprunté', f"{capital_emprunte:.0f} €"],
             ['Taux nominal', f"{projet.taux_nominal:.2f}%"],
             ['Durée du prêt', f"{projet.duree_annees} ans"],
-            ['Mensualité calculée', f"{resultats.get('mensualite_nouveau', 0):.0f} €"],
+            ['Mensualité calculée', f"{resultats.mensualite_nouveau:.0f} €"],
         ]
 
         if projet.loyer_attendu > 0:
             data_projet.append(['Loyer attendu', f"{projet.loyer_attendu:.0f} €"])
+            # Rendement sur la durée du prêt, revente du bien à l'échéance comprise
+            projection = projection_rentabilite_batch(projet.model_dump(), projet.duree_annees,
+                                                      indicateurs=["cash_flow_net", "valorisation_bien", "capital_restant"])
+            rendement = tri_et_van(projection, projet.apport)
+            tri_projet, van_projet = rendement["tri"][0], rendement["van"][0]
+            data_projet.append([f"TRI sur {projet.duree_annees} ans (revente incluse)",
+                                "n/d" if math.isnan(tri_projet) else f"{tri_projet * 100:.2f}%"])
+            data_projet.append([f"VAN à {TAUX_ACTUALISATION * 100:.0f}%", f"{van_projet:.0f} €"])
 
         table_projet = Table(data_projet, colWidths=[8*cm, 4*cm])
         table_projet.setStyle(TableStyle([
@@ -158,21 +168,58 @@ def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None,
         elements.append(table_projet)
         elements.append(Spacer(1, 20))
 
+        # Plan d'amortissement synthétique (une ligne par année)
+        if capital_emprunte > 0:
+            elements.append(Paragraph("📉 Plan d'Amortissement (synthèse annuelle)", heading_style))
+
+            amortissement = amortissement_annuel(capital_emprunte, projet.taux_nominal, projet.duree_annees)
+            data_amortissement = [['Année', 'Annuité', 'Intérêts', 'Capital remboursé', 'Capital restant']]
+            for idx, annee in enumerate(amortissement['annee']):
+                data_amortissement.append([
+                    f"{annee}",
+                    f"{amortissement['annuite'][0, idx]:.0f} €",
+                    f"{amortissement['interets'][0, idx]:.0f} €",
+                    f"{amortissement['capital_rembourse'][0, idx]:.0f} €",
+                    f"{amortissement['capital_restant'][0, idx]:.0f} €",
+                ])
+            data_amortissement.append([
+                'Total',
+                f"{amortissement['annuite'].sum():.0f} €",
+                f"{amortissement['interets'].sum():.0f} €",
+                f"{amortissement['capital_rembourse'].sum():.0f} €",
+                '',
+            ])
+
+            table_amortissement = Table(data_amortissement, colWidths=[2*cm, 3*cm, 3*cm, 3.5*cm, 3.5*cm], repeatRows=1)
+            table_amortissement.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+
+            elements.append(table_amortissement)
+            elements.append(Spacer(1, 20))
+
     # Détail par porteur si applicable
-    if resultats.get('details_porteurs'):
+    if resultats.details_porteurs:
         elements.append(Paragraph("👥 Détail par Porteur du Projet", heading_style))
 
-        for detail in resultats['details_porteurs']:
-            elements.append(Paragraph(f"• {detail['nom']} - {detail['pourcentage']}% du projet", styles['Normal']))
+        for detail in resultats.details_porteurs:
+            elements.append(Paragraph(f"• {detail.nom} - {detail.pourcentage}% du projet", styles['Normal']))
 
             data_porteur = [
-                ['Revenus salaires', f"{detail['revenus_salaires']:.0f} €"],
-                ['Revenus locatifs', f"{detail['revenus_locatifs']:.0f} €"],
-                ['Revenus totaux', f"{detail['revenus_totaux']:.0f} €"],
-                ['Mensualités totales', f"{detail['mensualites_totales']:.0f} €"],
-                ['Taux d\'endettement', f"{detail['taux_endettement']*100:.1f}%"],
-                ['Taux d\'effort', f"{detail['taux_effort']*100:.1f}%"],
-                ['Reste à vivre', f"{detail['reste_a_vivre']:.0f} €"],
+                ['Revenus salaires', f"{detail.revenus_salaires:.0f} €"],
+                ['Revenus locatifs', f"{detail.revenus_locatifs:.0f} €"],
+                ['Revenus totaux', f"{detail.revenus_totaux:.0f} €"],
+                ['Mensualités totales', f"{detail.mensualites_totales:.0f} €"],
+                ['Taux d\'endettement', f"{detail.taux_endettement*100:.1f}%"],
+                ['Taux d\'effort', f"{detail.taux_effort*100:.1f}%"],
+                ['Reste à vivre', f"{detail.reste_a_vivre:.0f} €"],
             ]
 
             table_porteur = Table(data_porteur, colWidths=[8*cm, 4*cm])
@@ -214,8 +261,7 @@ def generer_pdf_simulation(resultats, situation, premier_bien=None, projet=None,
     # Verdict final
     elements.append(Paragraph("🎯 Verdict Final", heading_style))
 
-    if (resultats['taux_endettement'] <= 0.35 and 
-        resultats['reste_a_vivre'] >= reste_min):
+    if est_financable(resultats, situation.personnes_foyer):
         verdict_text = "✅ PROJET FINANÇABLE - Votre projet respecte les critères bancaires habituels."
         verdict_color = colors.darkgreen
     else:
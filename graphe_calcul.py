@@ -0,0 +1,116 @@
+"""
+Graphe de dépendances explicite entre les entrées de la simulation (situation, premier bien,
+projet...) et les valeurs dérivées (ratios, projection, figures, PDF).
+
+Chaque nœud garde sa dernière valeur et les versions des dépendances qui l'ont produite :
+une valeur n'est recalculée que si l'une de ses entrées a réellement changé (empreinte
+différente), et seulement au moment où elle est demandée. Un graphe par session Streamlit.
+"""
+from collections import Counter
+from datetime import date
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from cache_calculs import calcul_ratios_en_cache, cle_entrees
+from instrumentation import chrono
+
+
+class GrapheCalcul:
+    """Entrées versionnées par empreinte et règles de calcul paresseuses, recalculées à la demande."""
+
+    def __init__(self):
+        self._regles: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self._entrees: Dict[str, Tuple[object, str]] = {}  # nom -> (valeur, empreinte)
+        self._versions: Dict[str, int] = {}
+        self._valeurs: Dict[str, Tuple[object, tuple]] = {}  # nom -> (valeur, versions des dépendances)
+        self.recalculs = Counter()
+
+    def regle(self, nom: str, dependances: Sequence[str], fonction: Callable):
+        """Déclare `nom = fonction(*dependances)`."""
+        self._regles[nom] = (fonction, tuple(dependances))
+        self._valeurs.pop(nom, None)
+
+    def definir(self, nom: str, valeur, empreinte: Optional[str] = None) -> bool:
+        """Fixe une entrée ; retourne True si elle a changé (ses dépendants seront recalculés)."""
+        empreinte = empreinte if empreinte is not None else cle_entrees(valeur)
+        ancienne = self._entrees.get(nom)
+        if ancienne is not None and ancienne[1] == empreinte:
+            return False
+        self._entrees[nom] = (valeur, empreinte)
+        self._versions[nom] = self._versions.get(nom, 0) + 1
+        return True
+
+    def est_defini(self, nom: str) -> bool:
+        """True si l'entrée `nom` a reçu une valeur."""
+        return nom in self._entrees
+
+    def _version(self, nom: str) -> int:
+        if nom in self._regles:
+            self.obtenir(nom)
+        return self._versions.get(nom, 0)
+
+    def obtenir(self, nom: str):
+        """Valeur du nœud, recalculée seulement si une dépendance a changé depuis le dernier calcul."""
+        if nom in self._entrees:
+            return self._entrees[nom][0]
+        if nom not in self._regles:
+            raise KeyError(f"Nœud inconnu : {nom}")
+        fonction, dependances = self._regles[nom]
+        versions = tuple(self._version(dependance) for dependance in dependances)
+        memorise = self._valeurs.get(nom)
+        if memorise is not None and memorise[1] == versions:
+            return memorise[0]
+        with chrono(f"graphe_{nom}"):
+            valeur = fonction(*(self.obtenir(dependance) for dependance in dependances))
+        self._valeurs[nom] = (valeur, versions)
+        self._versions[nom] = self._versions.get(nom, 0) + 1
+        self.recalculs[nom] += 1
+        return valeur
+
+    def perimes(self) -> list:
+        """Nœuds calculés dont une dépendance a changé depuis (sans les recalculer)."""
+        perimes = []
+        for nom, (_, dependances) in self._regles.items():
+            memorise = self._valeurs.get(nom)
+            if memorise is None or any(d in perimes for d in dependances) or memorise[1] != tuple(
+                    self._versions.get(d, 0) for d in dependances):
+                perimes.append(nom)
+        return perimes
+
+
+def _projection(situation, premier_bien, projet, ratios, options):
+    from dashboard_rentabilite import calculer_projection_rentabilite_en_cache
+    annees, mensuelle = options
+    return calculer_projection_rentabilite_en_cache(situation, premier_bien, projet, ratios, annees, mensuelle)
+
+
+def _figure_patrimoine(projection):
+    from dashboard_rentabilite import figure_patrimoine
+    return figure_patrimoine(projection) if projection is not None else None
+
+
+def _figure_sensibilite(situation, premier_bien, projet, axes):
+    from dashboard_sensibilite import figure_sensibilite
+    return figure_sensibilite(situation, premier_bien, projet, *axes)
+
+
+def _pdf(ratios, situation, premier_bien, projet, analyse_ia):
+    from export_pdf import generer_pdf_simulation
+    return generer_pdf_simulation(ratios, situation, premier_bien, projet, analyse_ia).getvalue()
+
+
+def creer_graphe_simulation() -> GrapheCalcul:
+    """
+    Graphe de l'application. Entrées : situation, premier_bien, projet (figés au clic sur
+    « Calculer »), jour (l'ancienneté du prêt en dépend), options_projection (horizon en
+    années, résolution mensuelle), axes_sensibilite, analyse_ia.
+    """
+    graphe = GrapheCalcul()
+    graphe.definir("jour", date.today())
+    graphe.definir("analyse_ia", None)
+    graphe.definir("options_projection", (10, False))
+    graphe.regle("ratios", ("situation", "premier_bien", "projet", "jour"),
+                 lambda situation, premier_bien, projet, _: calcul_ratios_en_cache(situation, premier_bien, projet))
+    graphe.regle("projection", ("situation", "premier_bien", "projet", "ratios", "options_projection"), _projection)
+    graphe.regle("figure_patrimoine", ("projection",), _figure_patrimoine)
+    graphe.regle("figure_sensibilite", ("situation", "premier_bien", "projet", "axes_sensibilite"), _figure_sensibilite)
+    graphe.regle("pdf", ("ratios", "situation", "premier_bien", "projet", "analyse_ia"), _pdf)
+    return graphe
@@ -0,0 +1,194 @@
+"""
+Instrumentation des temps de calcul : chronomètres nommés autour des étapes coûteuses
+(modèles, ratios, projections, figures, PDF, IA), agrégés en histogrammes par processus
+et par session, exportables au format texte Prometheus ou en JSON lines.
+
+Sans collecte active (hors app.py), un chronomètre ne fait qu'alimenter le registre
+du processus, pour quelques microsecondes par étape.
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Bornes supérieures des classes d'histogramme (secondes), à la manière de Prometheus
+BORNES_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+NOM_METRIQUE = "immosimu_etape_duree_secondes"
+
+
+class Histogramme:
+    """Nombre de mesures, somme, maximum et effectifs par classe de durée."""
+
+    def __init__(self, bornes=BORNES_S):
+        self.bornes = bornes
+        self.effectifs = [0] * (len(bornes) + 1)  # dernière classe : au-delà de la plus grande borne
+        self.nombre = 0
+        self.somme = 0.0
+        self.maximum = 0.0
+
+    def ajouter(self, duree: float):
+        index = 0
+        while index < len(self.bornes) and duree > self.bornes[index]:
+            index += 1
+        self.effectifs[index] += 1
+        self.nombre += 1
+        self.somme += duree
+        self.maximum = max(self.maximum, duree)
+
+    def quantile(self, q: float) -> float:
+        """Quantile approché : borne supérieure de la classe qui le contient."""
+        if not self.nombre:
+            return 0.0
+        rang = q * self.nombre
+        cumul = 0
+        for borne, effectif in zip(self.bornes, self.effectifs):
+            cumul += effectif
+            if cumul >= rang:
+                return min(borne, self.maximum)
+        return self.maximum
+
+    def en_dict(self) -> dict:
+        return {
+            "nombre": self.nombre,
+            "somme_s": self.somme,
+            "moyenne_s": self.somme / self.nombre if self.nombre else 0.0,
+            "max_s": self.maximum,
+            "p50_s": self.quantile(0.5),
+            "p90_s": self.quantile(0.9),
+            "classes": dict(zip([*map(str, self.bornes), "+Inf"], self.effectifs)),
+        }
+
+
+class Registre:
+    """Histogrammes par nom d'étape, thread-safe (un par processus, un par session)."""
+
+    def __init__(self):
+        self._histogrammes: Dict[str, Histogramme] = {}
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom: str, duree: float):
+        with self._verrou:
+            histogramme = self._histogrammes.get(nom)
+            if histogramme is None:
+                histogramme = self._histogrammes[nom] = Histogramme()
+            histogramme.ajouter(duree)
+
+    def instantane(self) -> Dict[str, dict]:
+        with self._verrou:
+            return {nom: h.en_dict() for nom, h in sorted(self._histogrammes.items())}
+
+    def vider(self):
+        with self._verrou:
+            self._histogrammes.clear()
+
+    def exporter_prometheus(self, etiquettes: Optional[dict] = None) -> str:
+        """Format d'exposition texte de Prometheus (histogramme cumulatif par étape)."""
+        extra = "".join(f',{cle}="{valeur}"' for cle, valeur in (etiquettes or {}).items())
+        lignes = [f"# HELP {NOM_METRIQUE} Durée des étapes de calcul du simulateur",
+                  f"# TYPE {NOM_METRIQUE} histogram"]
+        with self._verrou:
+            for nom, h in sorted(self._histogrammes.items()):
+                cumul = 0
+                for borne, effectif in zip([*map(str, h.bornes), "+Inf"], h.effectifs):
+                    cumul += effectif
+                    lignes.append(f'{NOM_METRIQUE}_bucket{{etape="{nom}"{extra},le="{borne}"}} {cumul}')
+                lignes.append(f'{NOM_METRIQUE}_sum{{etape="{nom}"{extra}}} {h.somme!r}')
+                lignes.append(f'{NOM_METRIQUE}_count{{etape="{nom}"{extra}}} {h.nombre}')
+        return "\n".join(lignes) + "\n"
+
+    def exporter_jsonl(self, **champs) -> str:
+        """Une ligne JSON par étape, complétée des `champs` fournis (horodatage, session...)."""
+        horodatage = time.time()
+        return "".join(json.dumps({"horodatage": horodatage, **champs, "etape": nom, **stats}, ensure_ascii=False) + "\n"
+                       for nom, stats in self.instantane().items())
+
+
+# Registre commun à tout le processus (toutes sessions, API, CLI)
+REGISTRE_PROCESSUS = Registre()
+
+
+class Collecte:
+    """Étapes chronométrées d'une exécution (un rerun de app.py), dans l'ordre et avec leur imbrication."""
+
+    def __init__(self, registre_session: Optional[Registre] = None):
+        self.registre_session = registre_session
+        self.etapes: List[dict] = []
+        self.debut = time.perf_counter()
+        self.duree_totale: Optional[float] = None
+        self._profondeur = 0
+
+    def ouvrir(self, nom: str) -> int:
+        self.etapes.append({"etape": nom, "duree_s": None, "profondeur": self._profondeur})
+        self._profondeur += 1
+        return len(self.etapes) - 1
+
+    def fermer(self, index: int, duree: float):
+        self._profondeur -= 1
+        self.etapes[index]["duree_s"] = duree
+        if self.registre_session is not None:
+            self.registre_session.enregistrer(self.etapes[index]["etape"], duree)
+
+    def en_jsonl(self, **champs) -> str:
+        return json.dumps({"horodatage": time.time(), **champs, "duree_totale_s": self.duree_totale,
+                           "etapes": self.etapes}, ensure_ascii=False) + "\n"
+
+
+_collecte_courante: ContextVar[Optional[Collecte]] = ContextVar("collecte_courante", default=None)
+
+
+def demarrer_collecte(registre_session: Optional[Registre] = None) -> Collecte:
+    """Ouvre la collecte du rerun en cours : les chronomètres suivants s'y ajoutent."""
+    collecte = Collecte(registre_session)
+    _collecte_courante.set(collecte)
+    return collecte
+
+
+def terminer_collecte(nom: str = "rerun") -> Optional[Collecte]:
+    """Ferme la collecte en cours, enregistre sa durée totale sous `nom` et la retourne."""
+    collecte = _collecte_courante.get()
+    if collecte is None:
+        return None
+    _collecte_courante.set(None)
+    collecte.duree_totale = time.perf_counter() - collecte.debut
+    enregistrer(nom, collecte.duree_totale, collecte=False)
+    if collecte.registre_session is not None:
+        collecte.registre_session.enregistrer(nom, collecte.duree_totale)
+    return collecte
+
+
+def enregistrer(nom: str, duree: float, collecte: bool = True):
+    """Enregistre une durée mesurée ailleurs (thread d'arrière-plan, flux IA...)."""
+    REGISTRE_PROCESSUS.enregistrer(nom, duree)
+    courante = _collecte_courante.get() if collecte else None
+    if courante is not None:
+        courante.fermer(courante.ouvrir(nom), duree)
+
+
+@contextmanager
+def chrono(nom: str):
+    """Chronomètre nommé : `with chrono("projection"): ...`."""
+    collecte = _collecte_courante.get()
+    index = collecte.ouvrir(nom) if collecte is not None else None
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        REGISTRE_PROCESSUS.enregistrer(nom, duree)
+        if collecte is not None:
+            collecte.fermer(index, duree)
+
+
+def chronometre(nom: str):
+    """Décorateur équivalent à `chrono` autour de chaque appel de la fonction."""
+    def decorer(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with chrono(nom):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorer
@@ -0,0 +1,43 @@
+import streamlit as st
+from typing import Optional
+from instrumentation import Collecte, Registre, REGISTRE_PROCESSUS
+
+
+def _tableau_histogrammes(instantane: dict) -> str:
+    lignes = ["| Étape | Appels | Moyenne | p50 | p90 | Max |", "|---|---:|---:|---:|---:|---:|"]
+    for nom, stats in instantane.items():
+        lignes.append(f"| {nom} | {stats['nombre']} | {stats['moyenne_s'] * 1000:.1f} ms | ≤ {stats['p50_s'] * 1000:.1f} ms "
+                      f"| ≤ {stats['p90_s'] * 1000:.1f} ms | {stats['max_s'] * 1000:.1f} ms |")
+    return "\n".join(lignes)
+
+
+def afficher_panneau_performance(collecte: Optional[Collecte], registre_session: Registre):
+    """
+    Panneau de diagnostic (caché par défaut) : décomposition du rerun qui vient de s'exécuter,
+    histogrammes de la session et du processus, exports Prometheus et JSON lines.
+    """
+    with st.expander("⏱️ Performance (diagnostic)", expanded=True):
+        if collecte is not None and collecte.duree_totale:
+            st.markdown(f"**Dernier rerun : {collecte.duree_totale * 1000:.0f} ms**")
+            lignes = ["| Étape | Durée | Part du rerun |", "|---|---:|---:|"]
+            for etape in collecte.etapes:
+                if etape["duree_s"] is None:
+                    continue
+                retrait = "&nbsp;" * 4 * etape["profondeur"]
+                lignes.append(f"| {retrait}{etape['etape']} | {etape['duree_s'] * 1000:.1f} ms "
+                              f"| {etape['duree_s'] / collecte.duree_totale:.0%} |")
+            st.markdown("\n".join(lignes))
+            st.caption("Le reste du temps correspond aux widgets et à l'envoi des éléments au navigateur.")
+
+        st.markdown("**Session**")
+        st.markdown(_tableau_histogrammes(registre_session.instantane()))
+        st.markdown("**Processus (toutes sessions)**")
+        st.markdown(_tableau_histogrammes(REGISTRE_PROCESSUS.instantane()))
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Exporter (Prometheus)", REGISTRE_PROCESSUS.exporter_prometheus(),
+                               file_name="metriques.prom", mime="text/plain", key="export_metriques_prometheus")
+        with col2:
+            st.download_button("Exporter (JSON lines)", REGISTRE_PROCESSUS.exporter_jsonl(),
+                               file_name="metriques.jsonl", mime="application/x-ndjson", key="export_metriques_jsonl")
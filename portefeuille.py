@@ -0,0 +1,143 @@
+"""
+Projection mois par mois d'un portefeuille de biens locatifs et de leurs prêts.
+
+Biens et prêts sont rangés en colonnes NumPy (une ligne par bien, une par prêt, chaque prêt
+rattaché à son bien par indice). La projection produit des tableaux biens × mois (loyers,
+charges, mensualités, capital restant dû, valeur, cash-flow) et leurs agrégats consolidés
+(taux d'endettement, reste à vivre, patrimoine net), sans boucle sur les biens.
+
+Mêmes hypothèses que `projection_batch` : pour un bien issu d'un `NouveauProjet`
+(`bien_depuis_projet`), les sommes sur douze mois retrouvent la projection annuelle.
+"""
+import numpy as np
+from datetime import date
+from typing import NamedTuple, Optional, Tuple
+from amortissement import capital_restant_du
+from calculs import CHARGES_PROPRIETAIRE, INFLATION_CHARGES, INFLATION_LOYERS, VALORISATION_BIEN, est_financable, totaux_situation
+from calculs_batch import DonneesColonnes, _colonne, _nombre_lignes, mensualite_credit_vec
+from data_models import BienPortefeuille, NouveauProjet, Portefeuille, PretImmobilier
+
+# Indicateurs par bien, tableaux (biens, mois) ; `consolide` en contient la somme sur les biens
+INDICATEURS_PAR_BIEN = ("loyers", "charges", "mensualites", "cash_flow", "capital_restant", "valeur")
+
+
+class ProjectionPortefeuille(NamedTuple):
+    mois: np.ndarray  # 1..M
+    par_bien: dict    # indicateur -> tableau (biens, mois)
+    consolide: dict   # indicateur -> tableau (mois,)
+
+
+def bien_depuis_projet(projet: NouveauProjet, nom: str = "Nouveau projet") -> BienPortefeuille:
+    """Bien acheté au prix du projet, financé par un prêt qui démarre avec la projection."""
+    capital = projet.prix_bien - projet.apport
+    return BienPortefeuille(
+        nom=nom,
+        valeur_actuelle=projet.prix_bien,
+        loyer_mensuel=projet.loyer_attendu,
+        prets=[PretImmobilier(capital_emprunte=capital, taux_nominal=projet.taux_nominal, duree_annees=projet.duree_annees)]
+        if capital > 0 else [],
+    )
+
+
+def colonnes_portefeuille(portefeuille: Portefeuille, aujourd_hui: Optional[date] = None) -> Tuple[dict, dict]:
+    """
+    Biens et prêts du portefeuille en colonnes, dans le format de `projection_portefeuille`.
+    L'ancienneté d'un prêt se compte en mois de 30 jours, comme dans `calcul_ratios`.
+    """
+    aujourd_hui = aujourd_hui or date.today()
+    biens = portefeuille.biens
+    prets = [(indice, pret) for indice, bien in enumerate(biens) for pret in bien.prets]
+    colonnes_biens = {
+        "valeur_actuelle": np.fromiter((b.valeur_actuelle for b in biens), np.float64, len(biens)),
+        "loyer_mensuel": np.fromiter((b.loyer_mensuel for b in biens), np.float64, len(biens)),
+        "charges_mensuelles": np.fromiter((np.nan if b.charges_mensuelles is None else b.charges_mensuelles for b in biens),
+                                          np.float64, len(biens)),
+    }
+    colonnes_prets = {
+        "bien": np.fromiter((indice for indice, _ in prets), np.intp, len(prets)),
+        "capital_emprunte": np.fromiter((p.capital_emprunte for _, p in prets), np.float64, len(prets)),
+        "taux_nominal": np.fromiter((p.taux_nominal for _, p in prets), np.float64, len(prets)),
+        "duree_annees": np.fromiter((p.duree_annees for _, p in prets), np.float64, len(prets)),
+        "mois_ecoules": np.fromiter(((aujourd_hui - p.date_debut).days // 30 if p.date_debut else 0 for _, p in prets),
+                                    np.float64, len(prets)),
+    }
+    return colonnes_biens, colonnes_prets
+
+
+def _somme_par_bien(valeurs: np.ndarray, indice_bien: np.ndarray, nombre_biens: int) -> np.ndarray:
+    """Somme des lignes de prêts (prêts × mois) par bien, en une réduction par groupe."""
+    resultat = np.zeros((nombre_biens, valeurs.shape[1]))
+    if len(indice_bien) == 0:
+        return resultat
+    if np.any(indice_bien[1:] < indice_bien[:-1]):
+        ordre = np.argsort(indice_bien, kind="stable")
+        indice_bien, valeurs = indice_bien[ordre], valeurs[ordre]
+    debuts = np.flatnonzero(np.r_[True, indice_bien[1:] != indice_bien[:-1]])
+    resultat[indice_bien[debuts]] = np.add.reduceat(valeurs, debuts, axis=0)
+    return resultat
+
+
+def projection_portefeuille(biens: DonneesColonnes, prets: DonneesColonnes, mois: int = 120,
+                            revenus_mensuels: float = 0.0, charges_mensuelles: float = 0.0,
+                            credits_mensuels: float = 0.0, personnes_foyer: int = 1) -> ProjectionPortefeuille:
+    """
+    Projette un portefeuille sur `mois` mois en une passe vectorisée.
+
+    `biens` : colonnes valeur_actuelle, loyer_mensuel, charges_mensuelles (NaN ou absente :
+    forfait propriétaire). `prets` : colonnes bien (indice du bien), capital_emprunte,
+    taux_nominal, duree_annees, mois_ecoules (échéances déjà payées ; négatif pour un prêt
+    qui démarre plus tard). Loyers et charges sont revalorisés chaque année, la valeur
+    des biens chaque mois. Revenus, charges et crédits du foyer (hors portefeuille) servent
+    au taux d'endettement, au reste à vivre et au verdict consolidés.
+    """
+    nombre_biens = _nombre_lignes(biens)
+    valeur_actuelle = _colonne(biens, "valeur_actuelle", nombre_biens)
+    loyer_mensuel = _colonne(biens, "loyer_mensuel", nombre_biens)
+    charges_saisies = (np.broadcast_to(np.asarray(biens["charges_mensuelles"], dtype=np.float64), (nombre_biens,))
+                       if "charges_mensuelles" in biens else np.full(nombre_biens, np.nan))
+    charges_base = np.where(np.isnan(charges_saisies), valeur_actuelle * CHARGES_PROPRIETAIRE, charges_saisies)
+
+    m = np.arange(1, mois + 1)
+    annee = ((m - 1) // 12)[None, :]  # 0 pendant les douze premiers mois
+    loyers = loyer_mensuel[:, None] * (1 + INFLATION_LOYERS) ** annee
+    charges = charges_base[:, None] * (1 + INFLATION_CHARGES) ** annee
+    valeur = valeur_actuelle[:, None] * (1 + VALORISATION_BIEN) ** (m[None, :] / 12)
+
+    # Prêts : échéance payée au mois m = échéances déjà payées + m
+    nombre_prets = _nombre_lignes(prets)
+    indice_bien = np.asarray(prets["bien"], dtype=np.intp) if nombre_prets else np.zeros(0, dtype=np.intp)
+    capital = _colonne(prets, "capital_emprunte", nombre_prets)[:, None]
+    taux = _colonne(prets, "taux_nominal", nombre_prets)[:, None]
+    duree = _colonne(prets, "duree_annees", nombre_prets)[:, None]
+    echeance = _colonne(prets, "mois_ecoules", nombre_prets)[:, None] + m[None, :]
+    en_cours = (echeance >= 1) & (echeance <= duree * 12)
+    mensualites_prets = np.where(en_cours, mensualite_credit_vec(capital, taux, duree), 0.0)
+    restant_prets = np.where(echeance >= 0, capital_restant_du(capital, taux, duree, echeance), 0.0)
+
+    mensualites = _somme_par_bien(mensualites_prets, indice_bien, nombre_biens)
+    par_bien = {
+        "loyers": loyers,
+        "charges": charges,
+        "mensualites": mensualites,
+        "cash_flow": loyers - mensualites - charges,
+        "capital_restant": _somme_par_bien(restant_prets, indice_bien, nombre_biens),
+        "valeur": valeur,
+    }
+
+    consolide = {cle: valeurs.sum(axis=0) for cle, valeurs in par_bien.items()}
+    revenus_totaux = revenus_mensuels + consolide["loyers"]
+    mensualites_totales = consolide["mensualites"] + credits_mensuels
+    with np.errstate(divide="ignore", invalid="ignore"):
+        consolide["taux_endettement"] = np.where(revenus_totaux > 0, mensualites_totales / revenus_totaux, 0.0)
+    consolide["reste_a_vivre"] = revenus_totaux - mensualites_totales - charges_mensuelles
+    consolide["cash_flow_cumule"] = np.cumsum(consolide["cash_flow"])
+    consolide["patrimoine_net"] = consolide["valeur"] - consolide["capital_restant"]
+    consolide["financable"] = est_financable(consolide, personnes_foyer)
+    return ProjectionPortefeuille(m, par_bien, consolide)
+
+
+def projeter_portefeuille(portefeuille: Portefeuille, mois: int = 120, aujourd_hui: Optional[date] = None) -> ProjectionPortefeuille:
+    """Projection d'un `Portefeuille` (modèles pydantic), revenus du foyer compris."""
+    biens, prets = colonnes_portefeuille(portefeuille, aujourd_hui)
+    revenus, charges, credits = totaux_situation(portefeuille.situation)
+    return projection_portefeuille(biens, prets, mois, revenus, charges, credits, portefeuille.situation.personnes_foyer)
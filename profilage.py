@@ -0,0 +1,185 @@
+"""
+Profilage à la demande des reruns Streamlit et des simulations en lot, sans redéploiement.
+
+Deux modes :
+- « cprofile » : profil déterministe, un fichier `.prof` par exécution
+  (à ouvrir avec `python -m pstats`, snakeviz ou tuna) ;
+- « echantillons » : échantillonnage de la pile toutes les quelques millisecondes,
+  un fichier `.folded` par exécution (piles repliées, pour flamegraph.pl ou speedscope).
+  Surcoût faible et indépendant du nombre d'appels : adapté à la production.
+
+Activation : variable d'environnement PROFILAGE=cprofile|echantillons (toutes les
+exécutions), paramètre d'URL `?profil=cprofile|echantillons` (une session), ou option
+`--profil` des scripts en lot. Les fichiers sont écrits dans PROFILAGE_DOSSIER
+(`.cache/profils` par défaut) ; les plus anciens sont supprimés au-delà de
+PROFILAGE_TAILLE_MAX octets (100 Mo par défaut).
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import MutableMapping, Optional
+
+MODES = ("cprofile", "echantillons")
+
+DOSSIER_PAR_DEFAUT = os.getenv("PROFILAGE_DOSSIER", ".cache/profils")
+TAILLE_MAX_PAR_DEFAUT = int(os.getenv("PROFILAGE_TAILLE_MAX", 100 * 1024 * 1024))  # 100 Mo
+INTERVALLE_ECHANTILLONS_S = float(os.getenv("PROFILAGE_INTERVALLE", 0.005))
+
+# Un seul profil cProfile à la fois par processus (Python 3.12+ refuse deux profileurs
+# actifs) : une exécution concurrente n'est alors simplement pas profilée.
+_verrou_cprofile = threading.Lock()
+
+
+def mode_actif(demande: Optional[str] = None) -> Optional[str]:
+    """Mode de profilage retenu : celui demandé (URL, option), sinon la variable PROFILAGE."""
+    mode = (demande or os.getenv("PROFILAGE") or "").strip().lower()
+    if mode in ("1", "oui", "true"):
+        return "cprofile"
+    return mode if mode in MODES else None
+
+
+def faire_tourner(dossier: Path, taille_max: int):
+    """Supprime les profils les plus anciens jusqu'à repasser sous `taille_max` octets."""
+    fichiers = []
+    for chemin in dossier.glob("*"):
+        if chemin.suffix in (".prof", ".folded"):
+            try:
+                infos = chemin.stat()
+            except FileNotFoundError:  # supprimé entre-temps par un autre processus
+                continue
+            fichiers.append((infos.st_mtime, infos.st_size, chemin))
+    total = sum(taille for _, taille, _ in fichiers)
+    for _, taille, chemin in sorted(fichiers):
+        if total <= taille_max:
+            break
+        chemin.unlink(missing_ok=True)
+        total -= taille
+
+
+class _Echantillonneur:
+    """Relève la pile d'un thread à intervalle régulier et compte les piles repliées."""
+
+    def __init__(self, thread_id: int, intervalle: float):
+        self.thread_id = thread_id
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, name="profilage-echantillons", daemon=True)
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            cadre = sys._current_frames().get(self.thread_id)
+            pile = []
+            while cadre is not None:
+                code = cadre.f_code
+                pile.append(f"{Path(code.co_filename).stem}:{code.co_name}:{code.co_firstlineno}")
+                cadre = cadre.f_back
+            if pile:
+                self.piles[";".join(reversed(pile))] += 1
+
+    def demarrer(self):
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        self._thread.join()
+
+    def ecrire(self, chemin: Path):
+        chemin.write_text("".join(f"{pile} {nombre}\n" for pile, nombre in self.piles.most_common()), encoding="utf-8")
+
+
+class Profil:
+    """Profilage d'une exécution : `demarrer()` puis `arreter()` écrit le fichier et fait tourner le dossier."""
+
+    def __init__(self, nom: str, mode: str, dossier: Optional[str] = None, taille_max: Optional[int] = None):
+        self.nom = re.sub(r"[^\w.-]", "_", nom)
+        self.mode = mode
+        self.dossier = Path(dossier or DOSSIER_PAR_DEFAUT)
+        self.taille_max = TAILLE_MAX_PAR_DEFAUT if taille_max is None else taille_max
+        self.chemin: Optional[Path] = None
+        self._profileur = None
+        self._debut = None
+
+    def demarrer(self) -> bool:
+        """Retourne False si le profilage n'a pas pu démarrer (profil cProfile déjà actif)."""
+        if self.mode == "cprofile":
+            if not _verrou_cprofile.acquire(blocking=False):
+                return False
+            self._profileur = cProfile.Profile()
+            self._profileur.enable()
+        else:
+            self._profileur = _Echantillonneur(threading.get_ident(), INTERVALLE_ECHANTILLONS_S)
+            self._profileur.demarrer()
+        self._debut = time.perf_counter()
+        return True
+
+    def arreter(self) -> Optional[Path]:
+        if self._profileur is None:
+            return None
+        duree_ms = (time.perf_counter() - self._debut) * 1000
+        if self.mode == "cprofile":
+            self._profileur.disable()
+            _verrou_cprofile.release()
+        else:
+            self._profileur.arreter()
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        horodatage = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        extension = ".prof" if self.mode == "cprofile" else ".folded"
+        self.chemin = self.dossier / f"{horodatage}_{self.nom}_{os.getpid()}_{duree_ms:.0f}ms{extension}"
+        if self.mode == "cprofile":
+            self._profileur.dump_stats(self.chemin)
+        else:
+            self._profileur.ecrire(self.chemin)
+        self._profileur = None
+        faire_tourner(self.dossier, self.taille_max)
+        return self.chemin
+
+
+@contextmanager
+def profiler(nom: str, mode: Optional[str] = None, dossier: Optional[str] = None):
+    """Profile le bloc si un mode est actif (argument ou variable PROFILAGE), sinon ne fait rien."""
+    mode = mode_actif(mode)
+    profil = Profil(nom, mode, dossier) if mode else None
+    if profil is not None and not profil.demarrer():
+        profil = None
+    try:
+        yield profil
+    finally:
+        if profil is not None:
+            profil.arreter()
+
+
+# Clé du profil ouvert dans l'état de session : app.py n'est pas une fonction, le profil
+# démarre en tête de script et s'arrête à la fin
+CLE_PROFIL_RERUN = "_profil_rerun"
+
+
+def demarrer_profil_rerun(etat: MutableMapping, nom: str = "rerun", mode: Optional[str] = None) -> Optional[Profil]:
+    """
+    Démarre le profil du rerun si un mode est actif et le range dans `etat` (st.session_state).
+    Un profil resté ouvert par un rerun interrompu (st.rerun, exception) est d'abord clôturé.
+    """
+    precedent = etat.pop(CLE_PROFIL_RERUN, None)
+    if precedent is not None:
+        precedent.arreter()
+    mode = mode_actif(mode)
+    if not mode:
+        return None
+    profil = Profil(nom, mode)
+    if not profil.demarrer():
+        return None
+    etat[CLE_PROFIL_RERUN] = profil
+    return profil
+
+
+def arreter_profil_rerun(etat: MutableMapping) -> Optional[Path]:
+    """Arrête le profil du rerun en cours et retourne le chemin du fichier écrit."""
+    profil = etat.pop(CLE_PROFIL_RERUN, None)
+    return profil.arreter() if profil is not None else None
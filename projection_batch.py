@@ -0,0 +1,86 @@
+import numpy as np
+from typing import Optional
+from amortissement import amortissement_annuel, amortissement_mensuel
+from calculs import INFLATION_LOYERS, VALORISATION_BIEN, CHARGES_PROPRIETAIRE, INFLATION_CHARGES
+from calculs_batch import DonneesColonnes, _colonne, _nombre_lignes
+
+# Indicateurs annuels produits, dans l'ordre des colonnes de `calculer_projection_rentabilite`
+INDICATEURS_PROJECTION = [
+    "loyer_annuel",
+    "charges_annuelles",
+    "cash_flow_net",
+    "cash_flow_cumule",
+    "capital_rembourse",
+    "capital_restant",
+    "rendement_brut",
+    "rendement_net",
+    "valorisation_bien",
+    "plus_value_latente",
+    "patrimoine_net",
+    "roi_total",
+]
+
+
+def projection_rentabilite_batch(donnees: DonneesColonnes, annees: int = 10, indicateurs: Optional[list] = None,
+                                 mensuelle: bool = False) -> dict:
+    """
+    Projection de rentabilité de N projets en une passe vectorisée.
+
+    Mêmes hypothèses et mêmes indicateurs que `dashboard_rentabilite.calculer_projection_rentabilite`,
+    à partir des colonnes prix_bien, apport, taux_nominal, duree_annees et loyer_attendu.
+    Retourne un tableau (N, périodes) par indicateur ; les lignes sans projet
+    (prix_bien ou duree_annees nul) valent NaN. `indicateurs` restreint les clés retournées.
+
+    Avec `mensuelle`, une période par mois (annees × 12) : les flux (loyer_annuel,
+    charges_annuelles, cash_flow_net) sont ceux du mois, les rendements restent annualisés,
+    et la fin de chaque douzième mois retrouve la projection annuelle.
+    """
+    n = _nombre_lignes(donnees)
+    prix_bien = _colonne(donnees, "prix_bien", n)
+    apport = _colonne(donnees, "apport", n)
+    duree_annees = _colonne(donnees, "duree_annees", n)
+    loyer_mensuel = _colonne(donnees, "loyer_attendu", n)
+    projet_present = (prix_bien > 0) & (duree_annees > 0)
+
+    capital_emprunte = prix_bien - apport
+    taux_nominal = _colonne(donnees, "taux_nominal", n)
+    duree_pret = np.where(projet_present, duree_annees, 0)
+    if mensuelle:
+        amortissement = amortissement_mensuel(capital_emprunte, taux_nominal, duree_pret, annees * 12)
+        echeances, periodes_par_an = amortissement["mensualite"], 12
+    else:
+        amortissement = amortissement_annuel(capital_emprunte, taux_nominal, duree_pret, annees)
+        echeances, periodes_par_an = amortissement["annuite"], 1
+
+    periode = np.arange(1, annees * periodes_par_an + 1)[None, :]
+    annee_entamee = (periode - 1) // periodes_par_an  # 0 pendant la première année
+    p, a = prix_bien[:, None], apport[:, None]
+    loyer_annuel = loyer_mensuel[:, None] * (12 / periodes_par_an) * (1 + INFLATION_LOYERS) ** annee_entamee
+    charges_annuelles = p * CHARGES_PROPRIETAIRE * (12 / periodes_par_an) * (1 + INFLATION_CHARGES) ** annee_entamee
+    capital_restant = amortissement["capital_restant"]
+    cash_flow_net = loyer_annuel - echeances - charges_annuelles
+    cash_flow_cumule = np.cumsum(cash_flow_net, axis=1) - a
+    valorisation_bien = p * (1 + VALORISATION_BIEN) ** (periode / periodes_par_an)
+    plus_value_latente = valorisation_bien - p
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultats = {
+            "loyer_annuel": loyer_annuel,
+            "charges_annuelles": charges_annuelles,
+            "cash_flow_net": cash_flow_net,
+            "cash_flow_cumule": cash_flow_cumule,
+            "capital_rembourse": np.maximum(capital_emprunte, 0)[:, None] - capital_restant,
+            "capital_restant": capital_restant,
+            "rendement_brut": np.where(p > 0, loyer_annuel * periodes_par_an / p * 100, 0.0),
+            "rendement_net": np.where(a > 0, cash_flow_net * periodes_par_an / a * 100, 0.0),
+            "valorisation_bien": valorisation_bien,
+            "plus_value_latente": plus_value_latente,
+            "patrimoine_net": valorisation_bien - capital_restant,
+            "roi_total": np.where(a > 0, (cash_flow_cumule + plus_value_latente) / a * 100, 0.0),
+        }
+    absent = ~projet_present[:, None]
+    return {
+        cle: np.where(absent, np.nan, valeur)
+        for cle, valeur in resultats.items()
+        if indicateurs is None or cle in indicateurs
+    }
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from typing import Optional, Sequence
+from data_models import NouveauProjet
+from amortissement import amortissement_annuel
+from calculs import INFLATION_LOYERS, VALORISATION_BIEN, CHARGES_PROPRIETAIRE, INFLATION_CHARGES
+
+INDICATEURS_STOCHASTIQUES = ["patrimoine_net", "cash_flow_cumule", "roi_total"]
+
+
+class HypothesesStochastiques(BaseModel):
+    """Lois annuelles utilisées par le Monte Carlo (croissances normales, vacance exponentielle)."""
+    inflation_loyers_moyenne: float = INFLATION_LOYERS
+    inflation_loyers_ecart_type: float = 0.015
+    valorisation_moyenne: float = VALORISATION_BIEN
+    valorisation_ecart_type: float = 0.05
+    inflation_charges_moyenne: float = INFLATION_CHARGES
+    inflation_charges_ecart_type: float = 0.01
+    vacance_moyenne: float = 0.04  # part moyenne de l'année sans locataire
+
+
+class _HistogrammeQuantiles:
+    """
+    Estimation de quantiles en flux : un histogramme à pas fixe par année.
+
+    Les bornes sont fixées sur le premier lot (élargies de moitié de chaque côté) ;
+    la mémoire ne dépend que du nombre d'années et de classes, pas du nombre de chemins.
+    """
+
+    def __init__(self, annees: int, n_classes: int):
+        self.annees = annees
+        self.n_classes = n_classes
+        # Classes 0 et n_classes + 1 : valeurs hors bornes
+        self.comptes = np.zeros((annees, n_classes + 2), dtype=np.int64)
+        self.decalages = (np.arange(annees) * (n_classes + 2))[:, None]
+        self.bas = None
+        self.largeur = None
+
+    def ajouter(self, valeurs: np.ndarray):
+        """Ajoute un lot de valeurs de forme (années, chemins)."""
+        if self.bas is None:
+            mini = valeurs.min(axis=1).astype(np.float64)
+            maxi = valeurs.max(axis=1).astype(np.float64)
+            marge = (maxi - mini) / 2 + 1
+            self.bas = (mini - marge).astype(np.float32)
+            self.largeur = ((maxi - mini + 2 * marge) / self.n_classes).astype(np.float32)
+        classes = valeurs - self.bas[:, None]
+        classes /= self.largeur[:, None]
+        np.clip(classes, -1, self.n_classes, out=classes)
+        indices = classes.astype(np.int64) + 1
+        indices += self.decalages
+        self.comptes += np.bincount(indices.ravel(), minlength=self.comptes.size).reshape(self.comptes.shape)
+
+    def quantiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        """Quantiles interpolés linéairement dans la classe, de forme (percentiles, années)."""
+        resultat = np.empty((len(percentiles), self.annees))
+        cumul = np.cumsum(self.comptes, axis=1)
+        for annee in range(self.annees):
+            total = cumul[annee, -1]
+            for idx, p in enumerate(percentiles):
+                cible = p / 100 * total
+                classe = int(np.searchsorted(cumul[annee], cible))
+                classe = min(max(classe, 1), self.n_classes)
+                avant = cumul[annee, classe - 1]
+                fraction = (cible - avant) / self.comptes[annee, classe] if self.comptes[annee, classe] else 0.5
+                fraction = min(max(fraction, 0.0), 1.0)
+                resultat[idx, annee] = self.bas[annee] + (classe - 1 + fraction) * self.largeur[annee]
+        return resultat
+
+
+def _simuler_lot(rng: np.random.Generator, taille: int, annees: int, projet: NouveauProjet,
+                 hypotheses: HypothesesStochastiques, annuites: np.ndarray, capital_restant: np.ndarray):
+    """Simule un lot de chemins et retourne les indicateurs (années × chemins, float32)."""
+    aleas = rng.standard_normal((3, annees, taille), dtype=np.float32)
+
+    # Croissances annuelles ; loyers et charges démarrent à leur niveau initial en année 1
+    croissance_loyers = aleas[0]
+    croissance_loyers *= np.float32(hypotheses.inflation_loyers_ecart_type)
+    croissance_loyers += np.float32(1 + hypotheses.inflation_loyers_moyenne)
+    croissance_loyers[0] = 1
+    croissance_charges = aleas[1]
+    croissance_charges *= np.float32(hypotheses.inflation_charges_ecart_type)
+    croissance_charges += np.float32(1 + hypotheses.inflation_charges_moyenne)
+    croissance_charges[0] = 1
+    croissance_valeur = aleas[2]
+    croissance_valeur *= np.float32(hypotheses.valorisation_ecart_type)
+    croissance_valeur += np.float32(1 + hypotheses.valorisation_moyenne)
+
+    # Vacance locative : loi exponentielle de moyenne `vacance_moyenne`, plafonnée à l'année entière
+    vacance = rng.standard_exponential((annees, taille), dtype=np.float32)
+    vacance *= np.float32(-hypotheses.vacance_moyenne)
+    vacance += 1
+    np.maximum(vacance, 0, out=vacance)
+
+    loyers = np.cumprod(croissance_loyers, axis=0, out=croissance_loyers)
+    loyers *= vacance
+    loyers *= np.float32(projet.loyer_attendu * 12)
+    charges = np.cumprod(croissance_charges, axis=0, out=croissance_charges)
+    charges *= np.float32(projet.prix_bien * CHARGES_PROPRIETAIRE * 12)
+
+    loyers -= charges
+    loyers -= annuites[:, None]
+    cash_flow_cumule = np.cumsum(loyers, axis=0, out=loyers)
+    cash_flow_cumule -= np.float32(projet.apport)
+
+    valorisation = np.cumprod(croissance_valeur, axis=0, out=croissance_valeur)
+    valorisation *= np.float32(projet.prix_bien)
+
+    if projet.apport > 0:
+        roi_total = cash_flow_cumule + valorisation
+        roi_total -= np.float32(projet.prix_bien)
+        roi_total *= np.float32(100 / projet.apport)
+    else:
+        roi_total = np.zeros_like(cash_flow_cumule)
+
+    patrimoine_net = np.subtract(valorisation, capital_restant[:, None], out=valorisation)
+    return patrimoine_net, cash_flow_cumule, roi_total
+
+
+def simuler_projection_stochastique(projet: NouveauProjet, annees: int = 10, n_chemins: int = 10_000,
+                                    hypotheses: Optional[HypothesesStochastiques] = None,
+                                    graine: Optional[int] = None, percentiles: Sequence[float] = (5, 50, 95),
+                                    taille_lot: int = 10_000, n_classes: int = 4096) -> dict:
+    """
+    Projection de rentabilité Monte Carlo (loyers, valorisation, vacance et charges aléatoires).
+
+    Les chemins sont simulés par lots de `taille_lot` et agrégés au fil de l'eau dans
+    des histogrammes (`n_classes` classes par année) : la mémoire reste bornée quel
+    que soit `n_chemins`. Une même `graine` donne des résultats identiques.
+    Retourne, pour chaque indicateur de INDICATEURS_STOCHASTIQUES, un DataFrame
+    avec la colonne 'annee' et une colonne par percentile ('p5', 'p50', 'p95').
+    """
+    if n_chemins < 1 or taille_lot < 1:
+        raise ValueError(f"n_chemins et taille_lot doivent valoir au moins 1 (reçus : {n_chemins}, {taille_lot})")
+    hypotheses = hypotheses or HypothesesStochastiques()
+    rng = np.random.Generator(np.random.SFC64(graine))
+
+    # L'amortissement est déterministe : calculé une seule fois pour tous les chemins
+    amortissement = amortissement_annuel(projet.prix_bien - projet.apport, projet.taux_nominal, projet.duree_annees, annees)
+    annuites = amortissement['annuite'][0].astype(np.float32)
+    capital_restant = amortissement['capital_restant'][0].astype(np.float32)
+
+    histogrammes = {nom: _HistogrammeQuantiles(annees, n_classes) for nom in INDICATEURS_STOCHASTIQUES}
+    for debut in range(0, n_chemins, taille_lot):
+        taille = min(taille_lot, n_chemins - debut)
+        lot = _simuler_lot(rng, taille, annees, projet, hypotheses, annuites, capital_restant)
+        for nom, valeurs in zip(INDICATEURS_STOCHASTIQUES, lot):
+            histogrammes[nom].ajouter(valeurs)
+
+    bandes = {}
+    for nom, histogramme in histogrammes.items():
+        bande = pd.DataFrame({'annee': np.arange(1, annees + 1)})
+        for p, q in zip(percentiles, histogramme.quantiles(percentiles)):
+            bande[f"p{p:g}"] = q
+        bandes[nom] = bande
+    return bandes
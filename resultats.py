@@ -0,0 +1,148 @@
+"""
+Types de résultats des calculs de financement.
+
+Cas unitaire : enregistrements à slots (`ResultatRatios`, `DetailPorteur`), sans
+dictionnaire par instance, lus par attribut (`resultats.taux_endettement`) et toujours
+compatibles avec l'ancienne lecture par clé (`resultats['taux_endettement']`, `.get`, `dict(...)`).
+
+Cas en lot : `TableauRatios`, un bloc float64 contigu d'une ligne par indicateur ; chaque
+colonne est une vue sans copie, et aucune structure Python n'est allouée par foyer.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Iterator, Tuple
+
+# NumPy n'est importé que par `TableauRatios` (cas en lot) : le cas unitaire, seul
+# utilisé au premier rendu de app.py, n'en a pas besoin
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class _LectureParCle(Mapping):
+    """Accès par clé aux champs d'un enregistrement à slots (compatibilité avec les anciens dictionnaires)."""
+    __slots__ = ()
+
+    def __getitem__(self, cle: str):
+        if cle not in self.__slots__:
+            raise KeyError(cle)
+        return getattr(self, cle)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __contains__(self, cle) -> bool:
+        return cle in self.__slots__
+
+    def en_dict(self) -> dict:
+        """Dictionnaire équivalent (pour la sérialisation JSON)."""
+        return {nom: _en_valeur_simple(getattr(self, nom)) for nom in self.__slots__}
+
+
+def _en_valeur_simple(valeur):
+    if isinstance(valeur, _LectureParCle):
+        return valeur.en_dict()
+    if isinstance(valeur, tuple):
+        return [_en_valeur_simple(v) for v in valeur]
+    return valeur
+
+
+@dataclass(slots=True)
+class DetailPorteur(_LectureParCle):
+    """Ratios d'un porteur, au prorata de sa part du projet."""
+    nom: str
+    pourcentage: float
+    revenus_salaires: float
+    revenus_locatifs: float
+    revenus_totaux: float
+    mensualites_totales: float
+    taux_endettement: float
+    taux_effort: float
+    reste_a_vivre: float
+
+
+@dataclass(slots=True)
+class ResultatRatios(_LectureParCle):
+    """Résultat de `calculs.calcul_ratios` pour un foyer."""
+    revenus_salaires: float
+    revenus_locatifs: float
+    revenus_totaux: float
+    mensualite_premier_bien: float
+    mensualite_nouveau: float
+    mensualites_immobilier: float
+    mensualites_autres_credits: float
+    mensualites_totales: float
+    taux_endettement: float
+    taux_effort: float
+    reste_a_vivre: float
+    details_porteurs: Tuple[DetailPorteur, ...]
+    anciennete_pret_mois: float
+    duree_restante_mois: float
+    anciennete_pret_annees: float
+    duree_restante_annees: float
+
+
+# Indicateurs de `calcul_ratios_batch`, dans l'ordre des lignes du bloc (sans détail par porteur)
+COLONNES_RATIOS = tuple(champ.name for champ in fields(ResultatRatios) if champ.name != "details_porteurs")
+
+
+class TableauRatios(Mapping):
+    """
+    Ratios de N foyers en colonnes : un bloc float64 (indicateurs × foyers) contigu.
+
+    Se lit comme un dictionnaire de colonnes NumPy (`tableau['taux_endettement']`, `dict(tableau)`),
+    se convertit en DataFrame, en table Arrow ou en tableau structuré, et `ligne(i)`
+    reconstruit le `ResultatRatios` d'un foyer à la demande.
+    """
+    __slots__ = ("bloc", "_index")
+
+    def __init__(self, bloc: "np.ndarray"):
+        if bloc.shape[0] != len(COLONNES_RATIOS):
+            raise ValueError(f"Bloc de {bloc.shape[0]} lignes, {len(COLONNES_RATIOS)} indicateurs attendus")
+        self.bloc = bloc
+        self._index = {nom: position for position, nom in enumerate(COLONNES_RATIOS)}
+
+    @classmethod
+    def vide(cls, n: int) -> "TableauRatios":
+        import numpy as np
+        return cls(np.empty((len(COLONNES_RATIOS), n)))
+
+    def __getitem__(self, cle: str) -> "np.ndarray":
+        return self.bloc[self._index[cle]]
+
+    def __setitem__(self, cle: str, valeurs):
+        self.bloc[self._index[cle]] = valeurs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(COLONNES_RATIOS)
+
+    def __len__(self) -> int:
+        return len(COLONNES_RATIOS)
+
+    @property
+    def nombre(self) -> int:
+        """Nombre de foyers."""
+        return self.bloc.shape[1]
+
+    def ligne(self, index: int) -> ResultatRatios:
+        valeurs = dict(zip(COLONNES_RATIOS, self.bloc[:, index].tolist()))
+        return ResultatRatios(details_porteurs=(), **valeurs)
+
+    def en_structure(self) -> "np.ndarray":
+        """Tableau structuré NumPy (un enregistrement par foyer), sans dictionnaire par ligne."""
+        import numpy as np
+        structure = np.empty(self.nombre, dtype=[(nom, np.float64) for nom in COLONNES_RATIOS])
+        for nom in COLONNES_RATIOS:
+            structure[nom] = self[nom]
+        return structure
+
+    def en_dataframe(self, index=None):
+        import pandas as pd
+        return pd.DataFrame(dict(self), index=index, copy=False)
+
+    def en_arrow(self):
+        """Table Arrow (colonnes sans copie) ; nécessite pyarrow."""
+        import pyarrow
+        return pyarrow.table({nom: self[nom] for nom in COLONNES_RATIOS})
@@ -0,0 +1,139 @@
+"""
+Serveur local imitant l'API chat-completions d'OpenAI, pour tester l'analyse IA hors ligne.
+
+Latence et injection d'erreurs (429 / 500) configurables. Usage :
+
+    python serveur_mock_openai.py --port 8765 --latence 0.2 --taux-erreur 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-... streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+REPONSE_PAR_DEFAUT = (
+    "📊 **ÉVALUATION** : Projet finançable, ratios dans les normes bancaires.\n\n"
+    "✅ **POINTS CLÉS** : Bon reste à vivre ; 🔺 cash-flow négatif à surveiller.\n\n"
+    "💡 **CONSEIL PRIORITAIRE** : Négociez le taux et conservez une épargne de précaution."
+)
+
+
+class _GestionnaireMock(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # connexions persistantes (keep-alive)
+    disable_nagle_algorithm = True  # évite les 40 ms d'ACK retardé entre en-têtes et corps
+
+    def log_message(self, format, *args):  # noqa: A002 - silence des journaux par requête
+        pass
+
+    def _envoyer_json(self, statut: int, contenu: dict):
+        corps = json.dumps(contenu, ensure_ascii=False).encode()
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _envoyer_morceau(self, donnees: bytes):
+        self.wfile.write(f"{len(donnees):X}\r\n".encode() + donnees + b"\r\n")
+
+    def do_POST(self):
+        config = self.server.config
+        longueur = int(self.headers.get("Content-Length", 0))
+        requete = json.loads(self.rfile.read(longueur) or b"{}")
+        with self.server.verrou:
+            self.server.requetes += 1
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._envoyer_json(404, {"error": {"message": f"Route inconnue : {self.path}", "type": "invalid_request_error"}})
+            return
+
+        time.sleep(config["latence"] * random.uniform(1 - config["gigue"], 1 + config["gigue"]))
+
+        if random.random() < config["taux_erreur"]:
+            statut = random.choice([429, 500])
+            message = "Rate limit reached" if statut == 429 else "Internal server error"
+            self._envoyer_json(statut, {"error": {"message": message, "type": "server_error", "code": None}})
+            return
+
+        identifiant = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        cree = int(time.time())
+        modele = requete.get("model", "gpt-4o")
+        texte = config["reponse"]
+
+        if not requete.get("stream"):
+            self._envoyer_json(200, {
+                "id": identifiant,
+                "object": "chat.completion",
+                "created": cree,
+                "model": modele,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": texte}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(texte.split()), "total_tokens": len(texte.split())},
+            })
+            return
+
+        # Flux SSE, un mot par événement, en transfert par morceaux (chunked)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        mots = texte.split(" ")
+        for index, mot in enumerate(mots):
+            evenement = {
+                "id": identifiant,
+                "object": "chat.completion.chunk",
+                "created": cree,
+                "model": modele,
+                "choices": [{"index": 0, "delta": {"content": mot if index == 0 else " " + mot}, "finish_reason": None}],
+            }
+            self._envoyer_morceau(f"data: {json.dumps(evenement, ensure_ascii=False)}\n\n".encode())
+            time.sleep(config["delai_jeton"])
+        fin = {"id": identifiant, "object": "chat.completion.chunk", "created": cree, "model": modele,
+               "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self._envoyer_morceau(f"data: {json.dumps(fin)}\n\n".encode())
+        self._envoyer_morceau(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def creer_serveur_mock(hote: str = "127.0.0.1", port: int = 0, latence: float = 0.2, taux_erreur: float = 0.0,
+                       gigue: float = 0.2, delai_jeton: float = 0.01, reponse: str = REPONSE_PAR_DEFAUT) -> ThreadingHTTPServer:
+    """Crée le serveur (port 0 : port libre choisi par le système) sans le démarrer."""
+    serveur = ThreadingHTTPServer((hote, port), _GestionnaireMock)
+    serveur.daemon_threads = True
+    serveur.config = {"latence": latence, "taux_erreur": taux_erreur, "gigue": gigue,
+                      "delai_jeton": delai_jeton, "reponse": reponse}
+    serveur.verrou = threading.Lock()
+    serveur.requetes = 0
+    return serveur
+
+
+def demarrer_serveur_mock(**options) -> Tuple[ThreadingHTTPServer, str]:
+    """Démarre le serveur dans un thread et retourne (serveur, base_url) à passer au client OpenAI."""
+    serveur = creer_serveur_mock(**options)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    hote, port = serveur.server_address[:2]
+    return serveur, f"http://{hote}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latence", type=float, default=0.2, help="Latence moyenne avant réponse (s)")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="Part des requêtes répondant 429 ou 500")
+    parser.add_argument("--delai-jeton", type=float, default=0.01, help="Délai entre deux morceaux en mode flux (s)")
+    args = parser.parse_args()
+
+    serveur = creer_serveur_mock(args.hote, args.port, args.latence, args.taux_erreur, delai_jeton=args.delai_jeton)
+    print(f"Serveur mock OpenAI sur http://{args.hote}:{args.port}/v1 (Ctrl+C pour arrêter)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
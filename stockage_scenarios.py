@@ -0,0 +1,260 @@
+"""
+Historique persistant des scénarios (SQLite) : entrées, ratios de `calcul_ratios` et
+projection de rentabilité, pour retrouver et comparer des simulations d'une session à l'autre.
+
+Les ratios sont rangés en colonnes (une par champ de `ResultatRatios`) : lister et comparer
+ne décodent aucun JSON. Les entrées sont en JSON (modèles pydantic), la projection en bloc
+float64 (indicateurs × années). Index sur le foyer, la date et le verdict, départagés par
+l'id (pagination stable même à date de création égale) : lister une page
+ou comparer quelques scénarios reste en dessous de la milliseconde avec 1 million de lignes
+(voir benchmarks/bench_scenarios.py).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from calculs import est_financable
+from data_models import NouveauProjet, PremierBien, SituationActuelle
+from projection_batch import INDICATEURS_PROJECTION
+from resultats import COLONNES_RATIOS, DetailPorteur, ResultatRatios
+
+CHEMIN_PAR_DEFAUT = os.getenv("SCENARIOS_CHEMIN", ".cache/scenarios.sqlite")
+
+# Champs d'entrée recopiés en colonnes, pour la liste et la comparaison
+COLONNES_ENTREES = ("revenus_mensuels", "personnes_foyer", "prix_bien", "apport", "taux_nominal", "duree_annees", "loyer_attendu")
+
+# Colonnes retournées par `lister` (sans les entrées JSON ni la projection)
+COLONNES_LISTE = ("id", "foyer", "nom", "cree_le", "financable", "prix_bien", "apport", "taux_nominal",
+                  "duree_annees", "loyer_attendu", "mensualite_nouveau", "taux_endettement", "reste_a_vivre")
+
+_COLONNES_INSERTION = ("foyer", "nom", "cree_le", "financable", *COLONNES_ENTREES, *COLONNES_RATIOS,
+                       "details_porteurs", "entrees", "projection", "projection_annees")
+_INSERTION = (f"INSERT INTO scenarios ({', '.join(_COLONNES_INSERTION)}) "
+              f"VALUES ({', '.join('?' * len(_COLONNES_INSERTION))})")
+
+Horodatage = Union[float, date, datetime]
+
+
+class ScenarioEnregistre(NamedTuple):
+    id: int
+    foyer: str
+    nom: Optional[str]
+    cree_le: float
+    situation: SituationActuelle
+    premier_bien: Optional[PremierBien]
+    projet: Optional[NouveauProjet]
+    resultats: ResultatRatios
+    projection: Optional[dict]  # indicateur -> valeurs annuelles (np.ndarray)
+
+
+def _horodatage(valeur: Optional[Horodatage]) -> Optional[float]:
+    if valeur is None or isinstance(valeur, (int, float)):
+        return valeur
+    if not isinstance(valeur, datetime):
+        valeur = datetime(valeur.year, valeur.month, valeur.day)
+    return valeur.timestamp()
+
+
+def _bloc_projection(projection) -> Optional[bytes]:
+    """Projection (DataFrame ou colonnes) en bloc float64 indicateurs × années."""
+    if projection is None:
+        return None
+    return np.stack([np.asarray(projection[nom], dtype=np.float64) for nom in INDICATEURS_PROJECTION]).tobytes()
+
+
+def _lire_projection(bloc: Optional[bytes], annees: Optional[int]) -> Optional[dict]:
+    if bloc is None:
+        return None
+    valeurs = np.frombuffer(bloc, dtype=np.float64).reshape(len(INDICATEURS_PROJECTION), annees)
+    return dict(zip(INDICATEURS_PROJECTION, valeurs))
+
+
+class StockageScenarios:
+    """Scénarios enregistrés, un fichier SQLite partagé par les sessions du processus (thread-safe)."""
+
+    def __init__(self, chemin: str = CHEMIN_PAR_DEFAUT):
+        self.chemin = chemin
+        self._verrou = threading.Lock()
+        if chemin != ":memory:":
+            Path(chemin).parent.mkdir(parents=True, exist_ok=True)
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False, isolation_level=None)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("PRAGMA synchronous=NORMAL")
+        colonnes_ratios = ",\n".join(f"{nom} REAL NOT NULL" for nom in COLONNES_RATIOS)
+        self._connexion.execute(f"""
+            CREATE TABLE IF NOT EXISTS scenarios (
+                id INTEGER PRIMARY KEY,
+                foyer TEXT NOT NULL,
+                nom TEXT,
+                cree_le REAL NOT NULL,
+                financable INTEGER NOT NULL,
+                revenus_mensuels REAL NOT NULL,
+                personnes_foyer INTEGER NOT NULL,
+                prix_bien REAL,
+                apport REAL,
+                taux_nominal REAL,
+                duree_annees INTEGER,
+                loyer_attendu REAL,
+                {colonnes_ratios},
+                details_porteurs TEXT,
+                entrees TEXT NOT NULL,
+                projection BLOB,
+                projection_annees INTEGER
+            )
+        """)
+        # Index sans l'id des premières versions du fichier, remplacés à l'ouverture
+        for ancien in ("idx_scenarios_foyer", "idx_scenarios_date", "idx_scenarios_verdict"):
+            self._connexion.execute(f"DROP INDEX IF EXISTS {ancien}")
+        self._connexion.execute("CREATE INDEX IF NOT EXISTS idx_scenarios_foyer_date ON scenarios (foyer, cree_le, id)")
+        self._connexion.execute("CREATE INDEX IF NOT EXISTS idx_scenarios_date_id ON scenarios (cree_le, id)")
+        self._connexion.execute("CREATE INDEX IF NOT EXISTS idx_scenarios_verdict_date ON scenarios (financable, cree_le, id)")
+
+    @staticmethod
+    def _ligne(foyer: str, situation: SituationActuelle, premier_bien: Optional[PremierBien], projet: Optional[NouveauProjet],
+               resultats: ResultatRatios, projection=None, nom: Optional[str] = None, cree_le: Optional[Horodatage] = None) -> tuple:
+        entrees = json.dumps({
+            "situation": situation.model_dump(mode="json"),
+            "premier_bien": premier_bien.model_dump(mode="json") if premier_bien else None,
+            "projet": projet.model_dump(mode="json") if projet else None,
+        }, ensure_ascii=False)
+        details = json.dumps([d.en_dict() for d in resultats.details_porteurs], ensure_ascii=False) if resultats.details_porteurs else None
+        bloc = _bloc_projection(projection)
+        return (
+            foyer, nom, time.time() if cree_le is None else _horodatage(cree_le), bool(est_financable(resultats, situation.personnes_foyer)),
+            resultats.revenus_salaires, situation.personnes_foyer,
+            *((projet.prix_bien, projet.apport, projet.taux_nominal, projet.duree_annees, projet.loyer_attendu)
+              if projet else (None,) * 5),
+            *(getattr(resultats, nom_ratio) for nom_ratio in COLONNES_RATIOS),
+            details, entrees, bloc, len(bloc) // 8 // len(INDICATEURS_PROJECTION) if bloc else None,
+        )
+
+    def enregistrer(self, foyer: str, situation: SituationActuelle, premier_bien: Optional[PremierBien],
+                    projet: Optional[NouveauProjet], resultats: ResultatRatios, projection=None,
+                    nom: Optional[str] = None, cree_le: Optional[Horodatage] = None) -> int:
+        """Enregistre un scénario (projection : DataFrame de `calculer_projection_rentabilite`) ; retourne son id."""
+        ligne = self._ligne(foyer, situation, premier_bien, projet, resultats, projection, nom, cree_le)
+        with self._verrou:
+            return self._connexion.execute(_INSERTION, ligne).lastrowid
+
+    def enregistrer_plusieurs(self, scenarios: Iterable[dict]) -> int:
+        """Enregistre des scénarios (arguments de `enregistrer`) en une transaction ; retourne leur nombre."""
+        lignes = [self._ligne(**scenario) for scenario in scenarios]
+        with self._verrou:
+            self._connexion.execute("BEGIN")
+            try:
+                self._connexion.executemany(_INSERTION, lignes)
+            except BaseException:
+                self._connexion.execute("ROLLBACK")
+                raise
+            self._connexion.execute("COMMIT")
+        return len(lignes)
+
+    def lister(self, foyer: Optional[str] = None, financable: Optional[bool] = None,
+               depuis: Optional[Horodatage] = None, avant: Optional[Horodatage] = None,
+               avant_id: Optional[int] = None, limite: int = 50) -> List[dict]:
+        """
+        Scénarios les plus récents d'abord, puis par id décroissant (colonnes de COLONNES_LISTE).
+        Page suivante : `avant=` date de création et `avant_id=` id du dernier scénario de la
+        page précédente (sans l'id, les scénarios de même date que lui seraient sautés).
+        """
+        conditions, parametres = [], []
+        avant = _horodatage(avant)
+        curseur = ("(cree_le, id) < (?, ?)", (avant, avant_id)) if avant is not None and avant_id is not None \
+            else ("cree_le < ?", (avant,))
+        for condition, valeurs in (("foyer = ?", (foyer,)), ("financable = ?", (financable,)),
+                                   ("cree_le >= ?", (_horodatage(depuis),)), curseur):
+            if valeurs[0] is not None:
+                conditions.append(condition)
+                parametres.extend(valeurs)
+        requete = f"SELECT {', '.join(COLONNES_LISTE)} FROM scenarios"
+        if conditions:
+            requete += " WHERE " + " AND ".join(conditions)
+        requete += " ORDER BY cree_le DESC, id DESC LIMIT ?"
+        with self._verrou:
+            lignes = self._connexion.execute(requete, (*parametres, limite)).fetchall()
+        return [{**dict(zip(COLONNES_LISTE, ligne)), "financable": bool(ligne[4])} for ligne in lignes]
+
+    def foyers(self) -> List[str]:
+        """Foyers distincts, par sauts dans l'index (un accès par foyer, pas un parcours de la table)."""
+        with self._verrou:
+            return [foyer for (foyer,) in self._connexion.execute("""
+                WITH RECURSIVE distincts(foyer) AS (
+                    SELECT MIN(foyer) FROM scenarios
+                    UNION ALL
+                    SELECT (SELECT MIN(foyer) FROM scenarios WHERE foyer > distincts.foyer)
+                    FROM distincts WHERE foyer IS NOT NULL
+                )
+                SELECT foyer FROM distincts WHERE foyer IS NOT NULL
+            """)]
+
+    def charger(self, identifiant: int) -> Optional[ScenarioEnregistre]:
+        """Scénario complet : modèles d'entrée, `ResultatRatios` et projection."""
+        with self._verrou:
+            ligne = self._connexion.execute(
+                f"SELECT id, foyer, nom, cree_le, entrees, details_porteurs, projection, projection_annees, "
+                f"{', '.join(COLONNES_RATIOS)} FROM scenarios WHERE id = ?", (identifiant,)).fetchone()
+        if ligne is None:
+            return None
+        identifiant, foyer, nom, cree_le, entrees, details, bloc, annees = ligne[:8]
+        entrees = json.loads(entrees)
+        details_porteurs = tuple(DetailPorteur(**d) for d in json.loads(details)) if details else ()
+        resultats = ResultatRatios(details_porteurs=details_porteurs, **dict(zip(COLONNES_RATIOS, ligne[8:])))
+        return ScenarioEnregistre(
+            identifiant, foyer, nom, cree_le,
+            SituationActuelle.model_validate(entrees["situation"]),
+            PremierBien.model_validate(entrees["premier_bien"]) if entrees["premier_bien"] else None,
+            NouveauProjet.model_validate(entrees["projet"]) if entrees["projet"] else None,
+            resultats, _lire_projection(bloc, annees),
+        )
+
+    def comparer(self, identifiants: Sequence[int], projection: bool = True) -> dict:
+        """
+        Scénarios côte à côte, dans l'ordre demandé : une liste par colonne (COLONNES_LISTE,
+        entrées et ratios) et, si demandé, un tableau (scénarios × années) par indicateur de
+        projection, complété par NaN pour les horizons plus courts ou sans projection.
+        """
+        colonnes = tuple(dict.fromkeys((*COLONNES_LISTE, *COLONNES_ENTREES, *COLONNES_RATIOS)))
+        selection = ", ".join(colonnes) + (", projection, projection_annees" if projection else "")
+        marques = ", ".join("?" * len(identifiants))
+        with self._verrou:
+            lignes = self._connexion.execute(f"SELECT {selection} FROM scenarios WHERE id IN ({marques})",
+                                             tuple(identifiants)).fetchall()
+        par_id = {ligne[0]: ligne for ligne in lignes}
+        lignes = [par_id[i] for i in identifiants if i in par_id]
+        comparaison = {nom: [ligne[k] for ligne in lignes] for k, nom in enumerate(colonnes)}
+        if projection:
+            annees = max((ligne[-1] or 0 for ligne in lignes), default=0)
+            tableaux = {nom: np.full((len(lignes), annees), np.nan) for nom in INDICATEURS_PROJECTION}
+            for position, ligne in enumerate(lignes):
+                for nom, valeurs in (_lire_projection(ligne[-2], ligne[-1]) or {}).items():
+                    tableaux[nom][position, :len(valeurs)] = valeurs
+            comparaison["projection"] = tableaux
+        return comparaison
+
+    def supprimer(self, identifiants: Sequence[int]):
+        with self._verrou:
+            self._connexion.executemany("DELETE FROM scenarios WHERE id = ?", [(i,) for i in identifiants])
+
+    def compter(self) -> int:
+        with self._verrou:
+            return self._connexion.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+
+
+_stockage_par_defaut = None
+_verrou_defaut = threading.Lock()
+
+
+def stockage_par_defaut() -> StockageScenarios:
+    """Instance partagée par le processus (créée au premier usage)."""
+    global _stockage_par_defaut
+    with _verrou_defaut:
+        if _stockage_par_defaut is None:
+            _stockage_par_defaut = StockageScenarios()
+        return _stockage_par_defaut
@@ -0,0 +1,7 @@
+"""Modules de l'application et jeux de données des benchmarks importables depuis les tests."""
+import sys
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(RACINE / "benchmarks"))
@@ -0,0 +1,64 @@
+"""API HTTP : statuts de réponse sur des requêtes hors domaine."""
+import http.client
+import json
+import threading
+
+import pytest
+
+from api_http import ServeurAPI
+from fixtures import sci_multi_porteurs
+
+
+@pytest.fixture(scope="module")
+def serveur():
+    serveur = ServeurAPI(("127.0.0.1", 0))
+    fil = threading.Thread(target=serveur.serve_forever, daemon=True)
+    fil.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def _poster(serveur, route: str, contenu: dict):
+    connexion = http.client.HTTPConnection(*serveur.server_address, timeout=10)
+    try:
+        connexion.request("POST", route, json.dumps(contenu), {"Content-Type": "application/json"})
+        reponse = connexion.getresponse()
+        return reponse.status, reponse.read()
+    finally:
+        connexion.close()
+
+
+def _scenario(**projet) -> dict:
+    situation, premier_bien, nouveau_projet = sci_multi_porteurs()
+    return {"situation": situation.model_dump(mode="json"), "premier_bien": premier_bien.model_dump(mode="json"),
+            "projet": {**nouveau_projet.model_dump(mode="json"), **projet}}
+
+
+@pytest.mark.parametrize("projet", [{"duree_annees": 0}, {"prix_bien": -1}, {"apport": -1}])
+@pytest.mark.parametrize("route", ["/ratios", "/pdf", "/batch"])
+def test_projet_hors_domaine_422(serveur, route, projet):
+    contenu = _scenario(**projet)
+    if route == "/batch":
+        contenu = {"scenarios": [contenu]}
+    statut, corps = _poster(serveur, route, contenu)
+    assert statut == 422
+    assert json.loads(corps)["erreur"] == "Requête invalide"
+
+
+@pytest.mark.parametrize("route", ["/ratios", "/batch"])
+def test_projet_valide_200(serveur, route):
+    contenu = _scenario()
+    statut, _ = _poster(serveur, route, {"scenarios": [contenu]} if route == "/batch" else contenu)
+    assert statut == 200
+
+
+@pytest.mark.parametrize("pret", [{"duree_annees": 0}, {"capital_emprunte": -1}])
+def test_pret_hors_domaine_422(serveur, pret):
+    situation, _, _ = sci_multi_porteurs()
+    bien = {"nom": "T2", "valeur_actuelle": 200_000,
+            "prets": [{"capital_emprunte": 150_000, "taux_nominal": 3.2, "duree_annees": 20, **pret}]}
+    statut, corps = _poster(serveur, "/portefeuille", {"portefeuille": {"situation": situation.model_dump(mode="json"),
+                                                                        "biens": [bien]}})
+    assert statut == 422
+    assert json.loads(corps)["details"][0]["loc"][-1] == next(iter(pret))
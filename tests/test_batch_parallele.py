@@ -0,0 +1,67 @@
+"""Simulation par fragments : découpage de l'entrée et fusion des fragments."""
+import pandas as pd
+import pytest
+
+from batch_parallele import _decouper_csv, _decouper_parquet, fusionner, simuler_en_parallele
+from cli_simulation import simuler_fichier
+from fixtures import lot_foyers
+
+LIGNES, TAILLE_SHARD = 1_000, 300
+
+
+@pytest.fixture
+def foyers_clairsemes() -> pd.DataFrame:
+    """Foyers dont le nom (en-tête entre guillemets) et la date d'achat manquent dans le premier fragment."""
+    foyers = lot_foyers(LIGNES)
+    foyers.insert(0, "nom, prénom", None)
+    foyers.loc[TAILLE_SHARD:, "nom, prénom"] = "x"
+    foyers["date_achat"] = None
+    foyers.loc[LIGNES // 2:, "date_achat"] = "2018-01-01"
+    return foyers
+
+
+def _lire(chemin) -> pd.DataFrame:
+    if str(chemin).endswith(".parquet"):
+        return pd.read_parquet(chemin)
+    return pd.read_csv(chemin, dtype={"nom, prénom": str, "date_achat": str})
+
+
+def test_entete_entre_guillemets(tmp_path, foyers_clairsemes):
+    entree = tmp_path / "entree.csv"
+    foyers_clairsemes.to_csv(entree, index=False)
+    fragments = _decouper_csv(str(entree), TAILLE_SHARD)
+    assert fragments[0]["colonnes"] == list(foyers_clairsemes.columns)
+    assert len(fragments) == 4
+
+
+def test_groupe_parquet_unique_decoupe(tmp_path, foyers_clairsemes):
+    entree = tmp_path / "entree.parquet"
+    foyers_clairsemes.to_parquet(entree, row_group_size=LIGNES)
+    fragments = _decouper_parquet(str(entree), TAILLE_SHARD)
+    assert [fragment["lignes"] for fragment in fragments] == [[0, 300], [300, 600], [600, 900], [900, 1000]]
+
+
+@pytest.mark.parametrize("format_entree", ["csv", "parquet"])
+@pytest.mark.parametrize("format_fragments", ["csv", "parquet"])
+@pytest.mark.parametrize("format_fusion", ["csv", "parquet"])
+def test_fusion_colonne_vide_dans_le_premier_fragment(tmp_path, foyers_clairsemes, format_entree, format_fragments, format_fusion):
+    entree = tmp_path / f"entree.{format_entree}"
+    if format_entree == "csv":
+        foyers_clairsemes.to_csv(entree, index=False)
+    else:
+        foyers_clairsemes.to_parquet(entree, row_group_size=LIGNES)
+    fusion = tmp_path / f"fusion.{format_fusion}"
+
+    bilan = simuler_en_parallele(str(entree), str(tmp_path / "fragments"), processus=2, taille_shard=TAILLE_SHARD,
+                                 format_sortie=format_fragments, progression=False)
+    fusionner(str(tmp_path / "fragments"), str(fusion))
+
+    assert bilan["fragments"] == 4
+    resultats = _lire(fusion)
+    assert len(resultats) == LIGNES
+    assert resultats["nom, prénom"].isna().sum() == TAILLE_SHARD
+    assert (resultats["date_achat"].iloc[LIGNES // 2:] == "2018-01-01").all()
+    # Mêmes résultats que la simulation en un seul processus
+    reference = tmp_path / f"reference.{format_fusion}"
+    simuler_fichier(str(entree), str(reference), progression=False)
+    pd.testing.assert_frame_equal(resultats, _lire(reference))
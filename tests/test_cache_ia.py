@@ -0,0 +1,20 @@
+"""Cache des analyses IA : une écriture en échec n'emporte pas la connexion."""
+import sqlite3
+
+import pytest
+
+from cache_ia import CacheAnalysesIA
+
+
+def test_ecriture_en_echec_annulee():
+    cache = CacheAnalysesIA(":memory:")
+    cache.enregistrer("a", "premiere")
+    cache._connexion.execute("""
+        CREATE TRIGGER refus BEFORE INSERT ON analyses WHEN NEW.cle = 'refusee'
+        BEGIN SELECT RAISE(ABORT, 'écriture refusée'); END
+    """)
+    with pytest.raises(sqlite3.IntegrityError):
+        cache.enregistrer("refusee", "x")
+    assert not cache._connexion.in_transaction
+    cache.enregistrer("b", "seconde")
+    assert (cache.obtenir("a"), cache.obtenir("b"), cache.obtenir("refusee")) == ("premiere", "seconde", None)
@@ -0,0 +1,49 @@
+"""Simulation en lot : types de sortie stables d'un bloc à l'autre (colonnes vides au début du fichier)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cli_simulation import simuler_fichier
+from fixtures import lot_foyers
+
+LIGNES, TAILLE_BLOC = 1_000, 300
+
+
+@pytest.fixture
+def foyers_clairsemes() -> pd.DataFrame:
+    """Foyers dont une colonne de texte et la date d'achat ne sont remplies qu'après le premier bloc."""
+    foyers = lot_foyers(LIGNES)
+    foyers.insert(0, "nom", None)
+    foyers.loc[TAILLE_BLOC:, "nom"] = "x"
+    foyers["date_achat"] = None
+    foyers.loc[LIGNES // 2:, "date_achat"] = "2018-01-01"
+    foyers["prix_bien"] = foyers["prix_bien"].round().astype(np.int64)  # entiers dans le premier bloc...
+    foyers["prix_bien"] = foyers["prix_bien"].astype(object)
+    foyers.loc[LIGNES - 1, "prix_bien"] = 210_000.5                      # ... décimale dans le dernier
+    return foyers
+
+
+def _lire(chemin) -> pd.DataFrame:
+    if chemin.suffix == ".parquet":
+        return pd.read_parquet(chemin)
+    return pd.read_csv(chemin, dtype={"nom": str, "date_achat": str})
+
+
+@pytest.mark.parametrize("format_entree", ["csv", "parquet"])
+@pytest.mark.parametrize("format_sortie", ["csv", "parquet"])
+def test_colonnes_vides_dans_le_premier_bloc(tmp_path, foyers_clairsemes, format_entree, format_sortie):
+    entree = tmp_path / f"entree.{format_entree}"
+    if format_entree == "csv":
+        foyers_clairsemes.to_csv(entree, index=False)
+    else:
+        foyers_clairsemes.astype({"prix_bien": np.float64}).to_parquet(entree, row_group_size=LIGNES)
+    sortie = tmp_path / f"sortie.{format_sortie}"
+
+    bilan = simuler_fichier(str(entree), str(sortie), taille_bloc=TAILLE_BLOC, progression=False)
+
+    resultats = _lire(sortie)
+    assert bilan["lignes"] == len(resultats) == LIGNES
+    assert resultats["nom"].isna().sum() == TAILLE_BLOC
+    assert (resultats["nom"].iloc[TAILLE_BLOC:] == "x").all()
+    assert (resultats["date_achat"].iloc[LIGNES // 2:] == "2018-01-01").all()
+    assert resultats["prix_bien"].iloc[-1] == 210_000.5
@@ -0,0 +1,32 @@
+"""Historique des scénarios : horodatage et transaction d'insertion."""
+import sqlite3
+
+import pytest
+
+from calculs import calcul_ratios
+from fixtures import foyer_simple
+from stockage_scenarios import StockageScenarios
+
+
+def _scenario(**options) -> dict:
+    situation, premier_bien, projet = foyer_simple()
+    return {"foyer": "f1", "situation": situation, "premier_bien": premier_bien, "projet": projet,
+            "resultats": calcul_ratios(situation, premier_bien, projet), **options}
+
+
+def test_date_de_creation_explicite_a_zero():
+    stockage = StockageScenarios(":memory:")
+    stockage.enregistrer(**_scenario(cree_le=0))
+    stockage.enregistrer(**_scenario())
+    dates = sorted(ligne["cree_le"] for ligne in stockage.lister())
+    assert dates[0] == 0
+    assert dates[1] > 0
+
+
+def test_lot_en_echec_annule():
+    stockage = StockageScenarios(":memory:")
+    with pytest.raises(sqlite3.IntegrityError):
+        # foyer absent (NOT NULL) sur le second scénario : rien n'est enregistré
+        stockage.enregistrer_plusieurs([_scenario(), _scenario(foyer=None)])
+    assert stockage.lister() == []
+    assert stockage.enregistrer_plusieurs([_scenario()]) == 1
@@ -0,0 +1,272 @@
+"""
+Validation en colonnes des entrées en lot, puis construction des modèles sans revalidation.
+
+La validation pydantic objet par objet coûte bien plus que `calcul_ratios` lui-même sur
+des millions de lignes. Ici, chaque règle (type, bornes, dates, somme des pourcentages par
+foyer) s'évalue sur une colonne entière ; une fois les colonnes validées, les modèles sont
+créés sans validation par objet (entrées « de confiance »).
+
+Bornes : celles des champs de saisie de app.py. Les colonnes absentes valent 0 (voir
+`calculs_batch.COLONNES_FOYER`) ; une valeur vide n'est admise que pour les colonnes
+facultatives (premier bien, projet). Porteurs multiples : table à part, une ligne par
+porteur, la colonne `foyer` donnant la position du foyer dans la table principale.
+"""
+import gc
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calculs_batch import DonneesColonnes, _nombre_lignes
+from data_models import NouveauProjet, PorteurProjet, PremierBien, SituationActuelle
+
+
+class Regle(NamedTuple):
+    entier: bool
+    minimum: float
+    maximum: Optional[float]
+    facultative: bool  # valeur vide admise (vaut 0, ou « non renseigné »)
+
+
+REGLES_FOYER = {
+    "revenus_mensuels": Regle(False, 0, None, False),
+    "charges_mensuelles": Regle(False, 0, None, False),
+    "credits_mensuels": Regle(False, 0, None, False),
+    "personnes_foyer": Regle(True, 1, None, False),
+    "prix_achat": Regle(False, 0, None, True),
+    "mensualite_actuelle": Regle(False, 0, None, True),
+    "loyer_percu": Regle(False, 0, None, True),
+    "duree_pret_initiale": Regle(True, 0, 30, True),  # 0 : non renseignée
+    "prix_bien": Regle(False, 0, None, True),
+    "apport": Regle(False, 0, None, True),
+    "taux_nominal": Regle(False, 0, None, True),
+    "duree_annees": Regle(True, 0, 30, True),  # 0 : pas de nouveau projet
+    "loyer_attendu": Regle(False, 0, None, True),
+}
+
+REGLES_PORTEURS = {
+    "foyer": Regle(True, 0, None, False),
+    "revenus_mensuels": Regle(False, 0, None, False),
+    "charges_mensuelles": Regle(False, 0, None, False),
+    "credits_mensuels": Regle(False, 0, None, False),
+    "pourcentage_projet": Regle(False, 0, 100, False),
+}
+
+TOLERANCE_POURCENTAGES = 0.1  # comme calcul_ratios
+LIGNES_AFFICHEES = 10
+
+
+class ErreurColonne(NamedTuple):
+    colonne: str
+    message: str
+    lignes: np.ndarray  # index des lignes fautives
+
+    def __str__(self):
+        apercu = ", ".join(map(str, self.lignes[:LIGNES_AFFICHEES].tolist()))
+        suite = f" (+{len(self.lignes) - LIGNES_AFFICHEES})" if len(self.lignes) > LIGNES_AFFICHEES else ""
+        return f"{self.colonne} : {self.message} — {len(self.lignes)} ligne(s) : {apercu}{suite}"
+
+
+class ErreurValidationLot(ValueError):
+    """Entrées en lot invalides : une `ErreurColonne` par règle enfreinte, avec les lignes fautives."""
+
+    def __init__(self, erreurs: List[ErreurColonne]):
+        super().__init__("Entrées invalides :\n" + "\n".join(f"- {erreur}" for erreur in erreurs))
+        self.erreurs = erreurs
+
+
+def _valeurs(donnees: DonneesColonnes, nom: str, n: int):
+    """Colonne convertie en float64 et masque des cellules non numériques (vides exclues)."""
+    brutes = donnees[nom]
+    if isinstance(brutes, pd.Series) and brutes.dtype.kind in "fiub":
+        return brutes.to_numpy(dtype=np.float64), np.zeros(n, dtype=bool)
+    serie = pd.Series(np.broadcast_to(np.asarray(brutes, dtype=object), (n,)))
+    valeurs = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64)
+    return valeurs, np.isnan(valeurs) & serie.notna().to_numpy()
+
+
+def _verifier(donnees: DonneesColonnes, regles: dict, n: int, index: np.ndarray) -> List[ErreurColonne]:
+    erreurs = []
+    for nom, regle in regles.items():
+        if nom not in donnees:
+            continue
+        valeurs, non_numerique = _valeurs(donnees, nom, n)
+        vide = np.isnan(valeurs) & ~non_numerique
+        controles = [(non_numerique, "valeur non numérique")]
+        if not regle.facultative:
+            controles.append((vide, "valeur manquante"))
+        with np.errstate(invalid="ignore"):
+            if regle.entier:
+                controles.append((~vide & ~non_numerique & (valeurs != np.round(valeurs)), "entier attendu"))
+            controles.append((valeurs < regle.minimum, f"inférieur à {regle.minimum:g}"))
+            if regle.maximum is not None:
+                controles.append((valeurs > regle.maximum, f"supérieur à {regle.maximum:g}"))
+        erreurs += [ErreurColonne(nom, message, index[masque]) for masque, message in controles if masque.any()]
+    return erreurs
+
+
+def _dates_et_illisibles(donnees: DonneesColonnes, n: int):
+    """
+    Colonne date_achat convertie en dates (NaT si vide ou illisible) et masque des cellules
+    renseignées mais illisibles. Dates ISO 8601 (AAAA-MM-JJ) ou objets date, comme le champ pydantic.
+    """
+    serie = pd.Series(np.broadcast_to(np.asarray(donnees["date_achat"], dtype=object), (n,)))
+    dates = pd.to_datetime(serie, errors="coerce", format="ISO8601")
+    illisible = dates.isna().to_numpy() & serie.notna().to_numpy()
+    if illisible.any():  # chaînes blanches : vides, pas illisibles
+        candidates = np.flatnonzero(illisible)
+        illisible[candidates] = [not (isinstance(valeur, str) and not valeur.strip()) for valeur in serie.to_numpy()[candidates]]
+    return dates, illisible
+
+
+def _verifier_dates(donnees: DonneesColonnes, n: int, index: np.ndarray) -> List[ErreurColonne]:
+    if "date_achat" not in donnees:
+        return []
+    illisible = _dates_et_illisibles(donnees, n)[1]
+    return [ErreurColonne("date_achat", "date invalide", index[illisible])] if illisible.any() else []
+
+
+def _index(donnees: DonneesColonnes, n: int) -> np.ndarray:
+    return donnees.index.to_numpy() if isinstance(donnees, pd.DataFrame) else np.arange(n)
+
+
+def valider_colonnes(donnees: DonneesColonnes, porteurs: Optional[DonneesColonnes] = None):
+    """
+    Valide les foyers (et leurs porteurs) colonne par colonne ; lève `ErreurValidationLot`
+    avec les index des lignes fautives pour chaque règle enfreinte.
+    """
+    n = _nombre_lignes(donnees)
+    index = _index(donnees, n)
+    erreurs = _verifier(donnees, REGLES_FOYER, n, index) + _verifier_dates(donnees, n, index)
+    if porteurs is not None:
+        erreurs += _verifier_porteurs(porteurs, n)
+    if erreurs:
+        raise ErreurValidationLot(erreurs)
+
+
+def _verifier_porteurs(porteurs: DonneesColonnes, n_foyers: int) -> List[ErreurColonne]:
+    m = _nombre_lignes(porteurs)
+    index = _index(porteurs, m)
+    erreurs = [ErreurColonne(nom, "colonne absente", index) for nom in REGLES_PORTEURS if nom not in porteurs]
+    erreurs += _verifier(porteurs, REGLES_PORTEURS, m, index)
+    if erreurs:
+        return erreurs
+    foyer = np.asarray(porteurs["foyer"], dtype=np.int64)
+    hors_table = foyer >= n_foyers
+    if hors_table.any():
+        return [ErreurColonne("foyer", f"foyer inexistant (table de {n_foyers} foyers)", index[hors_table])]
+    # Somme des pourcentages par foyer, toutes lignes en une passe
+    sommes = np.bincount(foyer, weights=np.asarray(porteurs["pourcentage_projet"], dtype=np.float64), minlength=n_foyers)
+    fautifs = np.abs(sommes - 100) > TOLERANCE_POURCENTAGES
+    lignes_fautives = fautifs[foyer]
+    if lignes_fautives.any():
+        erreurs.append(ErreurColonne("pourcentage_projet", "somme par foyer différente de 100%", index[lignes_fautives]))
+    return erreurs
+
+
+_poser = object.__setattr__
+
+
+def _construire(classe, champs: dict):
+    """
+    Équivalent de `classe.model_construct(**champs)` quand tous les champs sont fournis :
+    `model_construct` traite défauts et alias en Python et coûte plus cher que la
+    validation pydantic (compilée) qu'il devait éviter.
+    """
+    modele = classe.__new__(classe)
+    _poser(modele, "__dict__", champs)
+    _poser(modele, "__pydantic_fields_set__", set(champs))
+    _poser(modele, "__pydantic_extra__", None)
+    _poser(modele, "__pydantic_private__", None)
+    return modele
+
+
+def _colonne_ou(donnees: DonneesColonnes, nom: str, n: int, entier: bool = False) -> list:
+    """Colonne en valeurs Python (vides à 0), prête pour `_construire`."""
+    if nom not in donnees:
+        return [0] * n if entier else [0.0] * n
+    valeurs = np.nan_to_num(np.broadcast_to(np.asarray(donnees[nom], dtype=np.float64), (n,)), nan=0.0)
+    return (valeurs.astype(np.int64) if entier else valeurs).tolist()
+
+
+def _dates(donnees: DonneesColonnes, n: int) -> list:
+    if "date_achat" not in donnees:
+        return [None] * n
+    dates = _dates_et_illisibles(donnees, n)[0]
+    return [None if pd.isna(jour) else jour for jour in dates.dt.date.tolist()]
+
+
+@contextmanager
+def _ramasse_miettes_suspendu():
+    """
+    Les modèles construits n'ont pas de cycles (le comptage de références suffit) ; sans
+    cette suspension, le ramasse-miettes reparcourt tous les objets déjà créés et coûte
+    plus que la construction elle-même sur des centaines de milliers de lignes.
+    """
+    actif = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if actif:
+            gc.enable()
+
+
+def modeles_de_confiance(donnees: DonneesColonnes, porteurs: Optional[DonneesColonnes] = None,
+                         valider: bool = True) -> List[Tuple[SituationActuelle, Optional[PremierBien], Optional[NouveauProjet]]]:
+    """
+    (situation, premier_bien, projet) de chaque foyer, construits sans validation par objet.
+
+    Les colonnes sont validées d'un bloc au préalable (`valider=False` pour des données
+    déjà validées en amont). Premier bien : si mensualite_actuelle > 0 ; projet : si
+    prix_bien > 0 et duree_annees > 0, comme `calcul_ratios_batch`.
+    """
+    if valider:
+        valider_colonnes(donnees, porteurs)
+    n = _nombre_lignes(donnees)
+    revenus, charges, credits = (_colonne_ou(donnees, nom, n) for nom in ("revenus_mensuels", "charges_mensuelles", "credits_mensuels"))
+    personnes = _colonne_ou(donnees, "personnes_foyer", n, entier=True) if "personnes_foyer" in donnees else [1] * n
+    prix_achat, mensualite_actuelle, loyer_percu = (_colonne_ou(donnees, nom, n) for nom in ("prix_achat", "mensualite_actuelle", "loyer_percu"))
+    duree_pret_initiale = _colonne_ou(donnees, "duree_pret_initiale", n, entier=True)
+    dates = _dates(donnees, n)
+    prix_bien, apport, taux, loyer_attendu = (_colonne_ou(donnees, nom, n) for nom in ("prix_bien", "apport", "taux_nominal", "loyer_attendu"))
+    duree_annees = _colonne_ou(donnees, "duree_annees", n, entier=True)
+
+    modeles = []
+    with _ramasse_miettes_suspendu():
+        porteurs_par_foyer = _porteurs_par_foyer(porteurs, n) if porteurs is not None else None
+        for i in range(n):
+            situation = _construire(SituationActuelle, {
+                "revenus_mensuels": revenus[i], "charges_mensuelles": charges[i], "credits_mensuels": credits[i],
+                "personnes_foyer": personnes[i], "porteurs": porteurs_par_foyer[i] if porteurs_par_foyer else [],
+            })
+            premier_bien = None
+            if mensualite_actuelle[i] > 0:
+                premier_bien = _construire(PremierBien, {
+                    "prix_achat": prix_achat[i], "mensualite_actuelle": mensualite_actuelle[i], "loyer_percu": loyer_percu[i],
+                    "date_achat": dates[i], "duree_pret_initiale": duree_pret_initiale[i] or None,
+                })
+            projet = None
+            if prix_bien[i] > 0 and duree_annees[i] > 0:
+                projet = _construire(NouveauProjet, {
+                    "prix_bien": prix_bien[i], "apport": apport[i], "taux_nominal": taux[i],
+                    "duree_annees": duree_annees[i], "loyer_attendu": loyer_attendu[i],
+                })
+            modeles.append((situation, premier_bien, projet))
+    return modeles
+
+
+def _porteurs_par_foyer(porteurs: DonneesColonnes, n_foyers: int) -> List[List[PorteurProjet]]:
+    m = _nombre_lignes(porteurs)
+    noms = [str(nom) for nom in porteurs["nom"]] if "nom" in porteurs else [f"Porteur {k + 1}" for k in range(m)]
+    foyer = np.asarray(porteurs["foyer"], dtype=np.int64).tolist()
+    revenus, charges, credits, pourcentages = (_colonne_ou(porteurs, nom, m) for nom in
+                                               ("revenus_mensuels", "charges_mensuelles", "credits_mensuels", "pourcentage_projet"))
+    par_foyer = [[] for _ in range(n_foyers)]
+    for k in range(m):
+        par_foyer[foyer[k]].append(_construire(PorteurProjet, {
+            "nom": noms[k], "revenus_mensuels": revenus[k], "charges_mensuelles": charges[k],
+            "credits_mensuels": credits[k], "pourcentage_projet": pourcentages[k],
+        }))
+    return par_foyer